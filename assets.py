@@ -0,0 +1,535 @@
+from deck import CARD_TABLE
+from collections import OrderedDict
+from math import ceil, sqrt
+from pygame import BLEND_RGBA_ADD, SRCALPHA, Rect, Surface, display, error, font, image, transform
+from threading import Thread
+from typing import Optional
+import argparse
+import hashlib
+import json
+import os
+import struct
+
+
+PNG_SIGNATURE: bytes = b"\x89PNG\r\n\x1a\n"
+CARD_IMAGES: list[str] = ["images/hidden.png"] + [card.get_image_name() for card in CARD_TABLE]
+SHEET_PATH: str = "images/cards.png"
+SPRITE_CACHE_DIR: str = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "makao", "sprites"
+)
+# size, modification time and SHA-1 of source images already compared with the sheet
+SHEET_SOURCES_PATH: str = os.path.join(os.path.dirname(SPRITE_CACHE_DIR), "sheet_sources.json")
+
+
+class NotPNGFile(ValueError):
+    def __init__(self, path: str, message: str = "File is not a PNG image") -> None:
+        super().__init__(message, path)
+
+
+def png_size(path: str) -> tuple[int, int]:
+    """
+    Reads width and height of a PNG image from its header without decoding it
+
+    :raises NotPNGFile: If the file doesn't start with PNG signature
+    """
+    with open(path, "rb") as file_handle:
+        header: bytes = file_handle.read(24)
+    if len(header) < 24 or not header.startswith(PNG_SIGNATURE):
+        raise NotPNGFile(path)
+    return struct.unpack(">II", header[16:24])
+
+
+class TextCache:
+    def __init__(self, max_size: int = 128) -> None:
+        """
+        Bounded cache of rendered text surfaces, keyed by text, font and color.
+        When the cache is full the least recently used surface is dropped.
+
+        :param max_size: Maximum number of surfaces kept in the cache
+        """
+        self._max_size: int = max_size
+        self._surfaces: OrderedDict[tuple, Surface] = OrderedDict()
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Returns number of renders that had to rasterize text
+        """
+        return self._misses
+
+    def render(
+        self,
+        text: str,
+        text_font: font.Font,
+        color: tuple[int, ...],
+        antialias: bool = True,
+    ) -> Surface:
+        """
+        Returns rendered text surface, text is only rendered if it's not cached yet
+
+        :param text: Text to render
+        :param text_font: Font used for rendering, fonts are compared by identity
+        :param color: Text color
+        :param antialias: Passed to font render
+        :return: Surface with rendered text, must not be modified by the caller
+        """
+        key: tuple = (text, text_font, tuple(color), antialias)
+        surface: Surface = self._surfaces.get(key, None)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self._hits += 1
+            return surface
+
+        self._misses += 1
+        surface = text_font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns SHA-1 of the file's contents, used to tell if an image has changed
+    """
+    with open(path, "rb") as file_handle:
+        return hashlib.sha1(file_handle.read()).hexdigest()
+
+
+def sheet_index_path(path: str) -> str:
+    """
+    Returns path of the file with coordinates of images in the sprite sheet
+    """
+    return os.path.splitext(path)[0] + ".json"
+
+
+class SpriteSheet:
+    def __init__(
+        self,
+        surface: Surface,
+        index: dict[str, tuple[int, int, int, int]],
+        digests: Optional[dict[str, str]] = None,
+        sizes: Optional[dict[str, int]] = None,
+    ) -> None:
+        """
+        Images packed into one surface, every image is handed out as its subsurface,
+        so the whole set is decoded and converted to the display format at once
+
+        :param surface: Surface with all images
+        :param index: Position and size of every image keyed by path of its source file
+        :param digests: SHA-1 of every source file when the sheet was built, see file_digest
+        :param sizes: Size in bytes of every source file when the sheet was built
+        """
+        self._surface: Surface = surface
+        self._index: dict[str, tuple[int, int, int, int]] = index
+        self._digests: dict[str, str] = digests if digests is not None else {}
+        self._sizes: dict[str, int] = sizes if sizes is not None else {}
+
+    @property
+    def surface(self) -> Surface:
+        return self._surface
+
+    @property
+    def paths(self) -> list[str]:
+        return list(self._index)
+
+    def digest(self, path: str) -> Optional[str]:
+        """
+        Returns SHA-1 of the source file the image was packed from, None if it isn't known
+        """
+        return self._digests.get(path, None)
+
+    def stale_paths(self, checked: Optional[dict[str, list]] = None) -> list[str]:
+        """
+        Returns paths of images whose source files have changed since the sheet was built,
+        images without known digest are stale too. Missing source files aren't stale,
+        the sheet is their only copy. Files are only read and hashed when their size is the same
+        as when the sheet was built and they aren't in checked with the same modification time.
+
+        :param checked: Size, modification time in ns and SHA-1 of source files compared before,
+            files found unchanged are added to it, see SHEET_SOURCES_PATH
+        """
+        checked = checked if checked is not None else {}
+        stale: list[str] = []
+        for path in self.paths:
+            try:
+                stat: os.stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue
+            digest: Optional[str] = self._digests.get(path, None)
+            stamp: list = [stat.st_size, stat.st_mtime_ns, digest]
+            if digest is None or self._sizes.get(path, stat.st_size) != stat.st_size:
+                stale.append(path)
+            elif checked.get(path, None) != stamp:
+                if file_digest(path) != digest:
+                    stale.append(path)
+                else:
+                    checked[path] = stamp
+        return stale
+
+    @classmethod
+    def build(cls, paths: list[str]) -> "SpriteSheet":
+        """
+        Packs images into a grid of cells as big as the biggest image
+        """
+        images: list[Surface] = [image.load(path) for path in paths]
+        cell_width: int = max(surface.get_width() for surface in images)
+        cell_height: int = max(surface.get_height() for surface in images)
+        columns: int = ceil(sqrt(len(images)))
+        rows: int = ceil(len(images) / columns)
+        sheet: Surface = Surface((columns * cell_width, rows * cell_height), SRCALPHA)
+        index: dict[str, tuple[int, int, int, int]] = {}
+        for number, (path, surface) in enumerate(zip(paths, images)):
+            x: int = number % columns * cell_width
+            y: int = number // columns * cell_height
+            # adding to a transparent sheet copies pixels together with alpha, blending would darken them
+            sheet.blit(surface, (x, y), special_flags=BLEND_RGBA_ADD)
+            index[path] = (x, y, *surface.get_size())
+        return cls(
+            sheet,
+            index,
+            {path: file_digest(path) for path in paths},
+            {path: os.path.getsize(path) for path in paths},
+        )
+
+    def save(self, path: str = SHEET_PATH) -> None:
+        """
+        Writes the sheet as PNG image, and coordinates, source digests and sizes of images
+        next to it, see sheet_index_path
+        """
+        image.save(self.surface, path)
+        index: dict[str, dict] = {
+            key: {"rect": rect, "sha1": self._digests.get(key, None), "size": self._sizes.get(key, None)}
+            for key, rect in self._index.items()
+        }
+        with open(sheet_index_path(path), "w") as file_handle:
+            json.dump(index, file_handle, indent=4)
+
+    @classmethod
+    def load(cls, path: str = SHEET_PATH) -> "SpriteSheet":
+        with open(sheet_index_path(path), "r") as file_handle:
+            index: dict[str, dict] = json.load(file_handle)
+        return cls(
+            image.load(path),
+            {key: tuple(entry["rect"]) for key, entry in index.items()},
+            {key: entry["sha1"] for key, entry in index.items() if entry.get("sha1", None)},
+            {key: entry["size"] for key, entry in index.items() if entry.get("size", None) is not None},
+        )
+
+    def converted(self) -> "SpriteSheet":
+        """
+        Returns the sheet converted to the display format, a window has to be open
+        """
+        return SpriteSheet(self.surface.convert_alpha(), self._index, self._digests, self._sizes)
+
+    def image(self, path: str) -> Surface:
+        """
+        :raises KeyError: If the image isn't in the sheet
+        """
+        return self.surface.subsurface(Rect(self._index[path]))
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class SpriteCache:
+    def __init__(self, max_size: int = 512, cache_dir: Optional[str] = None) -> None:
+        """
+        Bounded cache of card images scaled to given sizes and rotated, shared by everything
+        drawn in one window. Every image file is read once, every variant is scaled once.
+        Surfaces are converted to the display format when a window is open,
+        so that blitting them doesn't convert pixels every frame.
+
+        Scaled variants can also be kept on disk, so that they are scaled once across runs.
+        Names of their files include a hash of the pixels that were scaled, so a variant
+        is made again after its source file or the sprite sheet it came from has changed.
+
+        :param max_size: Maximum number of scaled surfaces kept in the cache
+        :param cache_dir: Directory scaled variants are stored in, they are only kept
+            in memory if it's not given
+        """
+        self._max_size: int = max_size
+        self._cache_dir: Optional[str] = cache_dir
+        self._originals: dict[str, Surface] = {}
+        self._versions: dict[str, str] = {}
+        self._sprites: OrderedDict[tuple[str, tuple[int, int], int], Surface] = OrderedDict()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._disk_hits: int = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def cache_dir(self) -> Optional[str]:
+        return self._cache_dir
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Returns number of sprites that weren't cached in memory or on disk
+        """
+        return self._misses
+
+    @property
+    def disk_hits(self) -> int:
+        """
+        Returns number of sprites that were read from the cache directory
+        """
+        return self._disk_hits
+
+    def image(self, path: str) -> Surface:
+        """
+        Returns image in its original size, every file is only loaded once
+
+        :param path: Path of the image file
+        :return: Loaded surface, must not be modified by the caller
+        """
+        surface: Surface = self._originals.get(path, None)
+        if surface is None:
+            self.add(path, image.load(path))
+            surface = self._originals[path]
+        return surface
+
+    def add(self, path: str, surface: Surface) -> None:
+        """
+        Stores already loaded image, it's converted to the display format if a window is open
+        """
+        if display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self._originals[path] = surface
+        self._versions.pop(path, None)
+
+    def add_sheet(self, sheet: SpriteSheet) -> None:
+        """
+        Stores every image of the sheet as its subsurface, the sheet is converted
+        to the display format once if a window is open
+        """
+        if display.get_surface() is not None:
+            sheet = sheet.converted()
+        for path in sheet.paths:
+            self._originals[path] = sheet.image(path)
+            self._versions.pop(path, None)
+
+    def _version(self, path: str) -> str:
+        """
+        Returns hash of the pixels of the original image, computed once per loaded image
+        """
+        version: Optional[str] = self._versions.get(path, None)
+        if version is None:
+            pixels: bytes = image.tobytes(self.image(path), "RGBA")
+            version = hashlib.sha1(pixels).hexdigest()[:16]
+            self._versions[path] = version
+        return version
+
+    def _variant_path(self, path: str, size: tuple[int, int], angle: int) -> Optional[str]:
+        """
+        Returns path of the file of a scaled variant or None if it isn't kept on disk
+        """
+        if self.cache_dir is None:
+            return None
+        name: str = os.path.splitext(os.path.basename(path))[0]
+        digest: str = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+        return os.path.join(
+            self.cache_dir, f"{name}-{digest}_{size[0]}x{size[1]}_{angle}_{self._version(path)}.png"
+        )
+
+    def _load_variant(self, variant_path: str) -> Optional[Surface]:
+        if not os.path.exists(variant_path):
+            return None
+        try:
+            surface: Surface = image.load(variant_path)
+        except (OSError, error):
+            return None
+        return surface.convert_alpha() if display.get_surface() is not None else surface
+
+    def _save_variant(self, variant_path: str, surface: Surface) -> None:
+        """
+        Writes the variant and removes variants made from other versions of its source,
+        the cache is only kept in memory if the directory can't be written
+        """
+        prefix: str = variant_path.rsplit("_", 1)[0] + "_"
+        temporary_path: str = f"{prefix}{os.getpid()}.tmp.png"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for file_name in os.listdir(self.cache_dir):
+                stale_path: str = os.path.join(self.cache_dir, file_name)
+                if stale_path.startswith(prefix) and not file_name.endswith(".tmp.png"):
+                    os.remove(stale_path)
+            image.save(surface, temporary_path)
+            os.replace(temporary_path, variant_path)
+        except (OSError, error):
+            return
+
+    def sprite(self, path: str, size: tuple[int, int], angle: int = 0) -> Surface:
+        """
+        Returns image scaled to given size and rotated, image is only scaled
+        if it's not cached yet
+
+        :param path: Path of the image file
+        :param size: Width and height of the sprite before rotation
+        :param angle: Angle in degrees the sprite is rotated by counterclockwise
+        :return: Scaled surface, must not be modified by the caller
+        """
+        key: tuple[str, tuple[int, int], int] = (path, size, angle)
+        surface: Surface = self._sprites.get(key, None)
+        if surface is not None:
+            self._sprites.move_to_end(key)
+            self._hits += 1
+            return surface
+
+        surface = self.image(path)
+        if surface.get_size() != size or angle:
+            variant_path: Optional[str] = self._variant_path(path, size, angle)
+            variant: Optional[Surface] = self._load_variant(variant_path) if variant_path else None
+            if variant is not None:
+                self._disk_hits += 1
+                surface = variant
+            else:
+                self._misses += 1
+                if surface.get_size() != size:
+                    surface = transform.smoothscale(surface, size)
+                if angle:
+                    surface = transform.rotate(surface, angle)
+                if variant_path:
+                    self._save_variant(variant_path, surface)
+        else:
+            self._misses += 1
+        self._sprites[key] = surface
+        if len(self._sprites) > self.max_size:
+            self._sprites.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        self._sprites.clear()
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+
+class ImagePreloader:
+    def __init__(
+        self, paths: list[str], sheet_path: Optional[str] = None, sources_path: Optional[str] = None
+    ) -> None:
+        """
+        Decodes images in a background thread, so that the window can be shown at once.
+        Images are only converted to the display format by install, which has to be
+        called from the main thread.
+
+        :param paths: Paths of image files in order in which they are loaded
+        :param sheet_path: Sprite sheet images are taken from if it exists, images
+            missing in it or changed since it was built are loaded from their own files
+        :param sources_path: File with source images already compared with the sheet,
+            so that they are hashed only once after they are checked out or touched,
+            see SpriteSheet.stale_paths
+        """
+        self._paths: list[str] = list(paths)
+        self._sheet_path: Optional[str] = sheet_path
+        self._sources_path: Optional[str] = sources_path
+        self._sheet: Optional[SpriteSheet] = None
+        self._images: dict[str, Surface] = {}
+        self._loaded: int = 0
+        self._thread: Thread = Thread(target=self._load, name="makao-preload", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> None:
+        paths: list[str] = self._paths
+        if self._sheet_path is not None and os.path.exists(self._sheet_path):
+            self._sheet = SpriteSheet.load(self._sheet_path)
+            checked: dict[str, list] = self._read_checked()
+            known: dict[str, list] = dict(checked)
+            stale: list[str] = self._sheet.stale_paths(checked)
+            if checked != known:
+                self._write_checked(checked)
+            paths = [path for path in paths if path not in self._sheet or path in stale]
+            self._loaded = len(self._paths) - len(paths)
+        for path in paths:
+            self._images[path] = image.load(path)
+            self._loaded += 1
+
+    def _read_checked(self) -> dict[str, list]:
+        if self._sources_path is None or not os.path.exists(self._sources_path):
+            return {}
+        try:
+            with open(self._sources_path, "r") as file_handle:
+                return json.load(file_handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_checked(self, checked: dict[str, list]) -> None:
+        if self._sources_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._sources_path), exist_ok=True)
+            with open(self._sources_path, "w") as file_handle:
+                json.dump(checked, file_handle)
+        except OSError:
+            pass
+
+    @property
+    def loaded(self) -> int:
+        return self._loaded
+
+    @property
+    def total(self) -> int:
+        return len(self._paths)
+
+    @property
+    def sheet(self) -> Optional[SpriteSheet]:
+        return self._sheet
+
+    @property
+    def done(self) -> bool:
+        """
+        Returns True if the thread has stopped, images that couldn't be loaded are missing
+        """
+        return not self._thread.is_alive()
+
+    def install(self, sprites: SpriteCache) -> None:
+        """
+        Waits until all images are decoded and adds them to the sprite cache,
+        images loaded from their own files replace stale images of the sheet
+        """
+        self._thread.join()
+        if self._sheet is not None:
+            sprites.add_sheet(self._sheet)
+        for path, surface in self._images.items():
+            sprites.add(path, surface)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack card images into one sprite sheet")
+    parser.add_argument("--output", default=SHEET_PATH, help="Path of the sheet, coordinates are written next to it")
+    args = parser.parse_args()
+
+    sheet: SpriteSheet = SpriteSheet.build(CARD_IMAGES)
+    sheet.save(args.output)
+    print(f"Packed {len(sheet)} images into {args.output}, {sheet.surface.get_width()}x{sheet.surface.get_height()}")
+
+
+if __name__ == "__main__":
+    main()
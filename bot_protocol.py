@@ -0,0 +1,339 @@
+from card import Card
+from deck import CARD_INDEX, CARD_TABLE
+from players import ComputerPlayer
+from rules import is_legal_sequence
+from functools import partial
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from subprocess import DEVNULL, PIPE, Popen, TimeoutExpired
+from threading import Lock, Thread
+from typing import IO, TYPE_CHECKING, Any, Callable, Optional
+import argparse
+import json
+import shlex
+import sys
+
+if TYPE_CHECKING:
+    from engine import GameEngine
+
+
+# keys of the game state that aren't game parameters
+STATE_KEYS: list[str] = ["center", "prev_len", "next_len", "seat_lens", "discarded"]
+
+Decision = tuple[list[Card], Optional[str]]
+
+
+class BotError(Exception):
+    def __init__(self, message: str = "Bot process has stopped or sent an invalid response") -> None:
+        super().__init__(message)
+
+
+class BotTimeout(BotError):
+    def __init__(self, timeout: float, message: str = "Bot hasn't answered in time") -> None:
+        super().__init__(f"{message}: {timeout} s")
+
+
+def encode_request(request_id: int, hand: list[Card], **game_state: Any) -> dict[str, Any]:
+    """
+    Converts game state passed to find_best_plays to a request sent to the bot,
+    cards are sent as indexes in CARD_TABLE
+
+    :param request_id: Number the response is matched with
+    :param hand: Cards of the player
+    """
+    return {
+        "id": request_id,
+        "center": CARD_INDEX[game_state["center"]],
+        "hand": [CARD_INDEX[card] for card in hand],
+        "params": {key: value for key, value in game_state.items() if key not in STATE_KEYS},
+        "prev_len": game_state.get("prev_len", 0),
+        "next_len": game_state.get("next_len", 0),
+        "seat_lens": list(game_state.get("seat_lens", ())),
+        "discarded": [CARD_INDEX[card] for card in game_state.get("discarded", ())],
+    }
+
+
+def decode_request(request: dict[str, Any]) -> tuple[list[Card], dict[str, Any]]:
+    """
+    Reverse of encode_request
+
+    :return: Hand of the player and game state
+    """
+    game_state: dict[str, Any] = {
+        "center": CARD_TABLE[request["center"]],
+        "prev_len": request["prev_len"],
+        "next_len": request["next_len"],
+        "seat_lens": tuple(request["seat_lens"]),
+        "discarded": tuple(CARD_TABLE[index] for index in request["discarded"]),
+    }
+    for key, value in request["params"].items():
+        game_state[key] = tuple(value) if isinstance(value, list) else value
+    return [CARD_TABLE[index] for index in request["hand"]], game_state
+
+
+def _write(stream: IO[str], message: dict[str, Any]) -> None:
+    stream.write(json.dumps(message, separators=(",", ":")) + "\n")
+    stream.flush()
+
+
+class BotProcess:
+    def __init__(self, command: list[str], timeout: float = 1.0, max_timeouts: int = 3) -> None:
+        """
+        Bot running in a subprocess. The engine writes one JSON request per line to its
+        stdin, see encode_request, and the bot answers every request with one line
+        {"id": id, "cards": [indexes of cards in CARD_TABLE], "selection": item or null},
+        no cards means drawing. Requests of many players and tables are written without
+        waiting for answers, so one process serves all of them, responses are matched
+        by id and can come in any order. The process is started with the first request
+        and started again if it stops.
+
+        :param command: Command that starts the bot
+        :param timeout: Time in seconds the bot has to answer one request
+        :param max_timeouts: Number of timeouts in a row after which the process is killed
+        """
+        self._command: list[str] = command
+        self.timeout: float = timeout
+        self.max_timeouts: int = max_timeouts
+        self._timeouts: int = 0
+        self._process: Optional[Popen] = None
+        # futures of requests waiting for answers together with processes they were sent to
+        self._pending: dict[int, tuple[Popen, Future]] = {}
+        self._next_id: int = 0
+        self._lock: Lock = Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _start(self) -> Popen:
+        process: Popen = Popen(
+            self._command, stdin=PIPE, stdout=PIPE, stderr=DEVNULL, text=True, bufsize=1
+        )
+        Thread(target=self._read, args=(process,), daemon=True).start()
+        return process
+
+    def _read(self, process: Popen) -> None:
+        """
+        Resolves futures with responses of the process, fails every pending
+        request when the process stops
+        """
+        for line in process.stdout:  # type: ignore
+            try:
+                response: Any = json.loads(line)
+                request_id: Any = response["id"]
+            except (ValueError, TypeError, KeyError):
+                continue
+            with self._lock:
+                pending: Optional[tuple[Popen, Future]] = self._pending.pop(request_id, None)
+            if pending is not None:
+                pending[1].set_result(response)
+        with self._lock:
+            if self._process is process:
+                self._process = None
+            # requests sent to a newer process stay pending
+            stopped: list[int] = [
+                request_id for request_id, (target, _) in self._pending.items() if target is process
+            ]
+            futures: list[Future] = [self._pending.pop(request_id)[1] for request_id in stopped]
+        for future in futures:
+            future.set_exception(BotError())
+
+    def request(self, hand: list[Card], **game_state: Any) -> tuple[int, Future]:
+        """
+        Sends request to the bot without waiting for the answer
+
+        :return: Id of the request and future resolved with the response
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._process = self._start()
+            request_id: int = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = (self._process, future)
+            try:
+                _write(self._process.stdin, encode_request(request_id, hand, **game_state))  # type: ignore
+            except OSError:
+                del self._pending[request_id]
+                future.set_exception(BotError())
+        return request_id, future
+
+    def result(self, request_id: int, future: Future, hand: list[Card], **game_state: Any) -> Decision:
+        """
+        Waits for the response of the request and checks that it is a legal move
+
+        :return: Cards to play and value or suit selected after them
+        :raises BotTimeout: If the bot doesn't answer in time
+        :raises BotError: If the bot has stopped or the answer isn't a legal move
+        """
+        try:
+            response: dict[str, Any] = future.result(self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._pending.pop(request_id, None)
+                self._timeouts += 1
+                if self._timeouts >= self.max_timeouts and self._process is not None:
+                    self._process.kill()
+            raise BotTimeout(self.timeout)
+        self._timeouts = 0
+        try:
+            cards: list[Card] = [CARD_TABLE[index] for index in response["cards"]]
+            selection: Optional[str] = response.get("selection", None)
+        except (TypeError, KeyError, IndexError):
+            raise BotError("Bot has sent an invalid response")
+        params: dict[str, Any] = {key: value for key, value in game_state.items() if key not in STATE_KEYS}
+        if not is_legal_sequence(hand, cards, game_state["center"], params):
+            raise BotError("Bot has sent an illegal move")
+        return cards, selection
+
+    def decide(self, hand: list[Card], **game_state: Any) -> Decision:
+        """
+        Sends request and waits for the answer, see request and result
+        """
+        request_id, future = self.request(hand, **game_state)
+        return self.result(request_id, future, hand, **game_state)
+
+    def close(self) -> None:
+        with self._lock:
+            process: Optional[Popen] = self._process
+            self._process = None
+        if process is not None:
+            process.stdin.close()  # type: ignore
+            try:
+                process.wait(self.timeout)
+            except TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+class ProcessBotPlayer(ComputerPlayer):
+    def __init__(self, bot: BotProcess, **kwargs: Any) -> None:
+        """
+        Computer player whose moves are chosen by a bot in another process.
+        When the bot doesn't answer in time, stops or sends an illegal move,
+        the move is chosen by ComputerPlayer instead, so the game goes on.
+
+        :param bot: Bot process, it can be shared by many players
+        """
+        super().__init__(**kwargs)
+        self.bot: BotProcess = bot
+        self._bot_failures: int = 0
+        # request sent by prefetch together with the hand and game state it was sent for
+        self._prefetched: Optional[tuple[tuple, int, Future]] = None
+
+    @property
+    def bot_failures(self) -> int:
+        return self._bot_failures
+
+    def reset(self) -> None:
+        super().reset()
+        self._prefetched = None
+
+    def _request_key(self, **game_state) -> tuple:
+        return tuple(self.hand), frozenset(game_state.items())
+
+    def prefetch(self, **game_state) -> None:
+        """
+        Sends request for the move in given game state without waiting for the answer,
+        the answer is used by the next search if the player's hand and the game state
+        are still the same, see play_games
+        """
+        request_id, future = self.bot.request(list(self.hand), **game_state)
+        self._prefetched = (self._request_key(**game_state), request_id, future)
+
+    def _search_best_plays(self, **game_state) -> Decision:
+        prefetched: Optional[tuple[tuple, int, Future]] = self._prefetched
+        self._prefetched = None
+        try:
+            if prefetched is not None and prefetched[0] == self._request_key(**game_state):
+                return self.bot.result(prefetched[1], prefetched[2], list(self.hand), **game_state)
+            return self.bot.decide(list(self.hand), **game_state)
+        except BotError:
+            self._bot_failures += 1
+            return super()._search_best_plays(**game_state)
+
+
+def play_games(games: list["GameEngine"], max_turns: int = 2000) -> int:
+    """
+    Plays headless games side by side, one turn of every game in a round. Before every round
+    bot players about to move send their requests, so a bot process shared by the games
+    answers all of them while the games wait for the first answer, instead of waiting
+    for one round trip after another.
+
+    :param games: Games played only by computer players
+    :param max_turns: Every game is stopped after this number of turns
+    :return: Number of turns played in all games
+    """
+    turns: list[int] = [0] * len(games)
+    while True:
+        playing: list[int] = [
+            index
+            for index, game in enumerate(games)
+            if len(game.finished) < len(game.players) - 1 and turns[index] < max_turns
+        ]
+        if not playing:
+            break
+        for index in playing:
+            game: "GameEngine" = games[index]
+            player: ComputerPlayer = game.get_current_player()  # type: ignore
+            if isinstance(player, ProcessBotPlayer) and not player.skip_turns and player not in game.finished:
+                player.prefetch(**game._computer_game_state(player))
+        for index in playing:
+            games[index].journal.checkpoint(games[index])
+            games[index]._play_turn()
+            turns[index] += 1
+    for game in games:
+        game._game_over = True
+        game._speculator.shutdown()
+    return sum(turns)
+
+
+def heuristic_bot() -> Callable[[list[Card], dict[str, Any]], Decision]:
+    """
+    Returns decision function of the reference bot, it plays like ComputerPlayer
+    """
+    player: ComputerPlayer = ComputerPlayer()
+
+    def decide(hand: list[Card], game_state: dict[str, Any]) -> Decision:
+        player._hand = hand
+        plays: list[Card] = player.find_best_plays(**game_state)
+        return plays, player.selection_after(plays)
+
+    return decide
+
+
+def run_bot(
+    decide: Callable[[list[Card], dict[str, Any]], Decision],
+    input: IO[str] = sys.stdin,
+    output: IO[str] = sys.stdout,
+) -> None:
+    """
+    Bot side of the protocol, answers requests in order until input is closed
+
+    :param decide: Function that returns cards to play and selection for given hand and game state
+    """
+    for line in input:
+        request: dict[str, Any] = json.loads(line)
+        hand, game_state = decode_request(request)
+        cards, selection = decide(hand, game_state)
+        _write(output, {"id": request["id"], "cards": [CARD_INDEX[card] for card in cards], "selection": selection})
+
+
+def bot_player(command: str, timeout: float = 1.0) -> Callable[[], ProcessBotPlayer]:
+    """
+    Returns factory of computer players that share one bot process
+
+    :param command: Command that starts the bot, split like a shell command line
+    """
+    return partial(ProcessBotPlayer, BotProcess(shlex.split(command), timeout))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reference bot: answers requests of the engine on stdin like ComputerPlayer"
+    )
+    parser.parse_args()
+    run_bot(heuristic_bot())
+
+
+if __name__ == "__main__":
+    main()
@@ -194,3 +194,6 @@ class Card:
         if not isinstance(card, Card):
             return NotImplemented
         return self.value == card.value and self.suit == card.suit
+
+    def __hash__(self) -> int:
+        return hash((self._value, self._suit))
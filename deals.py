@@ -0,0 +1,47 @@
+from card import Card
+from deck import CARD_TABLE, Deck
+from typing import Optional
+import numpy as np
+
+
+class DealBlock:
+    def __init__(self, size: int, seed: Optional[int] = None) -> None:
+        """
+        Block of shuffled deck orders generated at once for mass simulation.
+        Every row is a permutation of indices of cards in CARD_TABLE, the same seed
+        always gives the same block. Decks and games built from rows share card objects
+        from CARD_TABLE instead of creating new ones.
+
+        :param size: Number of deck orders
+        :param seed: Seed of the random generator
+        """
+        self._seed: Optional[int] = seed
+        self._orders: np.ndarray = np.random.default_rng(seed).permuted(
+            np.tile(np.arange(len(CARD_TABLE), dtype=np.int8), (size, 1)), axis=1
+        )
+
+    @property
+    def seed(self) -> Optional[int]:
+        return self._seed
+
+    @property
+    def orders(self) -> np.ndarray:
+        """
+        Returns array with shape (size, 52), the last card of every row is dealt first
+        """
+        return self._orders
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __getitem__(self, row: int) -> list[Card]:
+        """
+        Returns cards of one deck order
+        """
+        return [CARD_TABLE[index] for index in self._orders[row].tolist()]
+
+    def deck(self, row: int) -> Deck:
+        """
+        Returns deck with cards in order of given row, ready to be passed to Game
+        """
+        return Deck.from_order(self._orders[row].tolist())
@@ -1,6 +1,12 @@
 from constants import VALUES, SUITS
 from card import Card
 from random import shuffle
+from typing import Sequence
+
+
+# every deck shares these cards, cards are immutable so they can be used by many games at once
+CARD_TABLE: tuple[Card, ...] = tuple(Card(value, suit) for value in VALUES for suit in SUITS)
+CARD_INDEX: dict[Card, int] = {card: index for index, card in enumerate(CARD_TABLE)}
 
 
 class CardAlreadyInDeckError(Exception):
@@ -25,14 +31,21 @@ class Deck:
         """
         Class representing a deck of cards
         """
-        self._deck: list[Card] = (
-            []
-            if empty
-            else [Card(value, suit) for value in VALUES for suit in SUITS]
-        )
+        self._deck: list[Card] = [] if empty else list(CARD_TABLE)
         if shuffle:
             self.shuffle_deck()
 
+    @classmethod
+    def from_order(cls, order: Sequence[int]) -> "Deck":
+        """
+        Creates deck with cards in given order, the last card is dealt first
+
+        :param order: Indices of cards in CARD_TABLE
+        """
+        deck: Deck = cls(empty=True, shuffle=False)
+        deck._deck = [CARD_TABLE[index] for index in order]
+        return deck
+
     @property
     def deck(self) -> list[Card]:
         return self._deck
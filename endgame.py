@@ -0,0 +1,200 @@
+from card import Card
+from deck import CARD_TABLE
+from rules import Move, Position, apply_move, freeze_params, iter_moves
+from random import Random
+from time import perf_counter
+from typing import Any, Generator, Optional
+
+
+FULL_DECK: tuple[Card, ...] = CARD_TABLE
+
+
+class SearchLimitReached(Exception):
+    def __init__(self, message: str = "Search node or time limit was reached") -> None:
+        super().__init__(message)
+
+
+class EndgameSolver:
+    def __init__(
+        self,
+        threshold: int = 6,
+        max_nodes: int = 20000,
+        time_limit: float = 0.25,
+        samples: int = 4,
+        max_depth: int = 6,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Exact solver used when only a few cards are left in players' hands.
+        Opponents' hands and the draw pile are unknown, so every search is run on
+        several deals of unseen cards consistent with opponents' hand sizes.
+        Each deal is solved exactly with memoized minimax, where the solving player
+        wins if its hand is emptied first and every opponent plays against it.
+
+        :param threshold: Solver is used when total number of cards in hands is not greater
+        :param max_nodes: Maximum number of positions searched for one move
+        :param time_limit: Maximum time in seconds spent on one move
+        :param samples: Number of deals searched
+        :param max_depth: Positions deeper than this number of turns are counted as undecided,
+            so are positions with more than twice the threshold cards in hands
+        :param seed: Seed of the random generator used to deal unseen cards
+        """
+        self._threshold: int = threshold
+        self._max_nodes: int = max_nodes
+        self._time_limit: float = time_limit
+        self._samples: int = samples
+        self._max_depth: int = max_depth
+        self._random: Random = Random(seed)
+        self._memo: dict[Position, int] = {}
+        self._path: set[Position] = set()
+        self._nodes: int = 0
+        self._deadline: float = 0
+        self._root_seat: int = 0
+
+    @property
+    def threshold(self) -> int:
+        return self._threshold
+
+    @property
+    def nodes(self) -> int:
+        """
+        Returns number of positions searched during the last move
+        """
+        return self._nodes
+
+    def applies(self, seat_lens: tuple[int, ...]) -> bool:
+        return len(seat_lens) > 1 and sum(seat_lens) <= self.threshold
+
+    def _count_node(self) -> None:
+        """
+        Counts searched move and checks limits
+
+        :raises SearchLimitReached: If node or time limit is reached
+        """
+        self._nodes += 1
+        if self._nodes > self._max_nodes or (
+            not self._nodes % 256 and perf_counter() > self._deadline
+        ):
+            raise SearchLimitReached
+
+    def _value(self, position: Position, depth: int) -> int:
+        """
+        Returns 1 if the solving player wins from given position, -1 if it loses
+        and 0 if the result is undecided
+        """
+        finished: Optional[int] = position.finished()
+        if finished is not None:
+            return 1 if finished == self._root_seat else -1
+        if (
+            depth >= self._max_depth
+            or position in self._path
+            or sum(len(hand) for hand in position.hands) > 2 * self.threshold
+        ):
+            return 0
+        if position in self._memo:
+            return self._memo[position]
+
+        maximize: bool = position.seat == self._root_seat
+        best: int = -1 if maximize else 1
+        self._path.add(position)
+        try:
+            for move in iter_moves(position):
+                self._count_node()
+                value: int = self._value(apply_move(position, move), depth + 1)
+                best = max(best, value) if maximize else min(best, value)
+                if best == (1 if maximize else -1):
+                    break
+        finally:
+            self._path.discard(position)
+        self._memo[position] = best
+        return best
+
+    def iter_solved(self, position: Position) -> Generator[tuple[Move, int], None, None]:
+        """
+        Solves position with known hands and draw pile for the seat to move,
+        yields every move as soon as it's solved, so that moves solved before
+        a limit was reached can still be used
+
+        :raises SearchLimitReached: If node or time limit is reached
+        :return: Generator of legal moves with their values, 1 for a win, -1 for a loss and 0 if undecided
+        """
+        self._root_seat = position.seat
+        self._memo = {}
+        self._path = set()
+        for move in iter_moves(position):
+            yield move, self._value(apply_move(position, move), 1)
+
+    def solve(self, position: Position) -> list[tuple[Move, int]]:
+        """
+        Solves position with known hands and draw pile for the seat to move
+
+        :raises SearchLimitReached: If node or time limit is reached
+        :return: Every legal move with its value, 1 for a win, -1 for a loss and 0 if undecided
+        """
+        return list(self.iter_solved(position))
+
+    def deal(
+        self,
+        hand: list[Card],
+        center: Card,
+        game_params: dict[str, Any],
+        seat_lens: tuple[int, ...],
+        discarded: tuple[Card, ...] = (),
+    ) -> Position:
+        """
+        Deals unseen cards to opponents and the draw pile at random
+
+        :param hand: Solving player's hand
+        :param seat_lens: Hand sizes of players still in the game, starting with the solving player
+        :param discarded: Cards in the discard pile, they are known to every player
+        :return: Position with the solving player at seat 0
+        """
+        known: set[Card] = set(hand) | set(discarded) | {center}
+        unseen: list[Card] = [card for card in FULL_DECK if card not in known]
+        self._random.shuffle(unseen)
+        hands: list[tuple[Card, ...]] = [tuple(hand)]
+        for hand_len in seat_lens[1:]:
+            hands.append(tuple(unseen[:hand_len]))
+            unseen = unseen[hand_len:]
+        return Position(
+            tuple(hands),
+            center,
+            freeze_params(game_params),
+            0,
+            tuple(0 for _ in hands),
+            tuple(unseen),
+        )
+
+    def best_move(self, hand: list[Card], **game_state) -> Optional[Move]:
+        """
+        Finds the move that wins in the most deals of unseen cards
+
+        :param hand: Solving player's hand
+        :key center: Current center card
+        :key seat_lens: Hand sizes of players still in the game, starting with the solving player
+        :key discarded: Cards in the discard pile
+        :return: Best move or None if no move wins in any deal searched before limits were reached
+        """
+        center: Card = game_state["center"]
+        seat_lens: tuple[int, ...] = game_state["seat_lens"]
+        discarded: tuple[Card, ...] = game_state.get("discarded", ())
+        game_params: dict[str, Any] = {
+            key: value
+            for key, value in game_state.items()
+            if key not in ["center", "prev_len", "next_len", "seat_lens", "discarded"]
+        }
+        self._nodes = 0
+        self._deadline = perf_counter() + self._time_limit
+        totals: dict[Move, int] = {}
+        for _ in range(self._samples):
+            position: Position = self.deal(hand, center, game_params, seat_lens, discarded)
+            try:
+                for move, value in self.iter_solved(position):
+                    totals[move] = totals.get(move, 0) + value
+            except SearchLimitReached:
+                break
+
+        if not totals:
+            return None
+        best: Move = max(totals, key=lambda move: (totals[move], len(move.cards)))
+        return best if totals[best] > 0 else None
@@ -0,0 +1,688 @@
+from card import Card
+from constants import SUITS, VALUES
+from deck import Deck, DeckAlreadyEmptyError
+from players import HumanPlayer, ComputerPlayer
+from players import PlayNotAllowedError
+from expectimax import ExpectimaxPlayer
+from history import CardMove, GameJournal, Reshuffle
+from inference import HandInference
+from speculation import Speculator, predict_game_states
+from zobrist import CENTER, DISCARD, STOCK, Location, ZobristHash
+from typing import Callable, Optional, Union, Any
+from time import sleep
+import snapshot
+
+
+class WrongPlayerNumber(ValueError):
+    def __init__(
+        self,
+        player_number,
+        message="Number of players must be an int between 2 and 4",
+    ) -> None:
+        super().__init__(message, player_number)
+
+
+class GameEngine:
+    def __init__(
+        self,
+        player_number: int,
+        computer_player: Callable[[], ComputerPlayer] = ComputerPlayer,
+        first_player: Optional[Callable[[], HumanPlayer]] = None,
+        deck: Optional[Deck] = None,
+        snapshot_path: Optional[str] = None,
+        players: Optional[list[HumanPlayer]] = None,
+        log: Optional[Callable[[str], None]] = print,
+        undo_steps: int = 500,
+    ) -> None:
+        """
+        Rules and state of a game of Makao without a window. Game draws it in a pygame window,
+        front-ends that don't need one, like terminal.py, play it directly and don't import pygame.
+
+        :param player_number: The number of players in the game. Must be at least 2 and not greater than 4.
+        :param computer_player: Class or factory of computer players
+        :param first_player: Class or factory of the player in the first seat, it has to implement
+            selection, the first seat is taken by a computer player if not given
+        :param deck: Deck cards are dealt from, new shuffled deck is used if not given
+        :param snapshot_path: File the game is saved to after every change and when it's quit
+        :param players: Players in order of seats used instead of the human and computer players,
+            their number has to be equal to player_number
+        :param log: Function every line of the move log is passed to, None turns the log off,
+            e.g. in headless games played by tools and servers
+        :param undo_steps: Number of steps that can be undone, 0 turns the journal off
+            in games nobody undoes, see history.GameJournal
+        :raises WrongPlayerNumber: If the number of players is not within the allowed range.
+        """
+        try:
+            converted_player_number = int(player_number)
+            if not 2 <= converted_player_number <= 4:
+                raise WrongPlayerNumber(player_number)
+            player_number = converted_player_number
+        except ValueError:
+            raise WrongPlayerNumber(player_number)
+
+        if players is not None and len(players) != player_number:
+            raise WrongPlayerNumber(len(players))
+        self._players: list[Union[HumanPlayer, ComputerPlayer]] = players or [
+            (first_player or computer_player)()
+        ] + [computer_player() for _ in range(player_number - 1)]
+        self._speculator: Speculator = Speculator()
+        self.log: Optional[Callable[[str], None]] = log
+        self._undo_steps: int = undo_steps
+        self.snapshot_path: Optional[str] = snapshot_path
+        self._init_engine(deck)
+
+    def _init_engine(self, deck: Optional[Deck] = None) -> None:
+        """
+        Deals a new game to the players, everything that isn't needed to draw the game is reset
+        """
+        self._deck: Deck = Deck() if deck is None else deck
+        self._discarded_deck: Deck = Deck(empty=True)
+        self._deal_hands()
+        self._center_card: Card = self._deck.deal()
+        self._inference: HandInference = HandInference(len(self.players), self._center_card)
+        self._zobrist: ZobristHash = ZobristHash.from_game(self)
+        self._journal: GameJournal = GameJournal(self._undo_steps)
+        self._game_over: bool = False
+        self._current_player_index: int = 0
+        self._game_params: dict[str, Any] = {}
+        self.played_card: Optional[Card] = None
+        self._finished: list[Union[HumanPlayer, ComputerPlayer]] = []
+        self._speculated: bool = False
+        self.sleep_time: int = 0
+        self._saved_snapshot: Optional[bytes] = None
+
+    def new_game(self, deck: Optional[Deck] = None) -> None:
+        """
+        Starts the next game of a match with the same players, only the state of the engine
+        is reset. Game keeps its window, fonts, widgets and loaded card images.
+
+        :param deck: Deck cards are dealt from, new shuffled deck is used if not given
+        """
+        self._speculator.cancel()
+        for player in self.players:
+            player.reset()
+        self._init_engine(deck)
+
+    def _deal_hands(self, hand_size: int = 5) -> None:
+        """
+        Deals cards from the top of the deck one at a time to every player in turn
+        """
+        cards: list[Card] = self.deck.deck
+        dealt: int = hand_size * len(self.players)
+        top: list[Card] = cards[-dealt:][::-1]
+        del cards[-dealt:]
+        for index, player in enumerate(self.players):
+            player.deal_hand(top[index::len(self.players)])
+
+    @property
+    def players(self) -> list[Union[HumanPlayer, ComputerPlayer]]:
+        return self._players
+
+    @property
+    def finished(self) -> list[Union[HumanPlayer, ComputerPlayer]]:
+        return self._finished
+
+    def _player_finish(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
+        if self.players.index(player) == 0:
+            self.sleep_time = 0
+        self.finished.append(player)
+
+    def _check_if_finished(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
+        if len(player.hand) == 0:
+            self._player_finish(player)
+
+    @property
+    def deck(self) -> Deck:
+        return self._deck
+
+    @property
+    def inference(self) -> HandInference:
+        return self._inference
+
+    @property
+    def position_key(self) -> int:
+        """
+        Returns 64-bit Zobrist key of the current position, see zobrist.ZobristHash
+        """
+        return self._zobrist.position_key(self.game_params, self.current_player_index)
+
+    @property
+    def journal(self) -> GameJournal:
+        return self._journal
+
+    def _record_move(
+        self, card: Card, source: Location, source_index: int, target: Location, target_index: int
+    ) -> None:
+        """
+        Updates position key and journal after card was moved, see history.CardMove
+        """
+        self._zobrist.move(card, source, target)
+        self.journal.record(CardMove(card, source, source_index, target, target_index))
+
+    def _restart_inference(self) -> None:
+        """
+        Restarts hand inference after the history of the game was lost or rewritten
+        """
+        self._inference = HandInference.restart(
+            [len(player.hand) for player in self.players],
+            [self.center_card, *self.discarded_deck.deck],
+        )
+        self._speculated = False
+
+    def undo(self) -> None:
+        """
+        Takes back the last step of the game, see history.GameJournal.undo
+
+        :raises NothingToUndo: If there are no steps left
+        """
+        self.journal.undo(self)
+        self._restart_inference()
+
+    def redo(self) -> None:
+        """
+        Plays the last undone step again
+
+        :raises NothingToRedo: If no step was undone
+        """
+        self.journal.redo(self)
+        self._restart_inference()
+
+    @property
+    def discarded_deck(self) -> Deck:
+        return self._discarded_deck
+
+    @property
+    def game_over(self) -> bool:
+        return self._game_over
+
+    @property
+    def current_player_index(self) -> int:
+        return self._current_player_index
+
+    def _change_current_player(self, decrement: bool = False) -> None:
+        multiplier: int = -1 if decrement else 1
+        self._current_player_index = (self.current_player_index + 1 * multiplier) % len(self.players)
+        while self.players[self.current_player_index] in self.finished:
+            self._current_player_index = (self.current_player_index + 1 * multiplier) % len(self.players)
+
+    @property
+    def center_card(self) -> Card:
+        return self._center_card
+
+    @property
+    def game_params(self) -> dict[str, Any]:
+        return self._game_params
+
+    @property
+    def get_skip(self) -> int:
+        return self.game_params.get("skip", 0)
+
+    def _increment_skip(self) -> None:
+        val = self.get_skip
+        self.game_params.update({"skip": val + 1})
+
+    def _remove_skip(self) -> None:
+        if self.game_params.get("skip", None):
+            self.game_params.pop("skip")
+
+    @property
+    def get_penalty(self) -> int:
+        return self.game_params.get("penalty", 0)
+
+    def _get_previous_player(self, player: Union[HumanPlayer, ComputerPlayer]) -> Union[HumanPlayer, ComputerPlayer]:
+        previous = self.players[(self.players.index(player) - 1) % len(self.players)]
+        while previous in self.finished:
+            previous = self._get_previous_player(previous)
+        return previous
+
+    def _get_next_player(self, player: Union[HumanPlayer, ComputerPlayer]) -> Union[HumanPlayer, ComputerPlayer]:
+        next_player = self.players[(self.players.index(player) + 1) % len(self.players)]
+        while next_player in self.finished:
+            next_player = self._get_next_player(next_player)
+        return next_player
+
+    def get_current_player(self) -> Union[HumanPlayer, ComputerPlayer]:
+        return self.players[self.current_player_index]
+
+    def _computer_turn(self) -> bool:
+        return isinstance(self.get_current_player(), ComputerPlayer)
+
+    def _increase_penalty(self, to_add: int) -> None:
+        key, val = "penalty", self.game_params.get("penalty", None) or 0
+        self.game_params.update({key: val + to_add})
+
+    def _reset_penalty(self):
+        if self.game_params.get("penalty", None):
+            self.game_params.pop("penalty")
+
+    def _draw_penalty(self, player: Union[HumanPlayer, ComputerPlayer], number: int = 0):
+        player.penalty = True
+        draw: int = self.get_penalty if not number else number
+        if not draw:
+            return
+        if self.get_penalty:
+            self._reset_penalty()
+        self._reset_king()
+        self._take_cards(player, draw)
+        player.penalty = False
+
+    def _king_played(self, previous: bool = False) -> None:
+        """
+        Updates the game state when a king card is played.
+
+        :key previous: Indicates if the previous or next player will have to draw penalty
+
+        :return: None
+        """
+        player = self.get_current_player()
+        self.game_params.update({"king": True})
+        self._increase_penalty(5)
+        if previous:
+            player.skip_turns += 2  # Additional turn added to compensate for next_turn
+            player.played_king = True
+        self._next_turn(backwards=previous)
+
+    def _reset_king(self) -> None:
+        if self.game_params.get("king", None):
+            self.game_params.pop("king")
+            self._reset_penalty()
+
+    def _jack_played(self) -> None:
+        """
+        Adds flag that jack was played so that slection menu will pop up at the end of turn
+        """
+        self.game_params.update({"jack": True})
+
+    def _ace_played(self):
+        """
+        Adds flag that ace was played so that slection menu will pop up at the end of turn
+        """
+        self.game_params.update({"ace": True})
+
+    def _select_index(self, items: list[str]) -> int:
+        """
+        Returns index of the value or suit selected by the current player after a jack or an ace
+        """
+        return self.get_current_player().selection(items)  # type: ignore
+
+    def _selection(self, items: list[str]) -> None:
+        """
+        Allows the player to make a selection from a list of items.
+
+        :param items: The list of items to choose from.
+        :return: None
+        """
+        selected_index: int = self._select_index(items)
+
+        if self.game_params.get("jack", None):
+            self.game_params.pop("jack")
+            if items[selected_index] == "None":
+                if "jack" in self.game_params:
+                    self.game_params.pop("jack")
+                return
+            self.game_params.update({"value": (items[selected_index], 4)})
+
+        else:
+            self.game_params.update({"suit": (items[selected_index], 1)})
+            self.game_params.pop("ace")
+
+    def _take_cards(
+        self, player: Union[HumanPlayer, ComputerPlayer], number: int = 1
+    ) -> None:
+        """
+        Take a specified number of cards from the deck and give them to a player.
+
+        :param player: The player who will receive the cards.
+        :param number: The number of cards to be taken, defaults to 1.
+        """
+        if self.players.index(player) != self.current_player_index or self.get_skip:
+            return
+
+        if not player.penalty and not player.cards_played and not player.drew_card:
+            self._observe_pass(player)
+
+        #  if user presses the button and has a penalty to draw, instead of one card the entire penalty will be drawn
+        if self.get_penalty:
+            self._draw_penalty(player)
+            return
+
+        hand_len: int = len(player.hand)
+        try:
+            self.print_draw(number)
+            while number != 0:
+                self._draw_card(player)
+                number -= 1
+        except DeckAlreadyEmptyError:
+            if not self.discarded_deck:
+                return
+            self.inference.reshuffled(self.discarded_deck.deck)
+            for card in self.discarded_deck.deck:
+                self._zobrist.move(card, DISCARD, STOCK)
+            discarded: tuple[Card, ...] = tuple(self.discarded_deck.deck)
+            self.discarded_deck.shuffle_deck()
+            self.journal.record(Reshuffle(discarded, tuple(self.discarded_deck.deck)))
+            self._deck = self.discarded_deck
+            self._discarded_deck = Deck(empty=True)
+            while number != 0:
+                self._draw_card(player)
+                number -= 1
+        finally:
+            self.inference.drew(self.players.index(player), len(player.hand) - hand_len)
+
+        player.makao_set_reset(False)
+
+    def _draw_card(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
+        hand_len: int = len(player.hand)
+        player.draw_card(self.deck)
+        if len(player.hand) > hand_len:
+            self._record_move(player.hand[-1], STOCK, len(self.deck), self.players.index(player), hand_len)
+
+    def _makao(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
+        if (
+            len(player.hand) > 1
+            or self.players.index(player) != self.current_player_index
+        ):
+            return
+        else:
+            player.makao_set_reset(True)
+        self._log("Makao")
+
+    def _makao_out(self, player: Union[HumanPlayer, ComputerPlayer]):
+        if len(player.hand) != 0:
+            return
+        self._makao(player)
+        self._next_turn()
+
+    def _stop_makao(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
+        if self.players.index(player) != self.current_player_index:
+            return
+        previous_player: Union[HumanPlayer, ComputerPlayer] = self._get_previous_player(player)
+        if len(previous_player.hand) in [0, 1] and not previous_player.makao_status:
+            self._change_current_player(decrement=True)
+            self._draw_penalty(previous_player, number=5)
+            self._change_current_player()
+            self._log("Stop Makao")
+        elif len(previous_player.hand) == 0:
+            self._check_if_finished(previous_player)
+
+    def _update_val_req_param(self) -> None:
+        """
+        Update the required parameters for the game.
+
+        This method updates the required parameters for the game based on the current game parameters.
+        It decreases the number of turns left for each required parameter by 1, and removes the parameter
+        if the number of turns left becomes 0.
+
+        :return: None
+        """
+        req: Optional[tuple[str, int]] = self.game_params.get("value", None)
+        if req:
+            turns_left: int = req[1]
+            turns_left -= 1
+            req = (req[0], turns_left)
+            key = "value"
+            if not turns_left:
+                self.game_params.pop(key)
+            else:
+                self.game_params.update({key: req})
+
+    def _update_suit_req_param(self) -> None:
+        req: Optional[tuple[str, int]] = self.game_params.get("suit", None)
+        if req:
+            moves_left: int = req[1]
+            moves_left -= 1
+            req = (req[0], moves_left)
+            key = "suit"
+            if not moves_left:
+                self.game_params.pop(key)
+            else:
+                self.game_params.update({key: req})
+
+    def _next_turn(self, backwards: bool = False) -> None:
+        player: Union[HumanPlayer, ComputerPlayer] = self.get_current_player()
+        # if self.penalty_draw:
+        #     self.draw_penalty(player)
+        # self._check_if_finished(player)
+        self._update_val_req_param()
+        jack: bool = self.game_params.get("jack", False)
+        ace: bool = self.game_params.get("ace", False)
+        if jack or ace:
+            items: list[str] = SUITS if ace else VALUES[3:9] + ["None"]
+            self._selection(items)
+
+        if self.get_penalty and not player.cards_played:
+            self._observe_pass(player)
+            self._draw_penalty(player)
+
+        if self.get_skip and not self.played_card:
+            self._observe_pass(player)
+            player.skip_turns = self.get_skip
+            self._remove_skip()
+
+        if player.check_moved() or player.skip_turns:
+            player.skip_turns -= 1 if player.skip_turns else 0
+            player.reset_turn_status()
+            self._change_current_player(decrement=backwards)
+
+        self.played_card = None
+
+    def _log(self, text: str) -> None:
+        if self.log is not None:
+            self.log(text)
+
+    def print_current_move(self) -> None:
+        player: str = "Human Player" if not self.current_player_index else f"Computer{self.current_player_index}"
+        self._log(
+            f"{player} has played {self.played_card} on {self.center_card} "
+        )
+
+    def print_skip(self) -> None:
+        player: str = "Human Player" if not self.current_player_index else f"Computer{self.current_player_index}"
+        self._log(
+            f"{player} skipped"
+        )
+
+    def print_draw(self, number: int) -> None:
+        player: str = "Human Player" if not self.current_player_index else f"Computer{self.current_player_index}"
+        self._log(
+            f"{player} has drawn {number} card{'s' if number > 1 else ''}"
+        )
+
+    def _play_card(
+        self, played_card: Card, player: Union[HumanPlayer, ComputerPlayer]
+    ) -> None:
+        """
+        Play a card and update the game state.
+
+        :param played_card: The card to be played.
+        :param player: The player who played the card.
+        :return: None
+        """
+        try:
+            if self.center_card.can_play(played_card, **self.game_params):
+                if player.cards_played == 4 and len(player.hand) == 1:
+                    raise PlayNotAllowedError(
+                        "If played card is the last card in deck only up to 3 cards can"
+                        " be played before"
+                    )
+                hand_index: int = player.hand.index(played_card)
+                player.play_card(played_card)
+                self.inference.played(self.players.index(player), played_card)
+                self.print_current_move()
+                self.discarded_deck.add_card(self.center_card)
+                self._record_move(self.center_card, CENTER, 0, DISCARD, len(self.discarded_deck) - 1)
+                self._record_move(played_card, self.players.index(player), hand_index, CENTER, 0)
+                self._center_card = played_card
+                played_card.play_effect(self)
+                self._center_card_changed()
+                self._update_suit_req_param()
+        except PlayNotAllowedError:
+            return
+
+    def _center_card_changed(self) -> None:
+        """
+        Called after a card was played on the center card, front-ends may redraw it
+        """
+
+    def _seat_order(self, player: Union[HumanPlayer, ComputerPlayer]) -> list[int]:
+        """
+        Returns indices of players still in the game in order of play, starting with given player
+        """
+        index: int = self.players.index(player)
+        seats: list[int] = list(range(index, len(self.players))) + list(range(index))
+        return [seat for seat in seats if self.players[seat] not in self.finished]
+
+    def _seat_lens(self, player: Union[HumanPlayer, ComputerPlayer]) -> tuple[int, ...]:
+        """
+        Returns hand sizes of players still in the game in order of play, starting with given player
+        """
+        return tuple(len(self.players[seat].hand) for seat in self._seat_order(player))
+
+    @staticmethod
+    def _pass_certainty(player: Union[HumanPlayer, ComputerPlayer]) -> float:
+        """
+        Returns probability that the player would play if it could, computer players
+        only pass when they can't play, human players may do it on purpose
+        """
+        return 0.95 if isinstance(player, ComputerPlayer) else 0.5
+
+    def _observe_pass(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
+        """
+        Tells hand inference that the player didn't play on the center card
+        """
+        self.inference.passed(
+            self.players.index(player), self.center_card, self.game_params, self._pass_certainty(player)
+        )
+
+    def _computer_game_state(self, player: ComputerPlayer) -> dict[str, Any]:
+        """
+        Returns game state visible to the computer player, passed to find_best_plays
+        """
+        prev_len: int = len(self._get_previous_player(player).hand)
+        next_len: int = len(self._get_next_player(player).hand)
+        game_state: dict[str, Any] = {
+            "center": self.center_card,
+            "prev_len": prev_len,
+            "next_len": next_len,
+            "seat_lens": self._seat_lens(player),
+            "discarded": tuple(self.discarded_deck.deck),
+        }
+        game_state.update(self.game_params)
+        return game_state
+
+    def _computer_play_cards(self, player: ComputerPlayer) -> None:
+        player.beliefs = self.inference.beliefs(self._seat_order(player), player.hand)
+        game_state: dict[str, Any] = self._computer_game_state(player)
+        computer_moves: Optional[list[Card]] = self._speculator.lookup(player, **game_state)
+        if computer_moves is None:
+            computer_moves = player.find_best_plays(**game_state)
+
+        if not computer_moves:
+            self._take_cards(player)
+            return
+        for played_card in computer_moves:
+            self.played_card = played_card
+            self._play_card(self.played_card, player)
+            if len(player.hand) == 1:
+                self._makao(player)
+            sleep(self.sleep_time)
+
+    def _play_turn(self) -> None:
+        """
+        Plays a turn in the game.
+
+        This method determines the actions to be taken by the current player during their turn.
+        It checks if the player needs to skip turns, draw penalty cards, play a card, or take cards from the center.
+        The method also updates the game state and moves to the next turn.
+
+        :return: None
+        """
+        player: Union[HumanPlayer, ComputerPlayer] = self.get_current_player()
+        if player in self.finished:
+            self._next_turn()
+            return
+        if self._computer_turn():
+            self._stop_makao(player)
+            if self._skip_turn(player):
+                return
+            self._computer_play_cards(player)
+            self._next_turn()
+        else:
+            self._play_card(self.played_card, player)  # type: ignore
+
+    def _skip_turn(self, player: Union[HumanPlayer, ComputerPlayer]) -> bool:
+        """
+        Checks if player has skip turns and handles skip
+
+        :param player: The player whose turn is to be skipped.
+
+        :return: True if the turn was successfully skipped, False otherwise.
+        """
+        if player.skip_turns or player in self.finished:
+            if player.played_king:
+                self._draw_penalty(player)
+                player.played_king = False
+            self._next_turn()
+            player.skip_turns = max(player.skip_turns - 1, 0)
+            self.print_skip()
+            return True
+        return False
+
+    def _save_snapshot(self) -> None:
+        """
+        Saves the game to the snapshot file if it has changed since the last save. Snapshots
+        are compared instead of position keys, because the keys leave out players' flags,
+        e.g. makao said by the human.
+        """
+        if not self.snapshot_path:
+            return
+        data: bytes = snapshot.snapshot(self)
+        if data == self._saved_snapshot:
+            return
+        snapshot.write(data, self.snapshot_path)
+        self._saved_snapshot = data
+
+    def play_headless(self, max_turns: int = 2000) -> int:
+        """
+        Plays the game without a window until only one player is left,
+        every player has to be a computer player
+
+        :param max_turns: Game is stopped after this number of turns
+        :return: Number of played turns
+        """
+        turns: int = 0
+        while len(self.finished) < len(self.players) - 1 and turns < max_turns:
+            self.journal.checkpoint(self)
+            self._play_turn()
+            turns += 1
+        self._game_over = True
+        self._speculator.shutdown()
+        return turns
+
+    def _start_speculation(self) -> None:
+        """
+        Starts computing the next computer player's moves for likely ends of human's turn,
+        so that the computer can move instantly once the human has finished
+        """
+        player, states, beliefs = predict_game_states(self, self.players[0])
+        if player:
+            self._speculator.speculate(player, states, beliefs)
+        self._speculated = True
+
+    def display_result(self) -> None:
+        for player in self.players:
+            if player not in self.finished:
+                self.finished.append(player)
+        print("Game results:")
+        for i, player in enumerate(self.finished):
+            if (idx := self.players.index(player)) == 0:
+                name: str = "HumanPlayer"
+            else:
+                name = f"Computer{idx}"
+            print(f"{i + 1}. {name}")
+
+
+COMPUTER_PLAYERS: dict[str, type[ComputerPlayer]] = {
+    "heuristic": ComputerPlayer,
+    "expectimax": ExpectimaxPlayer,
+}
@@ -0,0 +1,323 @@
+from card import Card
+from constants import VALUES
+from deck import CARD_INDEX
+from endgame import FULL_DECK
+from players import ComputerPlayer, MoveWeights
+from rules import (
+    ACE_SELECTIONS,
+    Move,
+    apply_effect,
+    end_turn,
+    freeze_params,
+    is_attacking_king,
+)
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from value_model import LinearValueModel
+
+
+WIN: float = 100.0
+
+
+class SearchTimeout(Exception):
+    def __init__(self, message: str = "Search time budget was used up") -> None:
+        super().__init__(message)
+
+
+class Belief(NamedTuple):
+    """
+    Game state as seen by the searching player.
+
+    hand: searching player's known cards, cards drawn during search are only counted in lens
+    lens: hand sizes in order of play, seat 0 is the searching player
+    center: current center card
+    params: game parameters, see rules.freeze_params
+    seat: seat that moves next
+    unseen: cards the searching player hasn't seen, they are either in
+        opponents' hands or in the draw pile
+    """
+    hand: tuple[Card, ...]
+    lens: tuple[int, ...]
+    center: Card
+    params: tuple[tuple[str, Any], ...]
+    seat: int
+    unseen: frozenset[Card]
+
+
+class ExpectimaxPlayer(ComputerPlayer):
+    def __init__(
+        self,
+        time_budget: float = 0.2,
+        max_depth: int = 2,
+        candidates: int = 8,
+        weights: Optional[MoveWeights] = None,
+        value_model: Optional["LinearValueModel"] = None,
+    ) -> None:
+        """
+        Computer player that looks ahead at the replies of the next opponents.
+        Opponent moves are chance nodes over the unseen cards: an opponent plays a card
+        it may hold, or draws if it holds none of the playable ones.
+        Search is deepened one opponent at a time until the time budget is used up,
+        the best move of the deepest finished search is played.
+
+        :param time_budget: Time in seconds spent on one move
+        :param max_depth: Maximum number of opponents' replies searched
+        :param candidates: Number of the best heuristic movesets searched, single cards
+            and drawing are always searched too
+        :param weights: Weights used to rank heuristic movesets
+        :param value_model: Model that ranks heuristic movesets instead of weights
+        """
+        super().__init__(weights, value_model)
+        self.time_budget: float = time_budget
+        self.max_depth: int = max_depth
+        self.candidates: int = candidates
+        self._deadline: float = 0
+        self._searched_depth: int = 0
+
+    def player_info(self, human_computer: str = "Expectimax player") -> tuple:
+        return super().player_info(human_computer)
+
+    @property
+    def searched_depth(self) -> int:
+        """
+        Returns depth of the deepest search finished during the last move
+        """
+        return self._searched_depth
+
+    def card_probability(self, seat: int, card: Card, belief: Belief) -> float:
+        """
+        Returns probability that the opponent at given seat holds the card, from the game's
+        hand inference if it's known, otherwise unseen cards are assumed to be dealt uniformly
+
+        :param seat: Opponent's seat, relative to the searching player
+        :param card: One of the unseen cards
+        :param belief: Searched state
+        """
+        if self.beliefs is not None and seat < len(self.beliefs):
+            return float(self.beliefs[seat][CARD_INDEX[card]])
+        if not belief.unseen:
+            return 0
+        return min(belief.lens[seat] / len(belief.unseen), 1)
+
+    def _search_key(self, **game_state) -> Optional[tuple]:
+        """
+        Search also depends on sizes of all hands. Unseen cards aren't in the key,
+        a searched move depends on the time budget anyway.
+        """
+        seat_lens: Optional[tuple[int, ...]] = game_state.get("seat_lens", None)
+        if not seat_lens or len(seat_lens) < 2 or (self.endgame and self.endgame.applies(seat_lens)):
+            return super()._search_key(**game_state)
+        return tuple(seat_lens)
+
+    def _search_best_plays(self, **game_state) -> tuple[list[Card], Optional[str]]:
+        seat_lens: Optional[tuple[int, ...]] = game_state.get("seat_lens", None)
+        if not seat_lens or len(seat_lens) < 2 or (self.endgame and self.endgame.applies(seat_lens)):
+            return super()._search_best_plays(**game_state)
+
+        self._deadline = perf_counter() + self.time_budget
+        self._searched_depth = 0
+        root: Belief = self._root_belief(**game_state)
+        moves: list[Move] = self._candidate_moves(**game_state)
+        best: Optional[Move] = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                scores: dict[Move, float] = {
+                    move: self._play(root, move, depth) for move in moves
+                }
+            except SearchTimeout:
+                break
+            best = max(moves, key=lambda move: scores[move])
+            # better moves are searched first in the next iteration
+            moves.sort(key=lambda move: -scores[move])
+            self._searched_depth = depth
+
+        if best is None:
+            return super()._search_best_plays(**game_state)
+        return self._move_decision(best)
+
+    def _root_belief(self, **game_state) -> Belief:
+        center: Card = game_state["center"]
+        discarded: tuple[Card, ...] = game_state.get("discarded", ())
+        known: set[Card] = set(self.hand) | set(discarded) | {center}
+        params: dict[str, Any] = {
+            key: value
+            for key, value in game_state.items()
+            if key not in ["center", "prev_len", "next_len", "seat_lens", "discarded"]
+        }
+        return Belief(
+            tuple(self.hand),
+            tuple(game_state["seat_lens"]),
+            center,
+            freeze_params(params),
+            0,
+            frozenset(card for card in FULL_DECK if card not in known),
+        )
+
+    def _candidate_moves(self, **game_state) -> list[Move]:
+        """
+        Returns moves searched at the root: the best heuristic movesets, every single
+        playable card and drawing. Jack and ace moves are searched with every selection.
+        """
+        sequences: list[tuple[Card, ...]] = [
+            tuple(moveset) for _, moveset in self.rank_movesets(self.candidates, **game_state)
+        ]
+        sequences += [(card,) for card in self._get_possible_moves(**game_state)]
+        hand_values: list[str] = [card.value for card in self.hand]
+        jack_selections: list[Optional[str]] = [
+            value for value in VALUES[3:9] if value in hand_values
+        ] + [None]
+        moves: list[Move] = []
+        for sequence in dict.fromkeys(sequences):
+            values: list[str] = [card.value for card in sequence]
+            if "jack" in values:
+                moves += [Move(sequence, selection) for selection in jack_selections]
+            elif "ace" in values:
+                moves += [Move(sequence, selection) for selection in ACE_SELECTIONS]
+            else:
+                moves.append(Move(sequence))
+        moves.append(Move(()))
+        return moves
+
+    def _check_time(self) -> None:
+        if perf_counter() > self._deadline:
+            raise SearchTimeout
+
+    @staticmethod
+    def _next_seat(lens: tuple[int, ...], seat: int, backwards: bool = False) -> int:
+        step: int = -1 if backwards else 1
+        return (seat + step) % len(lens)
+
+    @staticmethod
+    def _with_len(lens: tuple[int, ...], seat: int, change: int) -> tuple[int, ...]:
+        return lens[:seat] + (lens[seat] + change,) + lens[seat + 1:]
+
+    @staticmethod
+    def _draw(params: dict[str, Any]) -> int:
+        """
+        Updates parameters when player draws instead of playing
+
+        :return: Number of drawn cards
+        """
+        if params.get("penalty", 0):
+            params.pop("king", None)
+            return params.pop("penalty")
+        if params.pop("skip", 0):
+            return 0
+        return 1
+
+    def _play(self, belief: Belief, move: Move, depth: int) -> float:
+        """
+        Returns expected value of searching player's move
+        """
+        self._check_time()
+        params: dict[str, Any] = dict(belief.params)
+        hand: tuple[Card, ...] = belief.hand
+        lens: tuple[int, ...] = belief.lens
+        center: Card = belief.center
+        if move.cards:
+            hand = tuple(card for card in hand if card not in move.cards)
+            lens = self._with_len(lens, 0, -len(move.cards))
+            for card in move.cards:
+                params = apply_effect(params, card)
+            center = move.cards[-1]
+            if not lens[0]:
+                return WIN
+        else:
+            lens = self._with_len(lens, 0, self._draw(params))
+        end_turn(params)
+        if params.pop("jack", None):
+            params.pop("value", None)
+            if move.selection:
+                params["value"] = (move.selection, 4)
+        if params.pop("ace", None):
+            params["suit"] = (move.selection, 1)
+
+        backwards: bool = is_attacking_king(center) and center.suit == "spades" and bool(move.cards)
+        next_belief: Belief = Belief(
+            hand,
+            lens,
+            center,
+            freeze_params(params),
+            self._next_seat(lens, 0, backwards),
+            belief.unseen,
+        )
+        return self._reply(next_belief, depth)
+
+    def _reply(self, belief: Belief, depth: int) -> float:
+        """
+        Returns expected value of the position where an opponent is about to move
+        """
+        if not depth or not belief.seat:
+            return self._evaluate(belief)
+        self._check_time()
+        seat: int = belief.seat
+        params: dict[str, Any] = dict(belief.params)
+        playable: list[Card] = [
+            card for card in belief.unseen if belief.center.can_play(card, **params)
+        ]
+        probabilities: list[float] = [
+            self.card_probability(seat, card, belief) for card in playable
+        ]
+        # probability that the opponent holds none of the playable cards
+        none_held: float = 1
+        for probability in probabilities:
+            none_held *= 1 - probability
+
+        draw_params: dict[str, Any] = dict(params)
+        drawn: int = self._draw(draw_params)
+        end_turn(draw_params)
+        lens: tuple[int, ...] = self._with_len(belief.lens, seat, drawn)
+        value: float = none_held * self._reply(
+            belief._replace(
+                lens=lens,
+                params=freeze_params(draw_params),
+                seat=self._next_seat(lens, seat),
+            ),
+            depth - 1,
+        )
+
+        total: float = sum(probabilities)
+        for card, probability in zip(playable, probabilities):
+            if probability:
+                weight: float = (1 - none_held) * probability / total
+                value += weight * self._opponent_play(belief, card, depth)
+        return value
+
+    def _opponent_play(self, belief: Belief, card: Card, depth: int) -> float:
+        seat: int = belief.seat
+        lens: tuple[int, ...] = self._with_len(belief.lens, seat, -1)
+        if not lens[seat]:
+            return -WIN
+        params: dict[str, Any] = apply_effect(dict(belief.params), card)
+        end_turn(params)
+        if params.pop("jack", None):
+            params.pop("value", None)
+        if params.pop("ace", None):
+            my_suits: list[str] = [hand_card.suit for hand_card in belief.hand]
+            params["suit"] = (min(ACE_SELECTIONS, key=my_suits.count), 1)
+        backwards: bool = is_attacking_king(card) and card.suit == "spades"
+        return self._reply(
+            Belief(
+                belief.hand,
+                lens,
+                card,
+                freeze_params(params),
+                self._next_seat(lens, seat, backwards),
+                belief.unseen - {card},
+            ),
+            depth - 1,
+        )
+
+    @staticmethod
+    def _evaluate(belief: Belief) -> float:
+        """
+        Returns value of a position from searching player's point of view, pending penalty
+        is counted as drawn by the player that moves next
+        """
+        lens: list[int] = list(belief.lens)
+        penalty: int = dict(belief.params).get("penalty", 0)
+        lens[belief.seat] += penalty
+        opponents: list[int] = lens[1:]
+        return (min(opponents) + sum(opponents) / len(opponents)) / 2 - lens[0]
@@ -1,19 +1,37 @@
 from card import Card
-from constants import SUITS, VALUES
-from deck import Deck, DeckAlreadyEmptyError
-from players import HumanPlayer, ComputerPlayer
-from players import PlayNotAllowedError
+from deck import Deck
+from assets import (
+    CARD_IMAGES,
+    SHEET_PATH,
+    SHEET_SOURCES_PATH,
+    SPRITE_CACHE_DIR,
+    ImagePreloader,
+    SpriteCache,
+    TextCache,
+    png_size,
+)
+from engine import COMPUTER_PLAYERS, GameEngine
+from players import HumanPlayer, ComputerPlayer, MoveWeights
+from bot_protocol import bot_player
+from history import NothingToRedo, NothingToUndo
+from match import play_match
+from value_model import LinearValueModel
+from widgets import ImageButton, TextButton, Widget, WidgetLayer
 import pygame as pg
-from pygame.surfarray import array3d, make_surface
-from pygame import Rect, Surface, image, font
+from pygame import Rect, Surface, font
 from pygame.event import Event
-import pygame_widgets as pgw  # type: ignore
-from pygame_widgets.button import Button  # type: ignore
-from pygame_widgets.mouse import Mouse, MouseState  # type: ignore
 from typing import Callable, Optional, Union, Any
 from functools import partial
-from time import sleep
+from time import perf_counter
 import argparse
+import os
+import snapshot
+
+
+# time in seconds after the last resize event the window is resized
+RESIZE_DELAY: float = 0.1
+# events that can change the game, a new undo step is started before frames that have them
+ACTION_EVENTS: list[int] = [pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP]
 
 
 class WrongCoord(ValueError):
@@ -30,67 +48,17 @@ class WrongPosition(ValueError):
         super().__init__(message, position)
 
 
-class WrongPlayerNumber(ValueError):
-    def __init__(
-        self,
-        player_number,
-        message="Number of players must be an int between 2 and 4",
-    ) -> None:
-        super().__init__(message, player_number)
-
-
-class ImageButton(Button):
-    def __init__(self, win: Surface, x: int, y: int, width: int, height: int, **kwargs):
-        super().__init__(win, x, y, width, height, **kwargs)
-        self.hover_image: Surface = self.modify_brightness(self.image, 0.85)
-        self.click_image: Surface = self.modify_brightness(self.image, 0.75)
-        self.inactive_image: Surface = self.image
-
-    def modify_brightness(self, image: Surface, multiplier: float) -> Surface:
-        arr = array3d(image)
-        arr = arr * multiplier
-        return make_surface(arr)
-
-    def update_image(self, mouseState: MouseState, x: int, y: int) -> None:
-        """Update the button image based on the mouse state and position."""
-        if self.contains(x, y):
-            if mouseState in [MouseState.HOVER, MouseState.DRAG]:
-                self.image = self.hover_image
-            elif mouseState == MouseState.RELEASE and self.clicked:
-                self.image = self.inactive_image
-            elif mouseState == MouseState.CLICK:
-                self.image = self.click_image
-        else:
-            self.image = self.inactive_image
-
-    def draw_text(self, **kwargs) -> None:
-        """Draw the button text."""
-        new_len: str = kwargs.get("new_len", None)
-        if new_len:
-            self.setText(new_len)
-        self.textRect: Rect = self.text.get_rect()
-        self.alignTextRect()
-        self.win.blit(self.text, self.textRect)
-
-    def draw(self, **kwargs) -> None:
-        """Draw the button."""
-        mouseState = Mouse.getMouseState()
-        x, y = Mouse.getMousePos()
-
-        self.update_image(mouseState, x, y)
-        self.win.blit(self.image, (self._x, self._y))
-        self.draw_text(**kwargs)
-
-
 class SelectionMenu:
     def __init__(
         self,
         items: list[str],
         screen: Surface,
+        widgets: WidgetLayer,
         button_height: int = 30,
         button_width: int = 90,
     ) -> None:
         self.screen: Surface = screen
+        self.widgets: WidgetLayer = widgets
         self.padding: int = 5
         self.font_size: int = 20
         self.inactive_color: tuple[int, int, int] = (255, 255, 255)
@@ -98,6 +66,7 @@ class SelectionMenu:
             x * 0.85 for x in self.inactive_color
         )
         self.background_color: tuple[int, int, int] = (34, 139, 34)
+        self.selected: Optional[int] = None
 
         window_height: int = len(items) * (button_height + self.padding) + self.padding
         window_width: int = button_width + 2 * self.padding
@@ -105,85 +74,93 @@ class SelectionMenu:
         y: int = self.screen.get_height() // 2 - window_height // 2
 
         self.rect: Rect = Rect(x, y, window_width, window_height)
-        self.buttons: list[Button] = self.create_buttons(
+        self.buttons: list[TextButton] = self.create_buttons(
             items, button_height, button_width
         )
 
     def create_buttons(
         self, items: list[str], button_height: int, button_width: int
-    ) -> list[Button]:
-        """Create a list of buttons."""
+    ) -> list[TextButton]:
+        """Create a list of buttons, buttons are registered in widget layer under menu's group."""
         buttons = []
         for i, text in enumerate(items):
-            button = Button(
-                self.screen,
+            button = TextButton(
                 self.rect.x + self.padding,
                 self.rect.y + i * (button_height + self.padding) + self.padding,
                 button_width,
                 button_height,
                 text=text,
-                fontSize=self.font_size,
-                inactiveColour=self.inactive_color,
-                hoverColour=self.hover_color,
+                text_font=self.widgets.font(self.font_size),
+                text_cache=self.widgets.text_cache,
+                on_release=partial(self._select, i),
+                inactive_color=self.inactive_color,
+                hover_color=self.hover_color,
             )
-            buttons.append(button)
+            buttons.append(self.widgets.add(button, self))
         return buttons
 
+    def _select(self, index: int) -> None:
+        self.selected = index
+
     def run(self) -> int:
-        running: bool = True
-        selected: int
-        while running:
-            events: list[Event] = pg.event.get()
-            for event in events:
-                if event.type == pg.QUIT:
-                    continue
-            # pg.draw.rect(self.screen, self.background_color, self.rect)
-            for i, button in enumerate(self.buttons):
-                if button.clicked:
-                    selected = i
-                    running = False
-            pgw.update(events)
-            pg.display.update(self.rect)
-        return selected
-
-
-class Game:
+        """
+        Runs menu loop until one of the items is selected, menu's widgets are freed afterwards
+
+        :return: Index of selected item
+        """
+        try:
+            while self.selected is None:
+                events: list[Event] = pg.event.get()
+                for event in events:
+                    if event.type == pg.QUIT:
+                        continue
+                # pg.draw.rect(self.screen, self.background_color, self.rect)
+                self.widgets.update(events, group=self)
+                self.widgets.draw(self.screen, group=self)
+                pg.display.update(self.rect)
+        finally:
+            self.widgets.remove_group(self)
+        return self.selected
+
+
+class Game(GameEngine):
     # TODO:
     # - (Optional) Stop Macao button
-    def __init__(self, player_number: int, render: bool = True) -> None:
+    def __init__(
+        self,
+        player_number: int,
+        render: bool = True,
+        computer_player: Callable[[], ComputerPlayer] = ComputerPlayer,
+        human: bool = True,
+        deck: Optional[Deck] = None,
+        snapshot_path: Optional[str] = None,
+        players: Optional[list[HumanPlayer]] = None,
+    ) -> None:
         """
-        Represents a game of Makao.
+        Represents a game of Makao played in a window, rules are in GameEngine.
 
         :param player_number: The number of players in the game. Must be at least 2 and not greater than 4.
+        :param render: Opens game window if True, game without window can only be played by computer players
+        :param computer_player: Class or factory of computer players
+        :param human: If False the first seat is also taken by a computer player
+        :param deck: Deck cards are dealt from, new shuffled deck is used if not given
+        :param snapshot_path: File the game is saved to after every change and when it's quit
+        :param players: Players in order of seats used instead of the human and computer players,
+            their number has to be equal to player_number
         :raises WrongPlayerNumber: If the number of players is not within the allowed range.
         """
-        try:
-            converted_player_number = int(player_number)
-            if not 2 <= converted_player_number <= 4:
-                raise WrongPlayerNumber(player_number)
-            player_number = converted_player_number
-        except ValueError:
-            raise WrongPlayerNumber(player_number)
-
-        self._players: list[Union[HumanPlayer, ComputerPlayer]] = [HumanPlayer()] + [
-            ComputerPlayer() for _ in range(player_number - 1)
-        ]
-        self._deck: Deck = Deck()
-        self._discarded_deck: Deck = Deck(empty=True)
-        for _ in range(5):
-            for player in self._players:
-                player.draw_card(self.deck)
-                player.reset_turn_status()
-        self._center_card: Card = self._deck.deal()
-        self._game_over: bool = False
-        self._current_player_index: int = 0
-        self._game_params: dict[str, Any] = {}
-        self.played_card: Optional[Card] = None
-        self._finished: list[Union[HumanPlayer, ComputerPlayer]] = []
+        self._render: bool = render
+        self._window_closed: bool = False
+        first_player: Optional[Callable[[], HumanPlayer]] = HumanPlayer if human else None
+        super().__init__(player_number, computer_player, first_player, deck, snapshot_path, players)
 
         if render:
             self._init_pygame()
 
+    def _init_engine(self, deck: Optional[Deck] = None) -> None:
+        super()._init_engine(deck)
+        self.sleep_time = 1 if self._render else 0
+
     def _init_pygame(self) -> None:
         self._game_rects: dict[str, list] = {"human_cards": [], "buttons": []}
         pg.init()
@@ -197,84 +174,28 @@ class Game:
         self._text_color: tuple[int, int, int] = (0, 0, 0)
         self._font_size: int = 30
         self._font: font.Font = font.Font(None, self._font_size)
-        self._card_width, self._card_height = image.load("images/hidden.png").get_size()
+        self._text_cache: TextCache = TextCache()
+        self._widgets: WidgetLayer = WidgetLayer(self._text_cache)
         self._window: Surface = pg.display.set_mode(
             (self._window_width, self._window_height)
         )
-        self.sleep_time: int = 1
-        self._create_buttons()
-
-    @property
-    def players(self) -> list[Union[HumanPlayer, ComputerPlayer]]:
-        return self._players
-
-    @property
-    def finished(self) -> list[Union[HumanPlayer, ComputerPlayer]]:
-        return self._finished
-
-    def _player_finish(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
-        if self.players.index(player) == 0:
-            self.sleep_time = 0
-        self.finished.append(player)
-
-    def _check_if_finished(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
-        if len(player.hand) == 0:
-            self._player_finish(player)
-
-    @property
-    def deck(self) -> Deck:
-        return self._deck
-
-    @property
-    def discarded_deck(self) -> Deck:
-        return self._discarded_deck
-
-    @property
-    def game_over(self) -> bool:
-        return self._game_over
+        self._sprites: SpriteCache = SpriteCache(cache_dir=SPRITE_CACHE_DIR)
+        # card images are decoded in the background, buttons are created once they are ready
+        self._card_width, self._card_height = png_size("images/hidden.png")
+        self._pending_size: Optional[tuple[int, int]] = None
+        self._resize_at: float = 0.0
+        self._preloader: Optional[ImagePreloader] = ImagePreloader(CARD_IMAGES, SHEET_PATH, SHEET_SOURCES_PATH)
+        self._started_at: float = perf_counter()
+        self.first_frame_time: Optional[float] = None
 
     @property
     def human_card_rects(self) -> list[Rect]:
         return self._game_rects["human_cards"]
 
-    @property
-    def current_player_index(self) -> int:
-        return self._current_player_index
-
-    def _change_current_player(self, decrement: bool = False) -> None:
-        multiplier: int = -1 if decrement else 1
-        self._current_player_index = (self.current_player_index + 1 * multiplier) % len(self.players)
-        while self.players[self.current_player_index] in self.finished:
-            self._current_player_index = (self.current_player_index + 1 * multiplier) % len(self.players)
-
-    @property
-    def center_card(self) -> Card:
-        return self._center_card
-
-    @property
-    def game_params(self) -> dict[str, Any]:
-        return self._game_params
-
     @property
     def game_rects(self) -> dict[str, list]:
         return self._game_rects
 
-    @property
-    def get_skip(self) -> int:
-        return self.game_params.get("skip", 0)
-
-    def _increment_skip(self) -> None:
-        val = self.get_skip
-        self.game_params.update({"skip": val + 1})
-
-    def _remove_skip(self) -> None:
-        if self.game_params.get("skip", None):
-            self.game_params.pop("skip")
-
-    @property
-    def get_penalty(self) -> int:
-        return self.game_params.get("penalty", 0)
-
     @property
     def card_width(self) -> int:
         return self._card_width
@@ -323,263 +244,17 @@ class Game:
     def font_size(self) -> int:
         return self._font_size
 
-    def _get_previous_player(self, player: Union[HumanPlayer, ComputerPlayer]) -> Union[HumanPlayer, ComputerPlayer]:
-        previous = self.players[(self.players.index(player) - 1) % len(self.players)]
-        while previous in self.finished:
-            previous = self._get_previous_player(previous)
-        return previous
-
-    def _get_next_player(self, player: Union[HumanPlayer, ComputerPlayer]) -> Union[HumanPlayer, ComputerPlayer]:
-        next_player = self.players[(self.players.index(player) + 1) % len(self.players)]
-        while next_player in self.finished:
-            next_player = self._get_next_player(next_player)
-        return next_player
-
-    def get_current_player(self) -> Union[HumanPlayer, ComputerPlayer]:
-        return self.players[self.current_player_index]
-
-    def _increase_penalty(self, to_add: int) -> None:
-        key, val = "penalty", self.game_params.get("penalty", None) or 0
-        self.game_params.update({key: val + to_add})
-
-    def _reset_penalty(self):
-        if self.game_params.get("penalty", None):
-            self.game_params.pop("penalty")
-
-    def _draw_penalty(self, player: Union[HumanPlayer, ComputerPlayer], number: int = 0):
-        player.penalty = True
-        draw: int = self.get_penalty if not number else number
-        if not draw:
-            return
-        if self.get_penalty:
-            self._reset_penalty()
-        self._reset_king()
-        self._take_cards(player, draw)
-        player.penalty = False
-
-    def _king_played(self, previous: bool = False) -> None:
-        """
-        Updates the game state when a king card is played.
-
-        :key previous: Indicates if the previous or next player will have to draw penalty
-
-        :return: None
-        """
-        player = self.get_current_player()
-        self.game_params.update({"king": True})
-        self._increase_penalty(5)
-        if previous:
-            player.skip_turns += 2  # Additional turn added to compensate for next_turn
-            player.played_king = True
-        self._next_turn(backwards=previous)
-
-    def _reset_king(self) -> None:
-        if self.game_params.get("king", None):
-            self.game_params.pop("king")
-            self._reset_penalty()
-
-    def _jack_played(self) -> None:
-        """
-        Adds flag that jack was played so that slection menu will pop up at the end of turn
-        """
-        self.game_params.update({"jack": True})
-
-    def _ace_played(self):
-        """
-        Adds flag that ace was played so that slection menu will pop up at the end of turn
-        """
-        self.game_params.update({"ace": True})
-
-    def _selection(self, items: list[str]) -> None:
-        """
-        Allows the player to make a selection from a list of items.
-
-        :param items: The list of items to choose from.
-        :return: None
-        """
-        if not self.current_player_index:
-            menu: SelectionMenu = SelectionMenu(items, self.window)
-            selected_index: int = menu.run()
-        else:
-            selected_index = self.get_current_player().selection(items)
-
-        if self.game_params.get("jack", None):
-            self.game_params.pop("jack")
-            if items[selected_index] == "None":
-                if "jack" in self.game_params:
-                    self.game_params.pop("jack")
-                return
-            self.game_params.update({"value": (items[selected_index], 4)})
-
-        else:
-            self.game_params.update({"suit": (items[selected_index], 1)})
-            self.game_params.pop("ace")
-
-    def _take_cards(
-        self, player: Union[HumanPlayer, ComputerPlayer], number: int = 1
-    ) -> None:
-        """
-        Take a specified number of cards from the deck and give them to a player.
-
-        :param player: The player who will receive the cards.
-        :param number: The number of cards to be taken, defaults to 1.
-        """
-        if self.players.index(player) != self.current_player_index or self.get_skip:
-            return
-
-        #  if user presses the button and has a penalty to draw, instead of one card the entire penalty will be drawn
-        if self.get_penalty:
-            self._draw_penalty(player)
-            return
-
-        try:
-            self.print_draw(number)
-            while number != 0:
-                player.draw_card(self.deck)
-                number -= 1
-        except DeckAlreadyEmptyError:
-            if not self.discarded_deck:
-                return
-            self.discarded_deck.shuffle_deck()
-            self._deck = self.discarded_deck
-            self._discarded_deck = Deck(empty=True)
-            while number != 0:
-                player.draw_card(self.deck)
-                number -= 1
-
-        player.makao_set_reset(False)
-
-    def _makao(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
-        if (
-            len(player.hand) > 1
-            or self.players.index(player) != self.current_player_index
-        ):
-            return
-        else:
-            player.makao_set_reset(True)
-        print("Makao")
-
-    def _makao_out(self, player: Union[HumanPlayer, ComputerPlayer]):
-        if len(player.hand) != 0:
-            return
-        self._makao(player)
-        self._next_turn()
-
-    def _stop_makao(self, player: Union[HumanPlayer, ComputerPlayer]) -> None:
-        if self.players.index(player) != self.current_player_index:
-            return
-        previous_player: Union[HumanPlayer, ComputerPlayer] = self._get_previous_player(player)
-        if len(previous_player.hand) in [0, 1] and not previous_player.makao_status:
-            self._change_current_player(decrement=True)
-            self._draw_penalty(previous_player, number=5)
-            self._change_current_player()
-            print("Stop Makao")
-        elif len(previous_player.hand) == 0:
-            self._check_if_finished(previous_player)
-
-    def _update_val_req_param(self) -> None:
-        """
-        Update the required parameters for the game.
-
-        This method updates the required parameters for the game based on the current game parameters.
-        It decreases the number of turns left for each required parameter by 1, and removes the parameter
-        if the number of turns left becomes 0.
-
-        :return: None
-        """
-        req: Optional[tuple[str, int]] = self.game_params.get("value", None)
-        if req:
-            turns_left: int = req[1]
-            turns_left -= 1
-            req = (req[0], turns_left)
-            key = "value"
-            if not turns_left:
-                self.game_params.pop(key)
-            else:
-                self.game_params.update({key: req})
-
-    def _update_suit_req_param(self) -> None:
-        req: Optional[tuple[str, int]] = self.game_params.get("suit", None)
-        if req:
-            moves_left: int = req[1]
-            moves_left -= 1
-            req = (req[0], moves_left)
-            key = "suit"
-            if not moves_left:
-                self.game_params.pop(key)
-            else:
-                self.game_params.update({key: req})
-
-    def _next_turn(self, backwards: bool = False) -> None:
-        player: Union[HumanPlayer, ComputerPlayer] = self.get_current_player()
-        # if self.penalty_draw:
-        #     self.draw_penalty(player)
-        # self._check_if_finished(player)
-        self._update_val_req_param()
-        jack: bool = self.game_params.get("jack", False)
-        ace: bool = self.game_params.get("ace", False)
-        if jack or ace:
-            items: list[str] = SUITS if ace else VALUES[3:9] + ["None"]
-            self._selection(items)
-
-        if self.get_penalty and not player.cards_played:
-            self._draw_penalty(player)
-
-        if self.get_skip and not self.played_card:
-            player.skip_turns = self.get_skip
-            self._remove_skip()
-
-        if player.check_moved() or player.skip_turns:
-            player.skip_turns -= 1 if player.skip_turns else 0
-            player.reset_turn_status()
-            self._change_current_player(decrement=backwards)
-
-        self.played_card = None
-
-    def print_current_move(self) -> None:
-        player: str = "Human Player" if not self.current_player_index else f"Computer{self.current_player_index}"
-        print(
-            f"{player} has played {self.played_card} on {self.center_card} "
-        )
-
-    def print_skip(self) -> None:
-        player: str = "Human Player" if not self.current_player_index else f"Computer{self.current_player_index}"
-        print(
-            f"{player} skipped"
-        )
-
-    def print_draw(self, number: int) -> None:
-        player: str = "Human Player" if not self.current_player_index else f"Computer{self.current_player_index}"
-        print(
-            f"{player} has drawn {number} card{'s' if number > 1 else ''}"
-        )
+    @property
+    def text_cache(self) -> TextCache:
+        return self._text_cache
 
-    def _play_card(
-        self, played_card: Card, player: Union[HumanPlayer, ComputerPlayer]
-    ) -> None:
-        """
-        Play a card and update the game state.
+    @property
+    def sprites(self) -> SpriteCache:
+        return self._sprites
 
-        :param played_card: The card to be played.
-        :param player: The player who played the card.
-        :return: None
-        """
-        try:
-            if self.center_card.can_play(played_card, **self.game_params):
-                if player.cards_played == 4 and len(player.hand) == 1:
-                    raise PlayNotAllowedError(
-                        "If played card is the last card in deck only up to 3 cards can"
-                        " be played before"
-                    )
-                player.play_card(played_card)
-                self.print_current_move()
-                self.discarded_deck.add_card(self.center_card)
-                self._center_card = played_card
-                played_card.play_effect(self)
-                self._render_center_card()
-                self._update_suit_req_param()
-        except PlayNotAllowedError:
-            return
+    @property
+    def widgets(self) -> WidgetLayer:
+        return self._widgets
 
     def _check_card_click(self, mouse_pos: tuple[int, int]) -> Optional[Card]:
         """
@@ -594,67 +269,18 @@ class Game:
                 return card
         return None
 
-    def _computer_play_cards(self, player: ComputerPlayer) -> None:
-        prev_len: int = len(self._get_previous_player(player).hand)
-        next_len: int = len(self._get_next_player(player).hand)
-        game_state: dict[str, Any] = {
-            "center": self.center_card,
-            "prev_len": prev_len,
-            "next_len": next_len
-        }
-        game_state.update(self.game_params)
-        computer_moves: list[Card] = player.find_best_plays(**game_state)
-
-        if not computer_moves:
-            self._take_cards(player)
-            return
-        for played_card in computer_moves:
-            self.played_card = played_card
-            self._play_card(self.played_card, player)
-            if len(player.hand) == 1:
-                self._makao(player)
-            sleep(self.sleep_time)
-
-    def _play_turn(self) -> None:
+    def _select_index(self, items: list[str]) -> int:
         """
-        Plays a turn in the game.
-
-        This method determines the actions to be taken by the current player during their turn.
-        It checks if the player needs to skip turns, draw penalty cards, play a card, or take cards from the center.
-        The method also updates the game state and moves to the next turn.
-
-        :return: None
-        """
-        player: Union[HumanPlayer, ComputerPlayer] = self.get_current_player()
-        if player in self.finished:
-            self._next_turn()
-            return
-        if self.current_player_index:
-            self._stop_makao(player)
-            if self._skip_turn(player):
-                return
-            self._computer_play_cards(player)
-            self._next_turn()
-        else:
-            self._play_card(self.played_card, player)  # type: ignore
-
-    def _skip_turn(self, player: Union[HumanPlayer, ComputerPlayer]) -> bool:
+        Shows selection menu to the human, computer players select on their own
         """
-        Checks if player has skip turns and handles skip
-
-        :param player: The player whose turn is to be skipped.
+        if self._render and not self._computer_turn():
+            menu: SelectionMenu = SelectionMenu(items, self.window, self.widgets)
+            return menu.run()
+        return super()._select_index(items)
 
-        :return: True if the turn was successfully skipped, False otherwise.
-        """
-        if player.skip_turns or player in self.finished:
-            if player.played_king:
-                self._draw_penalty(player)
-                player.played_king = False
-            self._next_turn()
-            player.skip_turns = max(player.skip_turns - 1, 0)
-            self.print_skip()
-            return True
-        return False
+    def _center_card_changed(self) -> None:
+        if self._render:
+            self._render_center_card()
 
     def _handle_human_turn(self) -> None:
         if self._skip_turn(self.get_current_player()):
@@ -664,8 +290,34 @@ class Game:
             self.played_card = played_card
             self._play_turn()
 
+    def _handle_undo_event(self, event: Event) -> None:
+        """
+        Ctrl+Z takes back human's last action together with computer players' turns
+        played after it, Ctrl+Y plays them again
+        """
+        if not event.mod & pg.KMOD_CTRL:
+            return
+        try:
+            if event.key == pg.K_z:
+                self.undo()
+                while self._computer_turn():
+                    self.undo()
+            elif event.key == pg.K_y:
+                self.redo()
+                while self._computer_turn() and self.journal.can_redo:
+                    self.redo()
+        except (NothingToUndo, NothingToRedo):
+            return
+
     def _handle_quit_event(self) -> None:
         self._game_over = True
+        if not self.snapshot_path:
+            return
+        if len(self.finished) >= len(self.players) - 1:
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+        else:
+            self._save_snapshot()
 
     def _handle_mouse_button_down_event(self) -> Optional[Card]:
         """
@@ -685,13 +337,25 @@ class Game:
 
     def _handle_video_resize_event(self, event: Event) -> None:
         """
-        Handle the video resize event.
+        Remembers the new size of the window, the window is only resized once no resize event
+        has come for RESIZE_DELAY seconds, so dragging its border doesn't resize it many times a second
 
         :param event: The resize event.
         :return: None
         """
-        width, height = event.size
-        if width < self.min_height or height < self.min_height:
+        self._pending_size = event.size
+        self._resize_at = perf_counter() + RESIZE_DELAY
+
+    def _apply_resize(self) -> None:
+        """
+        Resizes the window to the last size it was dragged to and moves the buttons.
+        Card sizes don't depend on the size of the window, so no image is scaled again.
+        """
+        if self._pending_size is None or perf_counter() < self._resize_at:
+            return
+        width, height = self._pending_size
+        self._pending_size = None
+        if width < self.min_width or height < self.min_height:
             self._window_width, self._window_height = (
                 self.min_width,
                 self.min_height,
@@ -701,7 +365,7 @@ class Game:
         self._window = pg.display.set_mode(
             (self.window_width, self.window_height), pg.RESIZABLE
         )
-        self._create_buttons()
+        self._layout_buttons()
 
     def _handle_buttons(self, events: list[Event]):
         """
@@ -711,16 +375,10 @@ class Game:
         :type events: list[Event]
         :return: None
         """
-
-        for button in self.game_rects.get("buttons", []):
-            try:
-                new_len = str(
-                    len(self.discarded_deck) if not self.deck else len(self.deck)
-                )
-                button.draw(new_len=new_len)
-            except TypeError:
-                button.draw()
-        pgw.update(events)
+        deck_len: int = len(self.discarded_deck) if not self.deck else len(self.deck)
+        self._deck_button.set_text(str(deck_len))
+        self.widgets.update(events, group="buttons")
+        self.widgets.draw(self.window, group="buttons")
 
     def _render_game(self, events: list[Event]) -> None:
         """
@@ -740,41 +398,100 @@ class Game:
         self._handle_buttons(events)
         pg.display.update()
 
+    @property
+    def window_closed(self) -> bool:
+        return self._window_closed
+
     def start(self) -> None:
         """
-        Start the game loop and handle various events.
+        Plays the game in the window and closes it when the game is over
+        """
+        self.play()
+        self._speculator.shutdown()
+        pg.quit()
+        self.display_result()
+
+    def play(self) -> None:
+        """
+        Start the game loop and handle various events, the window is kept open
+        after the game is over or the window was closed
         """
         while not self.game_over:
+            self._apply_resize()
+            if not self._assets_ready():
+                continue
             events: list[Event] = pg.event.get()
+            if any(event.type in ACTION_EVENTS for event in events):
+                self.journal.checkpoint(self)
             for event in events:
                 if event.type == pg.QUIT:
+                    self._window_closed = True
                     self._handle_quit_event()
                 elif event.type == pg.MOUSEBUTTONDOWN and not self.players[0] in self.finished:
-                    if self.current_player_index:
+                    if self._computer_turn():
                         continue
                     self._handle_human_turn()
+                elif event.type == pg.KEYDOWN:
+                    self._handle_undo_event(event)
                 elif event.type == pg.VIDEORESIZE:
                     self._handle_video_resize_event(event)
             self._render_game(events)
-            if len(self.finished) == 3:
+            if self.first_frame_time is None:
+                self.first_frame_time = perf_counter() - self._started_at
+                print(f"First interactive frame after {self.first_frame_time * 1000:.0f} ms")
+            self._save_snapshot()
+            if len(self.finished) >= len(self.players) - 1:
                 self._handle_quit_event()
-            if self.current_player_index:
+            elif self._computer_turn():
+                self._speculated = False
+                self.journal.checkpoint(self)
                 self._play_turn()
+            elif not self._speculated and self.players[0] not in self.finished:
+                self._start_speculation()
 
-        pg.quit()
-        self.display_result()
+    def _assets_ready(self) -> bool:
+        """
+        Shows loading progress until card images are decoded in the background,
+        then converts them to the display format and creates buttons
 
-    def display_result(self) -> None:
-        for player in self.players:
-            if player not in self.finished:
-                self.finished.append(player)
-        print("Game results:")
-        for i, player in enumerate(self.finished):
-            if (idx := self.players.index(player)) == 0:
-                name: str = "HumanPlayer"
-            else:
-                name = f"Computer{idx}"
-            print(f"{i + 1}. {name}")
+        :return: True if the game can be drawn and played
+        """
+        if self._preloader is None:
+            return True
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                self._window_closed = True
+                self._handle_quit_event()
+            elif event.type == pg.VIDEORESIZE:
+                self._handle_video_resize_event(event)
+        if not self._preloader.done:
+            self._render_loading()
+            pg.time.wait(15)
+            return False
+        self._preloader.install(self.sprites)
+        self._preloader = None
+        self._create_buttons()
+        return True
+
+    def _render_loading(self) -> None:
+        """
+        Renders progress bar of loaded card images
+        """
+        bar_width: int = self.window_width // 3
+        bar: Rect = Rect((self.window_width - bar_width) // 2, self.window_height // 2, bar_width, 20)
+        loaded: int = self._preloader.loaded
+        text: Surface = self.text_cache.render(
+            f"Loading cards {loaded}/{self._preloader.total}", self.font, self.rect_bg_color
+        )
+        self.window.fill(self.background_color)
+        self.window.blit(text, text.get_rect(midbottom=(self.window_width // 2, bar.top - 10)))
+        pg.draw.rect(self.window, self.rect_bg_color, bar, 2)
+        pg.draw.rect(
+            self.window,
+            self.rect_bg_color,
+            Rect(bar.x, bar.y, bar.width * loaded // self._preloader.total, bar.height),
+        )
+        pg.display.update()
 
     def _render_game_info(self) -> None:
         """
@@ -803,8 +520,8 @@ class Game:
         info: zip[tuple[str, Optional[str]]] = zip(info_messages, info_values)
         for i, (message, param) in enumerate(info):
             if param:
-                text: Surface = self.font.render(
-                    message + param[0], True, self.text_color
+                text: Surface = self.text_cache.render(
+                    message + param[0], self.font, self.text_color
                 )
                 width, height = text.get_size()
                 field: Rect = Rect(x, y, width, height)
@@ -812,20 +529,38 @@ class Game:
                 self.window.blit(text, (x, y))
                 y += text.get_height() + padding
 
+    def _button_positions(self) -> list[tuple[int, int]]:
+        """
+        Returns top left corners of the deck, NEXT, PENALTY, AND OUT and MAKAO! buttons
+        for the current size of the window
+        """
+        padding: int = 5
+        button_width: int = 90
+        button_height: int = 50
+        positions: list[tuple[int, int]] = [
+            (
+                (self.window_width - self.card_width) // 2 + self.card_width + 5 - self.card_width // 2,
+                (self.window_height - self.card_height) // 2,
+            )
+        ]
+        for i in range(1, 5):
+            mul: int = (i - 2) if i > 2 else i
+            positions.append(
+                (
+                    self.window_width - padding - mul * button_width - (i - 1) % 2 * padding,
+                    self.window_height - padding - button_height - (padding + button_height) * (i > 2),
+                )
+            )
+        return positions
+
     def _create_buttons(self) -> None:
         """
         Create clickable buttons: Deck to draw cards, Macao! and Next Buttons
         Can only be used once at the start of the game, And buttons can be
         redrawn individually in other methods
         """
-        buttons_list: list[Button] = []
-        x: int
-        y: int
-        button: Button
-        card_image: Optional[Surface]
-        button_width: int
-        button_height: int
-        padding: int = 5
+        buttons_list: list[Widget] = []
+        button: Widget
         deck_len: int = len(self.discarded_deck) if not self.deck else len(self.deck)
         texts: list[str] = [
             str(deck_len),
@@ -842,69 +577,50 @@ class Game:
             partial(self._makao_out, player=player),
             partial(self._makao, player=player),
         ]
-        inactive_color: tuple[int, int, int]
-        hover_color: tuple[float, ...]
-        for i, (message, effect) in enumerate(zip(texts, effects)):
-            try:
-                int(message)
-                button_width = self.card_width
-                button_height = self.card_height
-                x = (
-                    (self.window_width - button_width) // 2
-                    + button_width
-                    + 5
-                    - self.card_width // 2
-                )
-                y = (self.window_height - button_height) // 2
-                card_image = image.load("images/hidden.png")
+        for i, (message, effect, (x, y)) in enumerate(zip(texts, effects, self._button_positions())):
+            if not i:
                 button = ImageButton(
-                    self.window,
                     x,
                     y,
-                    button_width,
-                    button_height,
+                    image=self.sprites.image("images/hidden.png"),
                     text=message,
-                    image=card_image,
-                    onRelease=effect,
-                )
-            except ValueError:
-                button_width = 90
-                button_height = 50
-                y = (
-                    self.window_height
-                    - padding
-                    - button_height
-                    - (padding + button_height) * (i > 2)
+                    text_font=self.widgets.font(20),
+                    text_cache=self.text_cache,
+                    on_release=effect,
                 )
-                mul: int = (i - 2) if i > 2 else i
-                x = (
-                    self.window_width
-                    - padding
-                    - mul * button_width
-                    - (i - 1) % 2 * padding
-                )
-                inactive_color = self.rect_bg_color
-                hover_color = tuple(x * 0.85 for x in self.rect_bg_color)
-                button = Button(
-                    self.window,
+                self._deck_button: ImageButton = button
+            else:
+                button = TextButton(
                     x,
                     y,
-                    button_width,
-                    button_height,
+                    90,
+                    50,
                     text=message,
-                    onRelease=effect,
-                    inactiveColour=inactive_color,
-                    hoverColour=hover_color,
+                    text_font=self.widgets.font(20),
+                    text_cache=self.text_cache,
+                    on_release=effect,
+                    inactive_color=self.rect_bg_color,
+                    hover_color=tuple(int(channel * 0.85) for channel in self.rect_bg_color),
                 )
             buttons_list.append(button)
 
+        self.widgets.remove_group("buttons")
+        for button in buttons_list:
+            self.widgets.add(button, "buttons")
         self.game_rects.update({"buttons": buttons_list})
 
+    def _layout_buttons(self) -> None:
+        """
+        Moves existing buttons to their places in the resized window, their surfaces are kept
+        """
+        for button, (x, y) in zip(self.widgets.group("buttons"), self._button_positions()):
+            button.move_to(x, y)
+
     def _render_center_card(self) -> None:
         """
         Renders current center card
         """
-        card_image: Surface = image.load(self.center_card.get_image_name())
+        card_image: Surface = self.sprites.image(self.center_card.get_image_name())
         x: int = (self.window_width - self.card_width) // 2 - self.card_width // 2
         y: int = (self.window_height - self.card_height) // 2
         card_rect = Rect(x, y, self.card_width, self.card_height)
@@ -959,8 +675,9 @@ class Game:
         position_dict: dict[int, dict[str, Any]] = self._get_position_dict(
             padding, card_height
         )
+        angle: int = 90 if position_dict[position]["rotate"] else 0
         if position != 0:
-            card_image: Surface = self._load_scale_image(card_height, card_width)
+            card_image: Surface = self._load_scale_image(card_height, card_width, angle=angle)
         else:
             self.game_rects.update({"human_cards": []})
 
@@ -972,9 +689,6 @@ class Game:
         )
         fixed_coord: int = position_dict[position]["fixed_coord"]
 
-        if position_dict[position]["rotate"]:
-            card_image = pg.transform.rotate(card_image, 90)
-
         if position in up_down_players:
             start_x = start_coord
             y = fixed_coord
@@ -1003,10 +717,8 @@ class Game:
 
             if all_visible:
                 card_image = self._load_scale_image(
-                    card_height, card_width, card.get_image_name()
+                    card_height, card_width, card.get_image_name(), angle
                 )
-                if position_dict[position]["rotate"]:
-                    card_image = pg.transform.rotate(card_image, 90)
             if position == 0:
                 card_image = self._load_scale_image(
                     card_height, card_width, card.get_image_name()
@@ -1152,29 +864,69 @@ class Game:
         return card_width, card_height, cards_per_row, max_total_width, num_rows
 
     def _load_scale_image(
-        self, card_height: int, card_width: int, path: str = "images/hidden.png"
+        self, card_height: int, card_width: int, path: str = "images/hidden.png", angle: int = 0
     ) -> Surface:
         """
-        Load and scale an image based on the given card height, card width, and path.
+        Load, scale and rotate an image based on the given card height, card width, and path,
+        every variant of an image is only made once and kept on disk for later runs.
 
-        :param card_height: The desired height of the card image.
-        :param card_width: The desired width of the card image.
+        :param card_height: The desired height of the card image before rotation.
+        :param card_width: The desired width of the card image before rotation.
         :param path: The path to the image file. Defaults to "images/hidden.png".
-        :return: The loaded and scaled card image.
+        :param angle: Angle in degrees the image is rotated by counterclockwise.
+        :return: The loaded and scaled card image, must not be modified.
         """
-        card_image: Surface = image.load(path)
-        if card_height != self.card_height or card_width != self.card_width:
-            card_image = pg.transform.smoothscale(card_image, (card_width, card_height))
-        return card_image
+        return self.sprites.sprite(path, (card_width, card_height), angle)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Start a new game")
     parser.add_argument("num_players", type=int, help="The number of players")
+    opponents = parser.add_mutually_exclusive_group()
+    opponents.add_argument(
+        "--ai",
+        choices=list(COMPUTER_PLAYERS),
+        default="heuristic",
+        help="Strategy of computer players",
+    )
+    parser.add_argument("--weights", default=None, help="File with weights written by tuning.py")
+    parser.add_argument("--value-model", default=None, help="File with model written by training.py")
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        help="File the game is saved to every turn, the game is resumed from it if it exists",
+    )
+    opponents.add_argument(
+        "--bot",
+        default=None,
+        help="Command that starts a bot process choosing moves of computer players, see bot_protocol.py",
+    )
+    parser.add_argument("--bot-timeout", type=float, default=1.0, help="Time in seconds the bot has for a move")
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=1,
+        help="Number of games of a match played in the same window, standings are printed after every game",
+    )
     args = parser.parse_args()
 
-    game = Game(args.num_players)
-    game.start()
+    computer_player: Callable[[], ComputerPlayer] = (
+        bot_player(args.bot, args.bot_timeout) if args.bot else COMPUTER_PLAYERS[args.ai]
+    )
+    if args.weights:
+        computer_player = partial(computer_player, weights=MoveWeights.load(args.weights))
+    if args.value_model:
+        computer_player = partial(computer_player, value_model=LinearValueModel.load(args.value_model))
+    game = Game(args.num_players, computer_player=computer_player, snapshot_path=args.snapshot)
+    if args.snapshot and os.path.exists(args.snapshot):
+        try:
+            snapshot.load(game, args.snapshot)
+        except snapshot.SnapshotError as error:
+            print(f"{error}: {args.snapshot}, a new game is started")
+    if args.games > 1:
+        play_match(game, args.games)
+    else:
+        game.start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+from card import Card
+from zobrist import CENTER, DISCARD, STOCK, Location
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Union
+
+if TYPE_CHECKING:
+    from game import Game
+    from players import HumanPlayer
+
+
+PLAYER_ATTRIBUTES: list[str] = [
+    "_makao_status",
+    "_cards_played",
+    "_drew_card",
+    "_drew_penalty",
+    "_skip_turns",
+    "_penalty",
+    "_played_king",
+    "_finished",
+]
+
+
+class NothingToUndo(IndexError):
+    def __init__(self, message: str = "There are no actions to undo") -> None:
+        super().__init__(message)
+
+
+class NothingToRedo(IndexError):
+    def __init__(self, message: str = "There are no actions to redo") -> None:
+        super().__init__(message)
+
+
+class CardMove(NamedTuple):
+    """
+    Card moved from one location to another, see zobrist.Location.
+    Indices are positions in a hand or pile the card was taken from and put to,
+    so the move can be reverted and applied again exactly.
+    """
+    card: Card
+    source: Location
+    source_index: int
+    target: Location
+    target_index: int
+
+
+class Reshuffle(NamedTuple):
+    """
+    Discard pile shuffled into the empty draw pile
+
+    before: discard pile before shuffling
+    after: draw pile after shuffling
+    """
+    before: tuple[Card, ...]
+    after: tuple[Card, ...]
+
+
+JournalEntry = Union[CardMove, Reshuffle]
+
+
+class TurnState(NamedTuple):
+    """
+    Game state other than card placement, its size depends only on the number of players
+    """
+    game_params: tuple[tuple[str, Any], ...]
+    current_player_index: int
+    played_card: Optional[Card]
+    finished: tuple[int, ...]
+    game_over: bool
+    players: tuple[tuple[Any, ...], ...]
+
+    @classmethod
+    def of(cls, game: "Game") -> "TurnState":
+        return cls(
+            tuple(game.game_params.items()),
+            game.current_player_index,
+            game.played_card,
+            tuple(game.players.index(player) for player in game.finished),
+            game.game_over,
+            tuple(
+                tuple(getattr(player, attribute) for attribute in PLAYER_ATTRIBUTES)
+                for player in game.players
+            ),
+        )
+
+    def apply(self, game: "Game") -> None:
+        game.game_params.clear()
+        game.game_params.update(self.game_params)
+        game._current_player_index = self.current_player_index
+        game.played_card = self.played_card
+        game.finished[:] = [game.players[seat] for seat in self.finished]
+        game._game_over = self.game_over
+        player: "HumanPlayer"
+        for player, values in zip(game.players, self.players):
+            for attribute, value in zip(PLAYER_ATTRIBUTES, values):
+                setattr(player, attribute, value)
+
+
+def _pile(game: "Game", location: Location) -> list[Card]:
+    if location == STOCK:
+        return game.deck.deck
+    if location == DISCARD:
+        return game.discarded_deck.deck
+    return game.players[location].hand  # type: ignore
+
+
+def _move(game: "Game", card: Card, source: Location, source_index: int, target: Location, target_index: int) -> None:
+    if source != CENTER:
+        _pile(game, source).pop(source_index)
+    if target == CENTER:
+        game._center_card = card
+    else:
+        _pile(game, target).insert(target_index, card)
+    game._zobrist.move(card, source, target)
+
+
+def _place_piles(game: "Game", discarded: tuple[Card, ...], stock: tuple[Card, ...], source: Location) -> None:
+    """
+    Replaces both piles, cards are moved between them in zobrist key
+    """
+    target: Location = STOCK if source == DISCARD else DISCARD
+    for card in _pile(game, source):
+        game._zobrist.move(card, source, target)
+    game.discarded_deck.deck[:] = discarded
+    game.deck.deck[:] = stock
+
+
+def _apply(game: "Game", entry: JournalEntry) -> None:
+    if isinstance(entry, Reshuffle):
+        _place_piles(game, (), entry.after, DISCARD)
+    else:
+        _move(game, entry.card, entry.source, entry.source_index, entry.target, entry.target_index)
+
+
+def _revert(game: "Game", entry: JournalEntry) -> None:
+    if isinstance(entry, Reshuffle):
+        _place_piles(game, entry.before, (), STOCK)
+    else:
+        _move(game, entry.card, entry.target, entry.target_index, entry.source, entry.source_index)
+
+
+class GameJournal:
+    def __init__(self, max_steps: int = 500) -> None:
+        """
+        Journal of card moves and turn states used to undo and redo actions.
+        Instead of copying the game, every step stores moved cards and the turn state
+        at its start, so undoing or redoing a step takes time proportional to
+        the number of moved cards and players.
+
+        :param max_steps: Number of steps that can be undone, the oldest steps are forgotten
+            when there are more, 0 turns the journal off, e.g. in headless games
+        """
+        self._max_steps: int = max_steps
+        self._entries: list[JournalEntry] = []
+        # number of forgotten entries, checkpoints keep indices counted from the first entry of the game
+        self._offset: int = 0
+        self._checkpoints: list[tuple[int, TurnState]] = []
+        self._redo: list[tuple[list[JournalEntry], TurnState, TurnState]] = []
+
+    @property
+    def max_steps(self) -> int:
+        return self._max_steps
+
+    @property
+    def entries(self) -> list[JournalEntry]:
+        return self._entries
+
+    @property
+    def _end(self) -> int:
+        return self._offset + len(self._entries)
+
+    @property
+    def steps(self) -> int:
+        """
+        Returns number of steps that can be undone
+        """
+        return len(self._checkpoints)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def record(self, entry: JournalEntry) -> None:
+        """
+        Adds card move made by the game, undone steps can't be redone afterwards
+        """
+        if not self.max_steps:
+            return
+        self._entries.append(entry)
+        self._redo.clear()
+
+    def checkpoint(self, game: "Game") -> None:
+        """
+        Starts a new step, nothing is stored if the game hasn't changed since the last one
+        """
+        if not self.max_steps:
+            return
+        state: TurnState = TurnState.of(game)
+        if self._checkpoints and self._checkpoints[-1] == (self._end, state):
+            return
+        if self._redo and self._redo[-1][1] != state:
+            self._redo.clear()
+        self._checkpoints.append((self._end, state))
+        if len(self._checkpoints) > self.max_steps:
+            self._forget()
+
+    def _forget(self) -> None:
+        """
+        Drops the oldest step together with card moves made before the first step left
+        """
+        del self._checkpoints[0]
+        first: int = self._checkpoints[0][0]
+        del self._entries[:first - self._offset]
+        self._offset = first
+
+    def undo(self, game: "Game") -> None:
+        """
+        Reverts changes made since the last checkpoint, or the whole previous step
+        if there were none
+
+        :raises NothingToUndo: If there are no steps left
+        """
+        current: TurnState = TurnState.of(game)
+        while self._checkpoints:
+            index, state = self._checkpoints.pop()
+            if index < self._end or state != current:
+                break
+        else:
+            raise NothingToUndo
+
+        entries: list[JournalEntry] = self._entries[index - self._offset:]
+        del self._entries[index - self._offset:]
+        for entry in reversed(entries):
+            _revert(game, entry)
+        state.apply(game)
+        self._redo.append((entries, state, current))
+
+    def redo(self, game: "Game") -> None:
+        """
+        Applies the last undone step again
+
+        :raises NothingToRedo: If no step was undone or the game has changed since
+        """
+        if not self._redo:
+            raise NothingToRedo
+        entries, state, after = self._redo.pop()
+        if not self._checkpoints or self._checkpoints[-1] != (self._end, state):
+            self._checkpoints.append((self._end, state))
+        for entry in entries:
+            _apply(game, entry)
+        self._entries.extend(entries)
+        after.apply(game)
@@ -0,0 +1,165 @@
+from card import Card
+from deck import CARD_INDEX, CARD_TABLE
+from functools import lru_cache
+from typing import Any
+import numpy as np
+
+
+@lru_cache(maxsize=4096)
+def legal_mask(center: Card, params: tuple[tuple[str, Any], ...]) -> np.ndarray:
+    """
+    Returns read-only mask of cards in CARD_TABLE that can be played on the center card,
+    there are few distinct game states so masks are cached
+
+    :param params: Sorted items of game parameters
+    """
+    game_params: dict[str, Any] = dict(params)
+    mask: np.ndarray = np.array(
+        [card != center and center.can_play(card, **game_params) for card in CARD_TABLE]
+    )
+    mask.flags.writeable = False
+    return mask
+
+
+class HandInference:
+    def __init__(self, players: int, center: Card, hand_size: int = 5) -> None:
+        """
+        Tracks probability that each player holds each card, as seen by someone who
+        only knows the public history of the game: played cards, numbers of drawn cards
+        and turns in which a player drew instead of playing.
+        Every event is processed in time proportional to the number of cards.
+
+        :param players: Number of players, seats are indices in Game.players
+        :param center: Center card after the deal
+        :param hand_size: Number of cards dealt to every player
+        """
+        self._hidden: np.ndarray = np.ones(len(CARD_TABLE), dtype=bool)
+        self._hidden[CARD_INDEX[center]] = False
+        self._hand_lens: np.ndarray = np.full(players, hand_size, dtype=float)
+        self._holding: np.ndarray = np.zeros((players, len(CARD_TABLE)))
+        self._holding[:, self._hidden] = hand_size / self._hidden.sum()
+
+    @classmethod
+    def restart(cls, hand_lens: list[int], visible: list[Card]) -> "HandInference":
+        """
+        Starts inference from the middle of a game whose history is unknown,
+        e.g. a restored snapshot, every hidden card is equally likely in every hand
+
+        :param hand_lens: Number of cards of every player
+        :param visible: Cards known not to be in any hand, the center card and the discard pile
+        """
+        inference: HandInference = cls(len(hand_lens), visible[0], 0)
+        for card in visible[1:]:
+            inference._hidden[CARD_INDEX[card]] = False
+        inference._hand_lens[:] = hand_lens
+        for seat, hand_len in enumerate(hand_lens):
+            inference._holding[seat, inference._hidden] = hand_len / inference._hidden.sum()
+        np.minimum(inference._holding, 1, out=inference._holding)
+        return inference
+
+    def copy(self) -> "HandInference":
+        """
+        Returns independent copy, used to predict beliefs after events that haven't happened yet
+        """
+        inference: HandInference = HandInference.__new__(HandInference)
+        inference._hidden = self._hidden.copy()
+        inference._hand_lens = self._hand_lens.copy()
+        inference._holding = self._holding.copy()
+        return inference
+
+    @property
+    def holding(self) -> np.ndarray:
+        """
+        Returns array with shape (players, 52), probability that the player holds the card
+        """
+        return self._holding
+
+    @property
+    def hidden(self) -> np.ndarray:
+        """
+        Returns mask of cards that are in players' hands or in the draw pile
+        """
+        return self._hidden
+
+    @staticmethod
+    def _normalize(row: np.ndarray, mask: np.ndarray, total: float) -> None:
+        """
+        Scales probabilities of masked cards in place so that they sum up to total,
+        no probability is greater than 1
+        """
+        row[~mask] = 0
+        for _ in range(8):
+            current: float = row.sum()
+            if not current or abs(current - total) < 1e-9:
+                return
+            free: np.ndarray = row < 1
+            fixed: float = row[~free].sum()
+            free_sum: float = row[free].sum()
+            if not free_sum:
+                return
+            row[free] *= max(total - fixed, 0) / free_sum
+            np.minimum(row, 1, out=row)
+
+    def played(self, seat: int, card: Card) -> None:
+        """
+        Updates probabilities after the player has played the card
+        """
+        index: int = CARD_INDEX[card]
+        self._holding[:, index] = 0
+        self._hidden[index] = False
+        self._hand_lens[seat] = max(self._hand_lens[seat] - 1, 0)
+        self._normalize(self._holding[seat], self._hidden, self._hand_lens[seat])
+
+    def passed(self, seat: int, center: Card, game_params: dict[str, Any], certainty: float = 0.95) -> None:
+        """
+        Updates probabilities after the player drew or accepted a penalty or skip instead
+        of playing, which shows that it probably doesn't hold any card that could be played
+
+        :param center: Center card the player didn't play on
+        :param game_params: Game parameters at the start of player's turn
+        :param certainty: Probability that the player would play if it could, it's lower
+            for human players that may draw on purpose
+        """
+        legal: np.ndarray = legal_mask(center, tuple(sorted(game_params.items())))
+        row: np.ndarray = self._holding[seat]
+        row[legal] *= 1 - certainty
+        self._normalize(row, self._hidden, self._hand_lens[seat])
+
+    def drew(self, seat: int, number: int) -> None:
+        """
+        Updates probabilities after the player has drawn cards from the draw pile
+        """
+        if not number:
+            return
+        in_stock: np.ndarray = np.clip(1 - self._holding.sum(axis=0), 0, 1) * self._hidden
+        stock_size: float = in_stock.sum()
+        self._hand_lens[seat] += number
+        if stock_size:
+            row: np.ndarray = self._holding[seat]
+            row += number * in_stock / stock_size
+            np.minimum(row, 1, out=row)
+
+    def reshuffled(self, cards: list[Card]) -> None:
+        """
+        Updates probabilities after the discard pile was shuffled into the draw pile,
+        these cards are hidden again but no player holds them
+        """
+        for card in cards:
+            self._hidden[CARD_INDEX[card]] = True
+
+    def beliefs(self, seats: list[int], hand: list[Card]) -> np.ndarray:
+        """
+        Returns probabilities as seen by a player that also knows its own hand
+
+        :param seats: Seats in order of play starting with the player
+        :param hand: Player's hand
+        :return: Array with shape (len(seats), 52), the first row is the player's hand
+        """
+        own: np.ndarray = np.zeros(len(CARD_TABLE), dtype=bool)
+        own[[CARD_INDEX[card] for card in hand]] = True
+        mask: np.ndarray = self._hidden & ~own
+        beliefs: np.ndarray = self._holding[seats].copy()
+        beliefs[0] = own
+        for row, seat in zip(beliefs[1:], seats[1:]):
+            self._normalize(row, mask, self._hand_lens[seat])
+        return beliefs
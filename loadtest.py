@@ -0,0 +1,303 @@
+from card import Card
+from concurrent.futures import Executor, ProcessPoolExecutor
+from deck import CARD_INDEX, CARD_TABLE
+from players import ComputerPlayer
+from server import GameClient
+from time import perf_counter
+from typing import Any, NamedTuple, Optional
+import argparse
+import asyncio
+import numpy as np
+import os
+import socket
+import sys
+
+
+class LoadReport(NamedTuple):
+    """
+    Result of one load level
+
+    tables: number of tables played at once
+    clients: number of connected clients
+    games: number of finished games
+    actions: number of actions sent
+    duration: wall time in seconds
+    latencies: round-trip times of actions in milliseconds at percentiles 50, 90, 99 and the maximum
+    """
+    tables: int
+    clients: int
+    games: int
+    actions: int
+    duration: float
+    latencies: tuple[float, float, float, float]
+
+    @property
+    def tables_per_second(self) -> float:
+        return self.games / self.duration if self.duration else 0.0
+
+    def __str__(self) -> str:
+        p50, p90, p99, worst = self.latencies
+        return (
+            f"{self.tables:5d} tables {self.clients:6d} clients {self.tables_per_second:8.1f} tables/s "
+            f"{self.actions / self.duration:9.0f} actions/s  "
+            f"p50 {p50:7.2f} ms  p90 {p90:7.2f} ms  p99 {p99:7.2f} ms  max {worst:7.2f} ms"
+        )
+
+
+def _game_state(seat: int, state: dict[str, Any]) -> dict[str, Any]:
+    """
+    Converts state sent by the server to game state used by find_best_plays
+    """
+    players: int = len(state["hand_lens"])
+    seats: list[int] = [
+        (seat + offset) % players
+        for offset in range(players)
+        if (seat + offset) % players not in state["finished"]
+    ]
+    seat_lens: tuple[int, ...] = tuple(state["hand_lens"][seat] for seat in seats)
+    game_state: dict[str, Any] = {
+        "center": CARD_TABLE[state["center"]],
+        "prev_len": seat_lens[-1],
+        "next_len": seat_lens[1] if len(seat_lens) > 1 else 0,
+        "seat_lens": seat_lens,
+    }
+    for key, value in state["params"].items():
+        game_state[key] = tuple(value) if isinstance(value, list) else value
+    return game_state
+
+
+def choose_plays(seat: int, state: dict[str, Any]) -> tuple[list[int], Optional[str]]:
+    """
+    Chooses moves of the player at given seat with ComputerPlayer heuristic.
+    Endgame solver is not used because server state doesn't include the discard pile.
+    It's called in a worker process, so arguments and result are plain server messages.
+
+    :param state: State in which it's this player's turn
+    :return: Indexes of cards to play in CARD_TABLE and value or suit selected after them
+    """
+    brain: ComputerPlayer = ComputerPlayer()
+    brain.endgame = None
+    brain.deal_hand([CARD_TABLE[index] for index in state["hand"]])
+    plays: list[Card] = brain.find_best_plays(**_game_state(seat, state))
+    return [CARD_INDEX[card] for card in plays], brain.selection_after(plays)
+
+
+class ScriptedClient:
+    def __init__(self, client: GameClient, executor: Optional[Executor] = None) -> None:
+        """
+        Remote player whose moves are chosen by ComputerPlayer heuristic, see choose_plays.
+        Moves are searched in the executor, so that searches don't stop the event loop
+        the clients share and latencies measure only the server.
+
+        :param client: Connection to the server
+        :param executor: Executor moves are searched in, default executor of the loop
+            is used if not given
+        """
+        self._client: GameClient = client
+        self._executor: Optional[Executor] = executor
+        self._seat: int = 0
+        self.latencies: list[float] = []
+
+    async def _act(self, op: str, **fields: Any) -> dict[str, Any]:
+        """
+        Sends action and waits for its reply, only the player to move acts,
+        so the next message is always the reply
+        """
+        start: float = perf_counter()
+        await self._client.send(op, **fields)
+        reply: dict[str, Any] = await self._client.receive()
+        self.latencies.append(perf_counter() - start)
+        return reply
+
+    def _turn_over(self, reply: dict[str, Any]) -> bool:
+        return reply["type"] != "state" or reply["current"] != self._seat
+
+    async def _turn(self, state: dict[str, Any]) -> dict[str, Any]:
+        """
+        Plays one turn
+
+        :param state: State in which it's this player's turn
+        :return: The last reply of the server
+        """
+        plays: list[int]
+        selection: Optional[str]
+        plays, selection = await asyncio.get_running_loop().run_in_executor(
+            self._executor, choose_plays, self._seat, state
+        )
+        reply: dict[str, Any] = state
+        moved: bool = False
+        for card in plays:
+            reply = await self._act("play", card=card)
+            if reply["type"] == "error":
+                reply = state
+                break
+            moved = True
+            if self._turn_over(reply):
+                return reply
+        if not moved:
+            reply = await self._act("draw")
+            if self._turn_over(reply):
+                return reply
+        if not reply["hand"]:
+            return await self._act("makao_out")
+        if len(reply["hand"]) == 1:
+            await self._act("makao")
+        return await self._act("next", selection=selection if moved else None)
+
+    async def play(self, table: str, seats: int) -> dict[str, Any]:
+        """
+        Joins the table and plays until the game is over
+
+        :return: The last state of the game
+        """
+        await self._client.send("join", table=table, seats=seats)
+        self._seat = (await self._client.receive())["seat"]
+        state: dict[str, Any] = await self._client.receive()
+        while state["type"] != "over":
+            if state["type"] == "state" and state["current"] == self._seat:
+                state = await self._turn(state)
+            else:
+                state = await self._client.receive()
+        return state
+
+
+def _percentiles(latencies: list[float]) -> tuple[float, float, float, float]:
+    if not latencies:
+        return (0.0, 0.0, 0.0, 0.0)
+    milliseconds: np.ndarray = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(milliseconds, [50, 90, 99])
+    return (float(p50), float(p90), float(p99), float(milliseconds.max()))
+
+
+async def run_level(
+    host: str,
+    port: int,
+    tables: int,
+    seats: int = 2,
+    games: int = 1,
+    executor: Optional[Executor] = None,
+) -> LoadReport:
+    """
+    Plays games at many tables at once, every table plays given number of games in a row
+
+    :param tables: Number of tables played at once
+    :param seats: Number of remote players at every table
+    :param games: Number of games played at every table
+    :param executor: Executor clients search their moves in, see ScriptedClient
+    """
+    latencies: list[float] = []
+    finished: list[int] = []
+
+    async def table_games(table: int) -> None:
+        for game in range(games):
+            clients: list[ScriptedClient] = [
+                ScriptedClient(await GameClient.connect_tcp(host, port), executor) for _ in range(seats)
+            ]
+            name: str = f"load-{os.getpid()}-{tables}-{table}-{game}"
+            await asyncio.gather(*(client.play(name, seats) for client in clients))
+            for client in clients:
+                latencies.extend(client.latencies)
+                await client._client.close()
+            finished.append(table)
+
+    start: float = perf_counter()
+    await asyncio.gather(*(table_games(table) for table in range(tables)))
+    duration: float = perf_counter() - start
+    return LoadReport(tables, tables * seats, len(finished), len(latencies), duration, _percentiles(latencies))
+
+
+async def find_saturation(
+    host: str,
+    port: int,
+    levels: list[int],
+    seats: int = 2,
+    games: int = 1,
+    max_p99: float = 50.0,
+    executor: Optional[Executor] = None,
+) -> tuple[list[LoadReport], Optional[LoadReport]]:
+    """
+    Runs load levels in order until the server saturates: p99 latency exceeds
+    the limit or throughput stops growing by at least 5%
+
+    :param levels: Increasing numbers of tables played at once
+    :param max_p99: Highest acceptable p99 latency in milliseconds
+    :param executor: Executor clients search their moves in, see ScriptedClient
+    :return: Reports of every run level and the last level before saturation,
+        None if even the first level saturates the server
+    """
+    reports: list[LoadReport] = []
+    best: Optional[LoadReport] = None
+    for tables in levels:
+        report: LoadReport = await run_level(host, port, tables, seats, games, executor)
+        reports.append(report)
+        print(report, flush=True)
+        if report.latencies[2] > max_p99 or (
+            best is not None and report.tables_per_second < best.tables_per_second * 1.05
+        ):
+            break
+        best = report
+    return reports, best
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_server(port: int) -> asyncio.subprocess.Process:
+    """
+    Starts server.py in another process, so that clients don't share its event loop
+    """
+    process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "server.py",
+        "--port",
+        str(port),
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    line: bytes = b"-"
+    while line and not line.startswith(b"Listening"):
+        line = await process.stdout.readline()  # type: ignore
+    return process
+
+
+async def _main(args: argparse.Namespace) -> None:
+    process: Optional[asyncio.subprocess.Process] = None
+    host: str = args.host
+    port: int = args.port
+    if not port:
+        port = _free_port()
+        process = await _start_server(port)
+    try:
+        with ProcessPoolExecutor(args.workers) as executor:
+            reports, best = await find_saturation(
+                host, port, args.levels, args.seats, args.games, args.max_p99, executor
+            )
+        if best is None:
+            print("Server is saturated at the first level")
+        else:
+            print(f"Saturation point: {best.tables} tables, {best.tables_per_second:.1f} tables/s")
+    finally:
+        if process is not None:
+            process.terminate()
+            await process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how many tables one server process can handle")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port of running server, a new server is started if 0")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 25, 50, 100, 250, 500, 1000])
+    parser.add_argument("--seats", type=int, default=2, help="Remote players at every table")
+    parser.add_argument("--games", type=int, default=2, help="Games played in a row at every table")
+    parser.add_argument("--max-p99", type=float, default=50.0, help="Highest acceptable p99 latency in ms")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processes clients search their moves in, all cores if not given"
+    )
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
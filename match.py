@@ -0,0 +1,83 @@
+from typing import TYPE_CHECKING
+import pygame as pg
+
+if TYPE_CHECKING:
+    from game import Game
+
+
+class Standings:
+    def __init__(self, names: list[str]) -> None:
+        """
+        Cumulative results of a match, after every game a player gets one point
+        for every player that has finished after it
+
+        :param names: Names of players in order of seats
+        """
+        self._names: list[str] = names
+        self._places: list[list[int]] = [[] for _ in names]
+
+    @property
+    def names(self) -> list[str]:
+        return self._names
+
+    @property
+    def games(self) -> int:
+        return len(self._places[0])
+
+    @property
+    def points(self) -> list[int]:
+        return [sum(len(self.names) - place for place in places) for places in self._places]
+
+    @property
+    def wins(self) -> list[int]:
+        return [places.count(1) for places in self._places]
+
+    def record(self, game: "Game") -> None:
+        """
+        Adds places of a finished game, players that haven't finished take the last places in order of seats
+        """
+        order: list[int] = [game.players.index(player) for player in game.finished]
+        order += [seat for seat in range(len(game.players)) if seat not in order]
+        for place, seat in enumerate(order):
+            self._places[seat].append(place + 1)
+
+    def table(self) -> list[str]:
+        """
+        Returns lines with players sorted by points, the best first
+        """
+        seats: list[int] = sorted(range(len(self.names)), key=lambda seat: -self.points[seat])
+        return [
+            f"{rank + 1}. {self.names[seat]}: {self.points[seat]} points, {self.wins[seat]} wins"
+            for rank, seat in enumerate(seats)
+        ]
+
+
+def player_names(game: "Game") -> list[str]:
+    return ["HumanPlayer"] + [f"Computer{seat}" for seat in range(1, len(game.players))]
+
+
+def play_match(game: "Game", games: int) -> Standings:
+    """
+    Plays consecutive games in the same window, the window, fonts and card images
+    stay loaded between games and only the state of the engine is reset.
+    The match ends early when the window is closed.
+
+    :param game: Game with open window, the first game of the match
+    :param games: Number of games
+    :return: Standings after the last finished game
+    """
+    standings: Standings = Standings(player_names(game))
+    for number in range(games):
+        pg.display.set_caption(f"Macao - game {number + 1} of {games}")
+        game.play()
+        if game.window_closed:
+            break
+        standings.record(game)
+        print(f"Standings after game {number + 1}:")
+        for line in standings.table():
+            print(line)
+        if number + 1 < games:
+            game.new_game()
+    game._speculator.shutdown()
+    pg.quit()
+    return standings
@@ -1,7 +1,23 @@
-from typing import Generator, Any, Optional
-from deck import Deck
+from typing import TYPE_CHECKING, Callable, Generator, Any, NamedTuple, Optional
+from constants import SUITS, VALUES
+from deck import CARD_TABLE, Deck
 from card import Card
 from random import randint
+from copy import copy
+from collections import OrderedDict
+from itertools import islice
+from threading import Lock
+from heapq import heappush, heapreplace
+from endgame import EndgameSolver
+from rules import Move
+import json
+import numpy as np
+
+if TYPE_CHECKING:
+    from value_model import LinearValueModel
+
+
+KING_CARDS: np.ndarray = np.array([card.value == "king" for card in CARD_TABLE])
 
 
 class PlayNotAllowedError(Exception):
@@ -9,6 +25,93 @@ class PlayNotAllowedError(Exception):
         super().__init__(message)
 
 
+class MoveWeights(NamedTuple):
+    """
+    Parameters of move_sort_key, the smaller importance of a descriptor is the more important
+    moveset is.
+
+    urgent_skip: importance of skip when the previous player isn't ahead of the player
+    king_swap_margin: king importances are swapped when previous player's hand is smaller
+        than next player's hand plus the margin
+    skip_margin: skip is urgent when previous player's hand isn't greater than
+        player's hand plus the margin
+    length_bonus: subtracted from importance for every card of movesets longer than one card
+    """
+    king_next_draw: float = 1
+    next_draw: float = 2
+    king_prev_draw: float = 3
+    value_req: float = 4
+    suit_req: float = 4
+    skip: float = 4
+    normal: float = 5
+    urgent_skip: float = 2
+    king_swap_margin: float = 0
+    skip_margin: float = 0
+    length_bonus: float = 1
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file_handle:
+            json.dump(self._asdict(), file_handle, indent=4)
+
+    @classmethod
+    def load(cls, path: str) -> "MoveWeights":
+        """
+        Reads weights written by save, missing weights have default values
+        """
+        with open(path, "r") as file_handle:
+            return cls(**json.load(file_handle))
+
+
+class DecisionCache:
+    def __init__(self, max_size: int = 32) -> None:
+        """
+        Least recently used cache of computer player's decisions, each decision is a list
+        of cards to play and a value or suit to select after them. Can be shared between threads.
+
+        :param max_size: Maximum number of stored decisions
+        """
+        self._max_size: int = max_size
+        self._decisions: OrderedDict[tuple, tuple[list[Card], Optional[str]]] = OrderedDict()
+        self._lock: Lock = Lock()
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get(self, key: tuple) -> Optional[tuple[list[Card], Optional[str]]]:
+        """
+        Returns copy of the stored decision or None if there is no decision for given key
+        """
+        with self._lock:
+            decision: Optional[tuple[list[Card], Optional[str]]] = self._decisions.get(key, None)
+            if decision is None:
+                self._misses += 1
+                return None
+            self._decisions.move_to_end(key)
+            self._hits += 1
+            return list(decision[0]), decision[1]
+
+    def put(self, key: tuple, decision: list[Card], selection: Optional[str] = None) -> None:
+        with self._lock:
+            self._decisions[key] = (list(decision), selection)
+            self._decisions.move_to_end(key)
+            if len(self._decisions) > self._max_size:
+                self._decisions.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._decisions.clear()
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+
 class HumanPlayer:
     def __init__(self) -> None:
         """
@@ -24,6 +127,20 @@ class HumanPlayer:
         self._penalty: bool = False
         self._played_king: bool = False
 
+    def reset(self) -> None:
+        """
+        Clears hand and turn status before the next game of a match
+        """
+        self._hand = []
+        self.finished = False
+        self._makao_status = False
+        self._cards_played = 0
+        self._drew_card = False
+        self._drew_penalty = False
+        self._skip_turns = 0
+        self._penalty = False
+        self._played_king = False
+
     @property
     def makao_status(self) -> bool:
         return self._makao_status
@@ -99,6 +216,12 @@ class HumanPlayer:
     def hand(self) -> list[Card]:
         return self._hand
 
+    def deal_hand(self, cards: list[Card]) -> None:
+        """
+        Gives player its starting hand
+        """
+        self._hand = cards
+
     def draw_card(self, deck: Deck) -> None:
         if self.penalty:
             self._drew_penalty = True
@@ -134,35 +257,143 @@ class HumanPlayer:
         return " ".join([str(card) for card in self.hand])
 
 
+class RemotePlayer(HumanPlayer):
+    def __init__(self) -> None:
+        """
+        Human player connected to a game server, value or suit it selects after
+        a jack or an ace is sent together with its action
+        """
+        super().__init__()
+        self.pending_selection: Optional[str] = None
+
+    def player_info(self, human_computer: str = "Remote player") -> tuple:
+        return super().player_info(human_computer)
+
+    def selection(self, items: list[str]) -> int:
+        """
+        Returns index of the pending selection, no value is requested
+        and the first suit is selected if it isn't one of the items
+        """
+        selected, self.pending_selection = self.pending_selection, None
+        if selected in items:
+            return items.index(selected)
+        return items.index("None") if "None" in items else 0
+
+
+class TerminalPlayer(HumanPlayer):
+    def __init__(self, choose: Callable[[list[str]], int]) -> None:
+        """
+        Human player of the terminal front-end, value or suit it selects after
+        a jack or an ace is chosen from a menu drawn in the terminal
+
+        :param choose: Shows the items and returns index of the chosen one
+        """
+        super().__init__()
+        self._choose: Callable[[list[str]], int] = choose
+
+    def selection(self, items: list[str]) -> int:
+        return self._choose(items)
+
+
 class ComputerPlayer(HumanPlayer):
+    # number of movesets generated for every first move, hands of up to 8 cards have
+    # a few hundred at most, but a big hand of one suit can have hundreds of thousands
+    MAX_PERMUTATIONS: int = 1000
+
     # TODO:
     # - algorithm to choose best moves
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        weights: Optional[MoveWeights] = None,
+        value_model: Optional["LinearValueModel"] = None,
+    ) -> None:
         """
         Class representing computer player with a deck of cards rank and makao status
+
+        :param weights: Weights used to rank movesets, default weights are used if not given
+        :param value_model: Model that ranks movesets instead of weights if it's given
         """
         super().__init__()
+        self.weights: MoveWeights = weights if weights is not None else MoveWeights()
+        self.value_model: Optional["LinearValueModel"] = value_model
+        # probabilities that players hold cards, rows in order of play starting with this player,
+        # set by the game before every turn
+        self.beliefs: Optional[np.ndarray] = None
+        self._decision_cache: DecisionCache = DecisionCache()
+        self.endgame: Optional[EndgameSolver] = EndgameSolver()
+        self._planned_selection: Optional[str] = None
+
+    def reset(self) -> None:
+        """
+        Clears state of the game, cached decisions are kept because they only depend on the position
+        """
+        super().reset()
+        self.beliefs = None
+        self._planned_selection = None
+
+    @property
+    def decision_cache(self) -> DecisionCache:
+        return self._decision_cache
 
     def player_info(self, human_computer: str = "Computer player") -> tuple:
         return super().player_info(human_computer)
 
     def selection(self, items: list[str]) -> int:
+        planned, self._planned_selection = self._planned_selection, None
+        if planned in items:
+            return items.index(planned)
         if len(items) == 4:
             return self.suit_select()
         else:
             return self.val_select(items)
 
+    def selection_after(self, plays: list[Card]) -> Optional[str]:
+        """
+        Returns value or suit the player selects after playing given cards,
+        "None" if a jack doesn't request any value
+
+        :return: Selected item or None if no jack or ace was played
+        """
+        values: list[str] = [card.value for card in plays]
+        if "jack" in values:
+            items: list[str] = VALUES[3:9] + ["None"]
+        elif "ace" in values:
+            items = SUITS
+        else:
+            return None
+        return items[self.selection(items)]
+
+    def holds_any(self, seat: int, cards: np.ndarray) -> float:
+        """
+        Returns probability that the player at given seat holds at least one of the cards
+
+        :param seat: Seat relative to this player, 1 is the next player and -1 the previous one
+        :param cards: Mask of cards in CARD_TABLE
+        """
+        if self.beliefs is None or len(self.beliefs) < 2:
+            return 0
+        return float(1 - np.prod(1 - self.beliefs[seat][cards]))
+
     def suit_select(self) -> int:
         """
-        Randomly selects a suit for the next player
+        Selects suit the player holds most of and the next player is least likely to hold,
+        suit is selected randomly if player doesn't know anything about other players' hands
 
         :return: The index of the selected suit
         """
-        return randint(0, 3)
+        if self.beliefs is None:
+            return randint(0, 3)
+        scores: list[float] = [
+            sum(card.suit == suit for card in self.hand)
+            - self.holds_any(1, np.array([card.suit == suit for card in CARD_TABLE]))
+            for suit in SUITS
+        ]
+        return scores.index(max(scores))
 
     def val_select(self, items: list[str]) -> int:
         """
-        Calculates the value to select based on the player's hand
+        Calculates the value to select based on the player's hand, when values are held
+        equally often the one the next player is least likely to hold is selected
 
         :param items: list of values
         :return: Index of selected value or index of None in selection menu
@@ -170,39 +401,198 @@ class ComputerPlayer(HumanPlayer):
         values: list[str] = items[:-1]
         hand_values: list[str] = [card.value for card in self.hand]
         num_of_occurrences: list[int] = [hand_values.count(value) for value in values]
-        return len(values) if not max(num_of_occurrences) else max(num_of_occurrences)
+        if not max(num_of_occurrences):
+            return len(values)
+        scores: list[float] = [
+            count - self.holds_any(1, np.array([card.value == value for card in CARD_TABLE])) / 2
+            for value, count in zip(values, num_of_occurrences)
+        ]
+        return scores.index(max(scores))
+
+    def _king_counters(self) -> tuple[float, float]:
+        """
+        Returns probabilities that the previous and the next player can answer attacking king with a king
+        """
+        return self.holds_any(-1, KING_CARDS), self.holds_any(1, KING_CARDS)
+
+    def _kings_swapped(self, prev_len: int, next_len: int) -> bool:
+        """
+        Returns True if attacking the next player with a king is better than attacking the previous one
+        """
+        # king answered with a king is as bad as attacking a player with five more cards
+        prev_counter, next_counter = self._king_counters()
+        return prev_len + 5 * prev_counter < next_len + 5 * next_counter + self.weights.king_swap_margin
+
+    def decision_key(self, **game_state) -> tuple:
+        """
+        Returns hashable key of everything find_best_plays depends on: hand in order,
+        center card, game parameters and neighbours' hand sizes. Beliefs only change
+        which neighbour an attacking king targets, so only that choice is in the key,
+        and only when the hand has an attacking king. The pile and the sizes of other hands
+        are only in the key when the search uses them, see _search_key.
+
+        :key center: Current center card
+        :key prev_len: Length of the previous player's deck
+        :key next_len: Length of the next player's deck
+        :return: Key, equal keys always give the same best plays
+        """
+        center: Card = game_state.get("center", None)
+        prev_len: int = game_state.get("prev_len", 0)
+        next_len: int = game_state.get("next_len", 0)
+        params: frozenset = frozenset(
+            (key, value)
+            for key, value in game_state.items()
+            if key not in ["center", "prev_len", "next_len", "players", "seat_lens", "discarded"]
+        )
+        kings_swapped: Optional[bool] = None
+        if any(card.value == "king" and card.suit in ["spades", "hearts"] for card in self.hand):
+            kings_swapped = self._kings_swapped(prev_len, next_len)
+        return (
+            tuple((card.value, card.suit) for card in self.hand),
+            (center.value, center.suit),
+            prev_len,
+            next_len,
+            params,
+            kings_swapped,
+            self._search_key(**game_state),
+        )
+
+    def _search_key(self, **game_state) -> Optional[tuple]:
+        """
+        Returns part of decision_key for inputs only some searches use, the endgame solver
+        also depends on sizes of all hands and on the discard pile, None if it isn't used
+        """
+        seat_lens: Optional[tuple[int, ...]] = game_state.get("seat_lens", None)
+        if not (self.endgame and seat_lens and self.endgame.applies(seat_lens)):
+            return None
+        return tuple(seat_lens), frozenset(game_state.get("discarded", ()))
+
+    def search_copy(self) -> "ComputerPlayer":
+        """
+        Returns a copy of the player with its own hand list, so that moves can be
+        searched in another thread without modifying this player.
+        Decision cache is shared, so decisions found by the copy are reused by the player.
+        """
+        player: ComputerPlayer = copy(self)
+        player._hand = list(self.hand)
+        player.endgame = copy(self.endgame)
+        return player
 
     def find_best_plays(self, **game_state) -> list[Card]:
         """
         Finds the best plays based on the given game parameters and player data
 
-        :key players: A list of players in the game
         :key center: Current center card
         :key prev_len: Length of the previous player's deck
         :key next_len: Length of the next player's deck
+        :key seat_lens: Hand sizes of players still in the game starting with this player,
+            endgame solver is only used if it's given
+        :key discarded: Cards in the discard pile
 
         :return: Moves for computer to play.
         """
+        key: tuple = self.decision_key(**game_state)
+        cached: Optional[tuple[list[Card], Optional[str]]] = self.decision_cache.get(key)
+        if cached is not None:
+            best_moves, self._planned_selection = cached
+            return best_moves
+
+        best_moves, self._planned_selection = self._search_best_plays(**game_state)
+        self.decision_cache.put(key, best_moves, self._planned_selection)
+        return best_moves
+
+    def _search_best_plays(self, **game_state) -> tuple[list[Card], Optional[str]]:
+        """
+        Searches for the best plays, see find_best_plays. Endgame solver is tried first
+        when there are only a few cards left in players' hands.
+
+        :return: Cards to play and value or suit that should be selected after them,
+            None if selection is left to val_select and suit_select
+        """
+        seat_lens: Optional[tuple[int, ...]] = game_state.get("seat_lens", None)
+        if self.endgame and seat_lens and self.endgame.applies(seat_lens):
+            move: Optional[Move] = self.endgame.best_move(self.hand, **game_state)
+            if move is not None:
+                return self._move_decision(move)
 
+        best_movesets: list[tuple[str, list[Card]]] = self.rank_movesets(1, **game_state)
+        return (best_movesets[0][1] if best_movesets else []), None
+
+    @staticmethod
+    def _move_decision(move: Move) -> tuple[list[Card], Optional[str]]:
+        """
+        Converts searched move to cards to play and item to select, jack without
+        requested value selects "None"
+        """
+        selection: Optional[str] = move.selection
+        if not selection and any(card.value == "jack" for card in move.cards):
+            selection = "None"
+        return list(move.cards), selection
+
+    def rank_movesets(self, k: int = 1, **game_state) -> list[tuple[str, list[Card]]]:
+        """
+        Streams all possible movesets and keeps only the k best of them, so memory used
+        doesn't depend on the number of permutations. Search stops as soon as a moveset
+        that ends the game for the player is found.
+
+        :param k: Number of movesets to return
+        :key center: Current center card
+        :key prev_len: Length of the previous player's deck
+        :key next_len: Length of the next player's deck
+
+        :return: Up to k best movesets sorted from the best, each represented as a tuple
+            containing a descriptor string and a list of cards. Movesets with equal
+            importance are kept in the order they were generated.
+        """
         self.previous_len: int = game_state.get("prev_len", 0)
         self.next_len: int = game_state.get("next_len", 0)
+        importance: dict[str, float] = self._movesets_importance()
         possible_first_moves: list[Card] = self._get_possible_moves(**game_state)
-        possible_movesets: list[tuple[str, list[Card]]] = self._get_movesets(
+        heap: list[tuple[float, int, str, list[Card]]] = []
+        movesets: Generator[tuple[str, list[Card]], None, None] = self._iter_movesets(
             possible_first_moves, **game_state
         )
+        if self.value_model is not None:
+            return self._rank_by_value_model(k, movesets, **game_state)
+        for index, (descriptor, moveset) in enumerate(movesets):
+            if descriptor == "end":
+                return [(descriptor, moveset)]
+            # max-heap of the worst kept movesets, later movesets lose ties
+            entry = (
+                -self.move_sort_key(descriptor, len(moveset), importance),
+                -index,
+                descriptor,
+                moveset,
+            )
+            if len(heap) < k:
+                heappush(heap, entry)
+            elif entry > heap[0]:
+                heapreplace(heap, entry)
+
+        return [(descriptor, moveset) for _, _, descriptor, moveset in sorted(heap, reverse=True)]
 
-        if len(possible_movesets) == 1 and possible_movesets[0][0] == "end":
-            return possible_movesets[0][1]
+    def _rank_by_value_model(
+        self, k: int, movesets: Generator[tuple[str, list[Card]], None, None], **game_state
+    ) -> list[tuple[str, list[Card]]]:
+        """
+        Ranks movesets with the value model, all movesets of the turn are scored at once
 
-        best_moves: list[Card] = (
-            []
-            if not possible_movesets
-            else min(
-                possible_movesets,
-                key=lambda moveset: self.move_sort_key(moveset[0], len(moveset[1])),
-            )[1]
+        :param k: Number of movesets to return
+        :param movesets: Movesets from _iter_movesets
+        :return: Same as rank_movesets
+        """
+        candidates: list[tuple[str, list[Card]]] = []
+        for descriptor, moveset in movesets:
+            if descriptor == "end":
+                return [(descriptor, moveset)]
+            candidates.append((descriptor, moveset))
+        if not candidates:
+            return []
+
+        scores: np.ndarray = self.value_model.score_movesets(  # type: ignore
+            self.hand, [moveset for _, moveset in candidates], **game_state
         )
-        return best_moves
+        return [candidates[index] for index in np.argsort(-scores, kind="stable")[:k]]
 
     @staticmethod
     def _get_move_descriptor(moveset: list[Card]) -> str:
@@ -323,53 +713,50 @@ class ComputerPlayer(HumanPlayer):
             for i, next_card in enumerate(cards):
                 yield from self._generate_permutations(moveset + [next_card], **params)
 
-    def _get_movesets(
+    def _iter_movesets(
         self, first_moves: list[Card], **game_params
-    ) -> list[tuple[str, list[Card]]]:
+    ) -> Generator[tuple[str, list[Card]], None, None]:
         """
-        Get the possible movesets based on the first moves and other optional arguments.
+        Generates the possible movesets based on the first moves and other optional arguments.
 
         :param first_moves: The list of first moves player can make
         :param **game_params: Optional keyword arguments passed to
                          _generate_permutations to simulate game_params
 
-        :return: The list of possible movesets, where each moveset is represented as a tuple
-            containing a descriptor string and a list of cards
-
+        :return: Generator of possible movesets, where each moveset is represented as a tuple
+            containing a descriptor string and a list of cards. Moveset that ends the game
+            for the player is described as "end" and no more movesets are generated after it.
         """
-        possible_movesets: list[tuple[str, list[Card]]] = []
         for first_move in first_moves:
             moves: list[Card] = [first_move]
-            for permutation in self._generate_permutations(moves, **game_params):
+            permutations = self._generate_permutations(moves, **game_params)
+            for permutation in islice(permutations, self.MAX_PERMUTATIONS):
                 if len(permutation) <= 4 and len(permutation) == len(self.hand):
-                    return [("end", permutation)]
+                    yield ("end", permutation)
+                    return
                 moveset = permutation
                 if len(moveset) == len(self.hand) and len(moveset) > 4:
                     moveset = permutation[: len(moveset) - 1]
                 descriptor: str = self._get_move_descriptor(moveset)
-                possible_movesets.append((descriptor, moveset))
+                yield (descriptor, moveset)
 
-        return possible_movesets
-
-    def move_sort_key(self, descriptor: str, moveset_len: int):
+    def _movesets_importance(self) -> dict[str, float]:
         """
-        Sorts the movesets based on their importance.
-
-        :param descriptor: The descriptor for the moveset.
-        :return: The importance of the moveset.
-                 The smaller it is the more importan move is
+        Returns importance of every moveset descriptor from player's weights adjusted
+        to the neighbours' hand sizes. The smaller it is the more important move is
         """
-        movesets_importance: dict[str, int] = {
-            "king_next_draw": 1,
-            "next_draw": 2,
-            "king_prev_draw": 3,
-            "value_req": 4,
-            "suit_req": 4,
-            "skip": 4,
-            "normal": 5,
+        weights: MoveWeights = self.weights
+        movesets_importance: dict[str, float] = {
+            "king_next_draw": weights.king_next_draw,
+            "next_draw": weights.next_draw,
+            "king_prev_draw": weights.king_prev_draw,
+            "value_req": weights.value_req,
+            "suit_req": weights.suit_req,
+            "skip": weights.skip,
+            "normal": weights.normal,
         }
 
-        if self.previous_len < self.next_len:
+        if self._kings_swapped(self.previous_len, self.next_len):
             (
                 movesets_importance["king_next_draw"],
                 movesets_importance["king_prev_draw"],
@@ -378,10 +765,23 @@ class ComputerPlayer(HumanPlayer):
                 movesets_importance["king_next_draw"],
             )
 
-        if self.previous_len <= len(self.hand):
-            movesets_importance["skip"] = movesets_importance["next_draw"]
+        if self.previous_len <= len(self.hand) + weights.skip_margin:
+            movesets_importance["skip"] = weights.urgent_skip
 
-        moveset_len = moveset_len if moveset_len > 1 else 0
-        movesets_importance[descriptor] -= moveset_len
+        return movesets_importance
 
-        return movesets_importance[descriptor]
+    def move_sort_key(
+        self, descriptor: str, moveset_len: int, importance: Optional[dict[str, float]] = None
+    ) -> float:
+        """
+        Sorts the movesets based on their importance.
+
+        :param descriptor: The descriptor for the moveset.
+        :param moveset_len: Number of cards in the moveset.
+        :param importance: Importance table from _movesets_importance, it's built if not given
+        :return: The importance of the moveset.
+                 The smaller it is the more importan move is
+        """
+        importance = importance if importance is not None else self._movesets_importance()
+        moveset_len = moveset_len if moveset_len > 1 else 0
+        return importance[descriptor] - self.weights.length_bonus * moveset_len
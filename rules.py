@@ -0,0 +1,272 @@
+from constants import SUITS, VALUES
+from card import Card
+from typing import Any, Generator, NamedTuple, Optional
+
+
+JACK_SELECTIONS: list[Optional[str]] = [*VALUES[3:9], None]
+ACE_SELECTIONS: list[Optional[str]] = list(SUITS)
+ATTACKING_KING_SUITS: list[str] = ["spades", "hearts"]
+
+
+class Move(NamedTuple):
+    """
+    Move made in one turn: cards played in order, empty if player draws,
+    and value or suit selected after a jack or an ace
+    """
+    cards: tuple[Card, ...]
+    selection: Optional[str] = None
+
+    @property
+    def is_draw(self) -> bool:
+        return not self.cards
+
+
+class Position(NamedTuple):
+    """
+    Immutable, hashable game position used by search.
+
+    hands: cards of every seat, seats are in the order of play
+    center: current center card
+    params: game parameters as sorted tuple of items, see freeze_params
+    seat: seat that moves next
+    skips: number of turns every seat still has to skip
+    stock: cards in the draw pile, the last card is drawn first
+    """
+    hands: tuple[tuple[Card, ...], ...]
+    center: Card
+    params: tuple[tuple[str, Any], ...]
+    seat: int
+    skips: tuple[int, ...]
+    stock: tuple[Card, ...] = ()
+
+    @property
+    def game_params(self) -> dict[str, Any]:
+        return dict(self.params)
+
+    def finished(self) -> Optional[int]:
+        """
+        Returns the seat that has no cards left or None
+        """
+        for seat, hand in enumerate(self.hands):
+            if not hand:
+                return seat
+        return None
+
+
+def freeze_params(game_params: dict[str, Any]) -> tuple[tuple[str, Any], ...]:
+    """
+    Converts game parameters to a hashable tuple, jack and ace flags are dropped
+    because selection is always made at the end of a turn
+    """
+    return tuple(sorted(
+        (key, value) for key, value in game_params.items() if key not in ["jack", "ace"]
+    ))
+
+
+def is_attacking_king(card: Card) -> bool:
+    return card.value == "king" and card.suit in ATTACKING_KING_SUITS
+
+
+def apply_effect(params: dict[str, Any], card: Card) -> dict[str, Any]:
+    """
+    Updates game parameters in place after card is played, mirrors card effects used by Game
+
+    :param params: Game parameters before the card was played
+    :param card: Played card
+    :return: Updated parameters
+    """
+    params.pop("suit", None)
+    if card.value in ["2", "3"]:
+        params["penalty"] = params.get("penalty", 0) + int(card.value)
+    elif card.value == "4":
+        params["skip"] = params.get("skip", 0) + 1
+    elif card.value == "jack":
+        params["jack"] = True
+    elif card.value == "ace":
+        params["ace"] = True
+    elif is_attacking_king(card):
+        params["king"] = True
+        params["penalty"] = params.get("penalty", 0) + 5
+    elif card.value == "king" and params.pop("king", None):
+        params.pop("penalty", None)
+    return params
+
+
+def can_follow(previous: Card, card: Card, params: dict[str, Any]) -> bool:
+    """
+    Checks if card can be played on previous card in the same turn,
+    only one jack or ace can be played in a turn
+
+    :param params: Game parameters after previous card was played
+    """
+    if ("jack" in params or "ace" in params) and card.value in ["jack", "ace"]:
+        return False
+    return previous.can_play(card, **params)
+
+
+def turn_sequences(
+    hand: tuple[Card, ...], center: Card, params: dict[str, Any]
+) -> Generator[tuple[Card, ...], None, None]:
+    """
+    Generates every sequence of cards that can be played in one turn, including
+    sequences that stop early. Attacking kings end the turn, and a sequence that
+    plays the whole hand can't be longer than 4 cards.
+
+    :param hand: Cards of the player
+    :param center: Current center card
+    :param params: Game parameters at the start of the turn
+    :return: Generator of card sequences
+    """
+    def extend(
+        sequence: tuple[Card, ...], previous: Card, current_params: dict[str, Any]
+    ) -> Generator[tuple[Card, ...], None, None]:
+        for card in hand:
+            if card in sequence or not can_follow(previous, card, current_params):
+                continue
+            next_sequence: tuple[Card, ...] = sequence + (card,)
+            if len(next_sequence) == len(hand) and len(next_sequence) > 4:
+                continue
+            yield next_sequence
+            if not is_attacking_king(card):
+                yield from extend(next_sequence, card, apply_effect(dict(current_params), card))
+
+    yield from extend((), center, dict(params))
+
+
+def is_legal_sequence(
+    hand: list[Card], cards: list[Card], center: Card, params: dict[str, Any]
+) -> bool:
+    """
+    Checks if cards can be played in one turn in given order, follows the same rules
+    as turn_sequences without generating every sequence
+
+    :param hand: Cards of the player
+    :param cards: Cards to play, empty list means drawing and is always legal
+    :param center: Current center card
+    :param params: Game parameters at the start of the turn
+    """
+    if len(set(cards)) != len(cards) or any(card not in hand for card in cards):
+        return False
+    if len(cards) == len(hand) and len(cards) > 4:
+        return False
+    previous: Card = center
+    current_params: dict[str, Any] = dict(params)
+    for index, card in enumerate(cards):
+        if index and is_attacking_king(previous):
+            return False
+        if not can_follow(previous, card, current_params):
+            return False
+        current_params = apply_effect(current_params, card)
+        previous = card
+    return True
+
+
+def iter_moves(position: Position) -> Generator[Move, None, None]:
+    """
+    Generates all moves of the seat to move, drawing is always allowed and is the last move
+    """
+    hand: tuple[Card, ...] = position.hands[position.seat]
+    for sequence in turn_sequences(hand, position.center, position.game_params):
+        values: list[str] = [card.value for card in sequence]
+        if "jack" in values:
+            yield from (Move(sequence, selection) for selection in JACK_SELECTIONS)
+        elif "ace" in values:
+            yield from (Move(sequence, selection) for selection in ACE_SELECTIONS)
+        else:
+            yield Move(sequence)
+    yield Move(())
+
+
+def legal_moves(position: Position) -> list[Move]:
+    return list(iter_moves(position))
+
+
+def _step(hands: list[list[Card]], seat: int, backwards: bool = False) -> int:
+    """
+    Returns the next seat that still has cards
+    """
+    step: int = -1 if backwards else 1
+    next_seat: int = (seat + step) % len(hands)
+    while not hands[next_seat] and next_seat != seat:
+        next_seat = (next_seat + step) % len(hands)
+    return next_seat
+
+
+def end_turn(params: dict[str, Any]) -> None:
+    """
+    Decreases turns left of the requested value, same as Game._update_val_req_param
+    """
+    req: Optional[tuple[str, int]] = params.get("value", None)
+    if req:
+        if req[1] - 1:
+            params["value"] = (req[0], req[1] - 1)
+        else:
+            params.pop("value")
+
+
+def _draw(hand: list[Card], stock: list[Card], number: int) -> None:
+    while number and stock:
+        hand.append(stock.pop())
+        number -= 1
+
+
+def apply_move(position: Position, move: Move) -> Position:
+    """
+    Returns position after the seat to move makes given move.
+    Played spades king sends the turn to the previous seat and makes its player skip once,
+    turns of seats that have to skip are resolved before the position is returned.
+
+    :param position: Current position
+    :param move: One of legal_moves(position)
+    :return: New position
+    """
+    seat: int = position.seat
+    hands: list[list[Card]] = [list(hand) for hand in position.hands]
+    skips: list[int] = list(position.skips)
+    stock: list[Card] = list(position.stock)
+    params: dict[str, Any] = position.game_params
+    center: Card = position.center
+    backwards: bool = False
+
+    if move.cards:
+        for card in move.cards:
+            hands[seat].remove(card)
+            params = apply_effect(params, card)
+        center = move.cards[-1]
+        if is_attacking_king(center) and center.suit == "spades":
+            backwards = True
+            skips[seat] += 1
+    elif params.get("penalty", 0):
+        _draw(hands[seat], stock, params.pop("penalty"))
+        params.pop("king", None)
+    elif params.get("skip", 0):
+        skips[seat] += params.pop("skip") - 1
+    else:
+        _draw(hands[seat], stock, 1)
+
+    end_turn(params)
+    if params.pop("jack", None):
+        params.pop("value", None)
+        if move.selection:
+            params["value"] = (move.selection, 4)
+    if params.pop("ace", None):
+        params["suit"] = (move.selection, 1)
+
+    seat = _step(hands, seat, backwards)
+    if hands[position.seat]:
+        while skips[seat]:
+            skips[seat] -= 1
+            if params.get("king", None):
+                _draw(hands[seat], stock, params.pop("penalty", 0))
+                params.pop("king")
+            end_turn(params)
+            seat = _step(hands, seat)
+
+    return Position(
+        tuple(tuple(hand) for hand in hands),
+        center,
+        freeze_params(params),
+        seat,
+        tuple(skips),
+        tuple(stock),
+    )
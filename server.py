@@ -0,0 +1,346 @@
+from deck import CARD_INDEX, CARD_TABLE, Deck
+from engine import GameEngine
+from players import ComputerPlayer, HumanPlayer, RemotePlayer
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
+import argparse
+import asyncio
+import json
+
+
+ACTIONS: list[str] = ["play", "draw", "penalty", "next", "makao", "makao_out", "stop_makao"]
+
+
+class ProtocolError(ValueError):
+    def __init__(self, message: str = "Message is not a valid action") -> None:
+        super().__init__(message)
+
+
+class TableFull(ProtocolError):
+    def __init__(self, table: str, message: str = "Every seat at the table is taken") -> None:
+        super().__init__(f"{message}: {table}")
+
+
+class Table:
+    def __init__(
+        self,
+        name: str,
+        seats: int,
+        computers: int = 0,
+        computer_player: Callable[[], ComputerPlayer] = ComputerPlayer,
+        deck: Optional[Deck] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        """
+        One game hosted by the server. Remote players take the first seats in order
+        in which they join, computer players take the rest. Actions are applied with
+        the same GameEngine methods as the buttons of the window.
+
+        :param name: Name the table is joined with
+        :param seats: Number of players, from 2 to 4
+        :param computers: Number of computer players, at least one seat has to be left
+        :param computer_player: Class or factory of computer players
+        :param deck: Deck cards are dealt from, new shuffled deck is used if not given
+        :param executor: Single worker thread the game is played in, see run,
+            tables of one server share it
+        """
+        if not 0 <= computers < seats:
+            raise ProtocolError("At least one seat has to be left for remote players")
+        self._name: str = name
+        self._remote: list[RemotePlayer] = [RemotePlayer() for _ in range(seats - computers)]
+        players: list[HumanPlayer] = [*self._remote, *(computer_player() for _ in range(computers))]
+        self._game: GameEngine = GameEngine(seats, deck=deck, players=players, log=None, undo_steps=0)
+        self._writers: list[Optional[asyncio.StreamWriter]] = [None] * len(self._remote)
+        self._executor: ThreadPoolExecutor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="makao-table"
+        )
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def game(self) -> GameEngine:
+        return self._game
+
+    @property
+    def full(self) -> bool:
+        return all(self._writers)
+
+    @property
+    def empty(self) -> bool:
+        return not any(self._writers)
+
+    @property
+    def over(self) -> bool:
+        return len(self.game.finished) >= len(self.game.players) - 1
+
+    def join(self, writer: asyncio.StreamWriter) -> int:
+        """
+        :return: Seat of the joined player
+        :raises TableFull: If every remote seat is taken
+        """
+        if self.full:
+            raise TableFull(self.name)
+        seat: int = self._writers.index(None)
+        self._writers[seat] = writer
+        return seat
+
+    def leave(self, seat: int) -> None:
+        self._writers[seat] = None
+
+    def act(self, seat: int, message: dict[str, Any]) -> None:
+        """
+        Applies action of the remote player
+
+        :param seat: Seat of the player
+        :param message: Action, op is one of ACTIONS, play needs card index in CARD_TABLE,
+            next may have selection, a value or a suit requested after a jack or an ace
+        :raises ProtocolError: If the action isn't valid or it's not player's turn
+        """
+        game: GameEngine = self.game
+        op: Any = message.get("op", None)
+        if op not in ACTIONS:
+            raise ProtocolError
+        if not self.full or self.over:
+            raise ProtocolError("Game is not in progress")
+        if seat != game.current_player_index:
+            raise ProtocolError("It's not your turn")
+
+        player: RemotePlayer = self._remote[seat]
+        if op == "play":
+            card_index: Any = message.get("card", None)
+            if not isinstance(card_index, int) or not 0 <= card_index < len(CARD_TABLE):
+                raise ProtocolError("Card must be an index in the card table")
+            card = CARD_TABLE[card_index]
+            if card not in player.hand:
+                raise ProtocolError("Card is not in your hand")
+            game.played_card = card
+            game._play_card(card, player)
+            if card in player.hand:
+                raise ProtocolError("Card can't be played")
+        elif op == "draw":
+            game._take_cards(player)
+        elif op == "penalty":
+            game._draw_penalty(player)
+        elif op == "next":
+            player.pending_selection = message.get("selection", None)
+            game._next_turn()
+        elif op == "makao":
+            game._makao(player)
+        elif op == "makao_out":
+            game._makao_out(player)
+        else:
+            game._stop_makao(player)
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Calls function in the worker thread, so that the event loop keeps serving
+        other clients while a computer player searches. Every change of the game
+        is made in the worker.
+
+        :return: Result of the function, its exceptions are raised here
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _advance_turn(self) -> bool:
+        """
+        Plays one turn of a computer player or one skipped turn
+
+        :return: False if a remote player has to act or the game is over
+        """
+        game: GameEngine = self.game
+        if not self.full or self.over:
+            return False
+        player: Union[HumanPlayer, ComputerPlayer] = game.get_current_player()
+        previous: Union[HumanPlayer, ComputerPlayer] = game._get_previous_player(player)
+        if isinstance(player, ComputerPlayer):
+            game._play_turn()
+        elif not previous.hand:
+            game._stop_makao(player)
+            if not previous.hand and previous not in game.finished:
+                game._player_finish(previous)
+        elif player in game.finished:
+            game._change_current_player()
+        elif player.skip_turns:
+            game._skip_turn(player)
+        else:
+            return False
+        return True
+
+    async def advance(self) -> None:
+        """
+        Plays turns of computer players and skipped turns until a remote player has to act.
+        Every turn is played in the worker thread and other tables' work is queued
+        between turns, so long searches of one table don't stop the event loop
+        and don't make other tables wait for the whole round.
+        A remote player whose previous player has emptied its hand stops makao at once,
+        the same way computer players do.
+        """
+        while await self.run(self._advance_turn):
+            pass
+
+    def state(self, seat: int) -> dict[str, Any]:
+        """
+        Returns game state as seen by the player at given seat
+        """
+        game: GameEngine = self.game
+        return {
+            "type": "over" if self.over else "state",
+            "seat": seat,
+            "current": game.current_player_index,
+            "center": CARD_INDEX[game.center_card],
+            "hand": [CARD_INDEX[card] for card in game.players[seat].hand],
+            "hand_lens": [len(player.hand) for player in game.players],
+            "params": game.game_params,
+            "stock": len(game.deck),
+            "finished": [game.players.index(player) for player in game.finished],
+        }
+
+    def _states(self) -> list[Optional[dict[str, Any]]]:
+        return [self.state(seat) if writer is not None else None for seat, writer in enumerate(self._writers)]
+
+    async def broadcast(self) -> None:
+        """
+        Sends state to every player at the table, states are made in the worker thread
+        so that they don't see a turn that is being played
+        """
+        states: list[Optional[dict[str, Any]]] = await self.run(self._states)
+        for writer, state in zip(self._writers, states):
+            if writer is not None and state is not None:
+                send(writer, state)
+
+
+def send(writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+
+class GameServer:
+    def __init__(self, computer_player: Callable[[], ComputerPlayer] = ComputerPlayer) -> None:
+        """
+        Hosts many tables in one process, clients connect over TCP or Unix sockets
+        and exchange JSON objects, one per line. The first message joins a table:
+        {"op": "join", "table": name, "seats": 2, "computers": 0}, seats and computers
+        are only used when the table is created. Every next message is an action, see
+        Table.act. After every action all players at the table get their state,
+        errors are sent only to the player that caused them. Games of all tables are
+        played in one worker thread, see Table.run.
+
+        :param computer_player: Class or factory of computer players
+        """
+        self._computer_player: Callable[[], ComputerPlayer] = computer_player
+        self._tables: dict[str, Table] = {}
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="makao-tables")
+
+    @property
+    def tables(self) -> dict[str, Table]:
+        return self._tables
+
+    def _join(self, message: dict[str, Any], writer: asyncio.StreamWriter) -> tuple[Table, int]:
+        if message.get("op", None) != "join" or not isinstance(message.get("table", None), str):
+            raise ProtocolError("The first message has to join a table")
+        table: Optional[Table] = self._tables.get(message["table"], None)
+        if table is None:
+            seats: Any = message.get("seats", 2)
+            computers: Any = message.get("computers", 0)
+            if not isinstance(seats, int) or not isinstance(computers, int) or not 2 <= seats <= 4:
+                raise ProtocolError("Table must have from 2 to 4 seats")
+            table = Table(message["table"], seats, computers, self._computer_player, executor=self._executor)
+            self._tables[table.name] = table
+        return table, table.join(writer)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        table: Optional[Table] = None
+        seat: int = 0
+        try:
+            async for line in reader:
+                try:
+                    message: Any = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ProtocolError
+                    if table is None:
+                        table, seat = self._join(message, writer)
+                        send(writer, {"type": "joined", "table": table.name, "seat": seat})
+                    else:
+                        await table.run(table.act, seat, message)
+                except ValueError as error:
+                    send(writer, {"type": "error", "message": str(error)})
+                    continue
+                if table.full:
+                    await table.advance()
+                    await table.broadcast()
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if table is not None:
+                table.leave(seat)
+                if table.empty and self._tables.get(table.name, None) is table:
+                    del self._tables[table.name]
+            writer.close()
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """
+        Starts listening on TCP socket, port 0 picks a free port
+        """
+        return await asyncio.start_server(self._serve_client, host, port)
+
+    async def serve_unix(self, path: str) -> asyncio.Server:
+        return await asyncio.start_unix_server(self._serve_client, path)
+
+
+class GameClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Client side of the server protocol, see GameServer
+        """
+        self._reader: asyncio.StreamReader = reader
+        self._writer: asyncio.StreamWriter = writer
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int) -> "GameClient":
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> "GameClient":
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def send(self, op: str, **fields: Any) -> None:
+        send(self._writer, {"op": op, **fields})
+        await self._writer.drain()
+
+    async def receive(self) -> dict[str, Any]:
+        """
+        :raises ConnectionError: If the server has closed the connection
+        """
+        line: bytes = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Server has closed the connection")
+        return json.loads(line)
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def serve(host: str, port: int, unix: Optional[str], computer_player: Callable[[], ComputerPlayer]) -> None:
+    game_server: GameServer = GameServer(computer_player)
+    server: asyncio.Server = await (
+        game_server.serve_unix(unix) if unix else game_server.serve_tcp(host, port)
+    )
+    print("Listening on", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Makao tables for remote players")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Path of Unix socket used instead of TCP")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.unix, ComputerPlayer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+from card import Card
+from constants import SUITS, VALUES
+from deals import DealBlock
+from engine import GameEngine
+from players import ComputerPlayer
+from time import perf_counter
+from typing import Optional
+import argparse
+import numpy as np
+
+
+CARDS: int = len(VALUES) * len(SUITS)
+HAND_SIZE: int = 5
+
+VALUE_OF: np.ndarray = np.arange(CARDS) // len(SUITS)
+SUIT_OF: np.ndarray = np.arange(CARDS) % len(SUITS)
+
+FOUR: int = VALUES.index("4")
+JACK: int = VALUES.index("jack")
+QUEEN: int = VALUES.index("queen")
+KING: int = VALUES.index("king")
+ACE: int = VALUES.index("ace")
+JACK_VALUES: np.ndarray = np.arange(VALUES.index("5"), VALUES.index("10") + 1)
+ATTACKING_KINGS: np.ndarray = (VALUE_OF == KING) & np.isin(
+    SUIT_OF, [SUITS.index("spades"), SUITS.index("hearts")]
+)
+SPADES_KING: int = KING * len(SUITS) + SUITS.index("spades")
+
+# penalty added by every card, kings are resolved separately
+PENALTY_OF: np.ndarray = np.where(VALUE_OF < FOUR, VALUE_OF + 2, 0) + np.where(ATTACKING_KINGS, 5, 0)
+
+# compatible[center, card], same value or suit
+COMPATIBLE: np.ndarray = (VALUE_OF[:, None] == VALUE_OF[None, :]) | (SUIT_OF[:, None] == SUIT_OF[None, :])
+
+
+def card_index(value: str, suit: str) -> int:
+    """
+    Returns index of card used by BatchSimulator, cards are ordered by value and then by suit
+    """
+    return VALUES.index(value) * len(SUITS) + SUITS.index(suit)
+
+
+def default_policy() -> np.ndarray:
+    """
+    Returns table of card scores used when no table is given to BatchSimulator.
+    Row 0 is used normally and row 1 when the next player has at most two cards,
+    then attacking cards are preferred.
+    """
+    scores: np.ndarray = np.full((2, CARDS), 5.0)
+    for row in scores:
+        row[VALUE_OF < FOUR] = 2
+        row[VALUE_OF == FOUR] = 3
+        row[(VALUE_OF == JACK) | (VALUE_OF == ACE)] = 2
+        row[VALUE_OF == QUEEN] = 1
+        row[ATTACKING_KINGS] = 2
+    scores[1, VALUE_OF < FOUR] = 7
+    scores[1, ATTACKING_KINGS] = 7
+    scores[1, VALUE_OF == FOUR] = 6
+    return scores
+
+
+class BatchSimulator:
+    def __init__(
+        self,
+        games: int,
+        players: int = 4,
+        policy: Optional[np.ndarray] = None,
+        seed: Optional[int] = None,
+        max_turns: int = 2000,
+        deals: Optional[DealBlock] = None,
+    ) -> None:
+        """
+        Plays many games of Makao at once, every game is stored as rows of NumPy arrays
+        and every call of step plays one turn in all unfinished games.
+        Rules follow rules.apply_move. Every player uses the same table-driven policy:
+        one card with the highest score in the table is played, or a card is drawn
+        if no card can be played.
+
+        :param games: Number of games
+        :param players: Number of players in every game
+        :param policy: Table of card scores with shape (2, 52), see default_policy
+        :param seed: Seed of the random generator used to shuffle and break ties
+        :param max_turns: Games that are not finished after this number of turns are stopped
+        :param deals: Deck orders games start from, the first rows are used. Games are dealt
+            the same hands as GameEngine created with a deck from the same row
+        """
+        self._games: int = games
+        self._players: int = players
+        self._policy: np.ndarray = default_policy() if policy is None else np.asarray(policy, dtype=float)
+        self._random: np.random.Generator = np.random.default_rng(seed)
+        self._max_turns: int = max_turns
+        self._rows: np.ndarray = np.arange(games)
+
+        self._stock: np.ndarray = (
+            np.argsort(self._random.random((games, CARDS)), axis=1)
+            if deals is None
+            else deals.orders[:games].astype(np.int64)
+        )
+        self._stock_len: np.ndarray = np.full(games, CARDS)
+        self._discard: np.ndarray = np.zeros((games, CARDS), dtype=np.int64)
+        self._discard_len: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._hands: np.ndarray = np.zeros((games, players, CARDS), dtype=bool)
+        self._hand_len: np.ndarray = np.zeros((games, players), dtype=np.int64)
+
+        self._penalty: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._skip: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._king: np.ndarray = np.zeros(games, dtype=bool)
+        self._req_value: np.ndarray = np.full(games, -1)
+        self._req_value_turns: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._req_suit: np.ndarray = np.full(games, -1)
+        self._skips: np.ndarray = np.zeros((games, players), dtype=np.int64)
+        self._seat: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._places: np.ndarray = np.full((games, players), -1)
+        self._finished: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._turns: np.ndarray = np.zeros(games, dtype=np.int64)
+        self._done: np.ndarray = np.zeros(games, dtype=bool)
+
+        for _ in range(HAND_SIZE):
+            for seat in range(players):
+                self._draw(self._rows, np.full(games, seat), np.ones(games, dtype=np.int64))
+        self._stock_len -= 1
+        self._center: np.ndarray = self._stock[self._rows, self._stock_len]
+
+    @property
+    def games(self) -> int:
+        return self._games
+
+    @property
+    def players(self) -> int:
+        return self._players
+
+    @property
+    def hands(self) -> np.ndarray:
+        """
+        Returns boolean array with shape (games, players, 52), True if the player holds the card
+        """
+        return self._hands
+
+    @property
+    def center(self) -> np.ndarray:
+        return self._center
+
+    @property
+    def turns(self) -> np.ndarray:
+        return self._turns
+
+    @property
+    def done(self) -> np.ndarray:
+        return self._done
+
+    @property
+    def places(self) -> np.ndarray:
+        """
+        Returns array with shape (games, players) with the place every player finished on,
+        counted from 0, or -1 if the game was stopped before the player finished
+        """
+        return self._places
+
+    @property
+    def winners(self) -> np.ndarray:
+        """
+        Returns seat that finished first in every game, -1 if no player finished
+        """
+        return np.where(self._finished > 0, np.argmax(self._places == 0, axis=1), -1)
+
+    def card_counts(self) -> np.ndarray:
+        """
+        Returns number of cards in hands, piles and center of every game, always 52
+        """
+        return self._hand_len.sum(axis=1) + self._stock_len + self._discard_len + 1
+
+    def legal_cards(self, games: np.ndarray) -> np.ndarray:
+        """
+        Returns boolean array with shape (len(games), 52), True for cards that can be played
+        on the center card by any player, mirrors Card.can_play
+
+        :param games: Indices of games
+        """
+        center: np.ndarray = self._center[games]
+        compatible: np.ndarray = COMPATIBLE[center]
+        req_value: np.ndarray = self._req_value[games][:, None]
+        req_suit: np.ndarray = self._req_suit[games][:, None]
+        penalty: np.ndarray = self._penalty[games][:, None]
+        king: np.ndarray = self._king[games][:, None]
+        queen: np.ndarray = (VALUE_OF[center] == QUEEN)[:, None] | (VALUE_OF == QUEEN)[None, :]
+        return np.select(
+            [
+                self._skip[games][:, None] > 0,
+                req_value >= 0,
+                req_suit >= 0,
+                (penalty > 0) & ~king,
+                king,
+                queen,
+            ],
+            [
+                np.broadcast_to(VALUE_OF == FOUR, compatible.shape),
+                (VALUE_OF[None, :] == req_value) | (VALUE_OF == JACK)[None, :],
+                (SUIT_OF[None, :] == req_suit) | (VALUE_OF == ACE)[None, :],
+                compatible & (VALUE_OF < FOUR)[None, :],
+                np.broadcast_to(VALUE_OF == KING, compatible.shape),
+                np.ones_like(compatible),
+            ],
+            compatible,
+        )
+
+    def _reshuffle(self, games: np.ndarray) -> None:
+        """
+        Moves shuffled discard pile to the empty draw pile
+        """
+        keys: np.ndarray = self._random.random((len(games), CARDS))
+        keys[np.arange(CARDS)[None, :] >= self._discard_len[games][:, None]] = np.inf
+        order: np.ndarray = np.argsort(keys, axis=1)
+        self._stock[games] = np.take_along_axis(self._discard[games], order, axis=1)
+        self._stock_len[games] = self._discard_len[games]
+        self._discard_len[games] = 0
+
+    def _draw(self, games: np.ndarray, seats: np.ndarray, numbers: np.ndarray) -> None:
+        """
+        Draws cards for one player in every given game, draws less cards if both piles are empty
+
+        :param games: Indices of games
+        :param seats: Seat that draws in every game
+        :param numbers: Number of cards drawn in every game
+        """
+        numbers = numbers.copy()
+        while True:
+            drawing: np.ndarray = numbers > 0
+            if not drawing.any():
+                return
+            games, seats, numbers = games[drawing], seats[drawing], numbers[drawing]
+            empty: np.ndarray = self._stock_len[games] == 0
+            if empty.any():
+                self._reshuffle(games[empty])
+            can_draw: np.ndarray = self._stock_len[games] > 0
+            games, seats, numbers = games[can_draw], seats[can_draw], numbers[can_draw]
+            self._stock_len[games] -= 1
+            cards: np.ndarray = self._stock[games, self._stock_len[games]]
+            self._hands[games, seats, cards] = True
+            self._hand_len[games, seats] += 1
+            numbers -= 1
+
+    def _step_seats(self, games: np.ndarray, seats: np.ndarray, backwards: np.ndarray) -> np.ndarray:
+        """
+        Returns the next seat that still has cards in every given game
+        """
+        step: np.ndarray = np.where(backwards, -1, 1)
+        next_seats: np.ndarray = (seats + step) % self._players
+        for _ in range(self._players - 1):
+            empty: np.ndarray = self._hand_len[games, next_seats] == 0
+            if not empty.any():
+                break
+            next_seats = np.where(empty, (next_seats + step) % self._players, next_seats)
+        return next_seats
+
+    def _end_turn(self, games: np.ndarray) -> None:
+        requested: np.ndarray = games[self._req_value[games] >= 0]
+        self._req_value_turns[requested] -= 1
+        self._req_value[requested[self._req_value_turns[requested] == 0]] = -1
+
+    def _choose_cards(self, games: np.ndarray, seats: np.ndarray) -> np.ndarray:
+        """
+        Returns card played in every given game according to the policy, -1 if player draws
+        """
+        next_seats: np.ndarray = self._step_seats(games, seats, np.zeros(len(games), dtype=bool))
+        threat: np.ndarray = (self._hand_len[games, next_seats] <= 2).astype(np.int64)
+        legal: np.ndarray = self.legal_cards(games) & self._hands[games, seats]
+        scores: np.ndarray = self._policy[threat] + self._random.random(legal.shape) * 0.5
+        scores[~legal] = -np.inf
+        cards: np.ndarray = np.argmax(scores, axis=1)
+        return np.where(legal.any(axis=1), cards, -1)
+
+    def _select(self, games: np.ndarray, seats: np.ndarray, cards: np.ndarray) -> None:
+        """
+        Sets value requested after a jack and suit requested after an ace, player selects
+        value or suit of which it holds the most cards
+        """
+        hands: np.ndarray = self._hands[games, seats].reshape(len(games), len(VALUES), len(SUITS))
+        jacks: np.ndarray = VALUE_OF[cards] == JACK
+        if jacks.any():
+            value_counts: np.ndarray = hands[jacks][:, JACK_VALUES].sum(axis=2)
+            values: np.ndarray = JACK_VALUES[np.argmax(value_counts, axis=1)]
+            values[value_counts.max(axis=1) == 0] = -1
+            self._req_value[games[jacks]] = values
+            self._req_value_turns[games[jacks]] = 4
+        aces: np.ndarray = VALUE_OF[cards] == ACE
+        if aces.any():
+            self._req_suit[games[aces]] = np.argmax(hands[aces].sum(axis=1), axis=1)
+
+    def step(self) -> None:
+        """
+        Plays one turn in every unfinished game
+        """
+        games: np.ndarray = self._rows[~self._done]
+        if not len(games):
+            return
+        seats: np.ndarray = self._seat[games]
+        cards: np.ndarray = self._choose_cards(games, seats)
+        played: np.ndarray = cards >= 0
+
+        play_games, play_seats, play_cards = games[played], seats[played], cards[played]
+        self._hands[play_games, play_seats, play_cards] = False
+        self._hand_len[play_games, play_seats] -= 1
+        self._discard[play_games, self._discard_len[play_games]] = self._center[play_games]
+        self._discard_len[play_games] += 1
+        self._center[play_games] = play_cards
+        self._req_suit[play_games] = -1
+        self._penalty[play_games] += PENALTY_OF[play_cards]
+        self._skip[play_games] += VALUE_OF[play_cards] == FOUR
+        blocking: np.ndarray = (VALUE_OF[play_cards] == KING) & ~ATTACKING_KINGS[play_cards] & self._king[play_games]
+        self._penalty[play_games[blocking]] = 0
+        self._king[play_games] = np.where(blocking, False, self._king[play_games] | ATTACKING_KINGS[play_cards])
+        backwards: np.ndarray = cards == SPADES_KING
+        self._skips[games[backwards], seats[backwards]] += 1
+
+        draw_games, draw_seats = games[~played], seats[~played]
+        penalty: np.ndarray = self._penalty[draw_games]
+        skip: np.ndarray = self._skip[draw_games]
+        self._draw(draw_games, draw_seats, np.where(penalty > 0, penalty, np.where(skip > 0, 0, 1)))
+        self._penalty[draw_games] = 0
+        self._king[draw_games] = False
+        skipping: np.ndarray = (penalty == 0) & (skip > 0)
+        self._skips[draw_games[skipping], draw_seats[skipping]] += skip[skipping] - 1
+        self._skip[draw_games[skipping]] = 0
+
+        self._end_turn(games)
+        self._select(play_games, play_seats, play_cards)
+
+        emptied: np.ndarray = played & (self._hand_len[games, seats] == 0)
+        self._places[games[emptied], seats[emptied]] = self._finished[games[emptied]]
+        self._finished[games[emptied]] += 1
+
+        seats = self._step_seats(games, seats, backwards)
+        while True:
+            skipped: np.ndarray = self._skips[games, seats] > 0
+            if not skipped.any():
+                break
+            skip_games, skip_seats = games[skipped], seats[skipped]
+            self._skips[skip_games, skip_seats] -= 1
+            king: np.ndarray = self._king[skip_games]
+            self._draw(skip_games, skip_seats, np.where(king, self._penalty[skip_games], 0))
+            self._penalty[skip_games[king]] = 0
+            self._king[skip_games] = False
+            self._end_turn(skip_games)
+            seats[skipped] = self._step_seats(skip_games, skip_seats, np.zeros(len(skip_games), dtype=bool))
+        self._seat[games] = seats
+
+        self._turns[games] += 1
+        holding: np.ndarray = self._hand_len[games] > 0
+        over: np.ndarray = holding.sum(axis=1) <= 1
+        last_games, last_seats = games[over], np.argmax(holding[over], axis=1)
+        self._places[last_games, last_seats] = self._finished[last_games]
+        self._done[games] = over | (self._turns[games] >= self._max_turns)
+
+    def run(self) -> np.ndarray:
+        """
+        Plays all games until they are finished
+
+        :return: Winners of games, see winners
+        """
+        while not self._done.all():
+            self.step()
+        return self.winners
+
+
+class PolicyPlayer(ComputerPlayer):
+    def __init__(self, policy: Optional[np.ndarray] = None, seed: Optional[int] = None) -> None:
+        """
+        Computer player that moves like players of BatchSimulator: it plays one card
+        with the highest score in the policy table or draws, and after a jack or an ace
+        selects value or suit of which it holds the most cards. Moves aren't searched
+        or cached, so GameEngine played by these players can be compared with BatchSimulator.
+
+        :param policy: Table of card scores with shape (2, 52), see default_policy
+        :param seed: Seed of the random generator used to break ties
+        """
+        super().__init__()
+        self.endgame = None
+        self._policy: np.ndarray = default_policy() if policy is None else np.asarray(policy, dtype=float)
+        self._random: np.random.Generator = np.random.default_rng(seed)
+
+    def player_info(self, human_computer: str = "Policy player") -> tuple:
+        return super().player_info(human_computer)
+
+    def find_best_plays(self, **game_state) -> list[Card]:
+        """
+        Chooses card to play with the policy table, see BatchSimulator._choose_cards
+
+        :key next_len: Length of the next player's deck
+        :return: Card to play or no cards if the player draws
+        """
+        legal: list[Card] = self._get_possible_moves(**game_state)
+        if not legal:
+            return []
+        threat: int = int(game_state.get("next_len", HAND_SIZE) <= 2)
+        scores: np.ndarray = self._policy[threat, [card_index(card.value, card.suit) for card in legal]]
+        scores = scores + self._random.random(len(legal)) * 0.5
+        card: Card = legal[int(np.argmax(scores))]
+        self._planned_selection = self._policy_selection(card)
+        return [card]
+
+    def _policy_selection(self, card: Card) -> Optional[str]:
+        """
+        Returns value or suit selected after the card, see BatchSimulator._select
+        """
+        hand: list[Card] = [held for held in self.hand if held != card]
+        if card.value == "jack":
+            counts: list[int] = [sum(held.value == value for held in hand) for value in VALUES[3:9]]
+            return VALUES[3 + counts.index(max(counts))] if max(counts) else "None"
+        if card.value == "ace":
+            counts = [sum(held.suit == suit for held in hand) for suit in SUITS]
+            return SUITS[counts.index(max(counts))]
+        return None
+
+
+def scalar_games_per_second(games: int, players: int = 4, max_turns: int = 2000) -> float:
+    """
+    Returns number of headless GameEngine instances played per second by PolicyPlayer,
+    so that both simulators play with the same policy and only the engines are compared
+    """
+    start: float = perf_counter()
+    for _ in range(games):
+        game: GameEngine = GameEngine(players, PolicyPlayer, log=None, undo_steps=0)
+        game.play_headless(max_turns)
+    return games / (perf_counter() - start)
+
+
+def batch_games_per_second(games: int, players: int = 4, seed: Optional[int] = None) -> float:
+    """
+    Returns number of games played per second by BatchSimulator
+    """
+    start: float = perf_counter()
+    BatchSimulator(games, players, seed=seed).run()
+    return games / (perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and scalar simulation throughput")
+    parser.add_argument("--games", type=int, default=10000, help="Number of batched games")
+    parser.add_argument("--scalar-games", type=int, default=10, help="Number of scalar games")
+    parser.add_argument("--players", type=int, default=4, help="Number of players in every game")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the batched simulator")
+    args = parser.parse_args()
+
+    batch: float = batch_games_per_second(args.games, args.players, args.seed)
+    print(f"Batched simulator: {batch:.1f} games/sec")
+    scalar: float = scalar_games_per_second(args.scalar_games, args.players)
+    print(f"Scalar engine: {scalar:.2f} games/sec")
+    print(f"Speedup: {batch / scalar:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
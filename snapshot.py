@@ -0,0 +1,212 @@
+from card import Card
+from constants import SUITS, VALUES
+from deck import CARD_INDEX, CARD_TABLE
+from history import GameJournal
+from zobrist import ZobristHash
+from typing import TYPE_CHECKING, Any, Optional
+import os
+import struct
+
+if TYPE_CHECKING:
+    from game import Game
+
+
+SNAPSHOT_MAGIC: bytes = b"MKS"
+SNAPSHOT_VERSION: int = 2
+NONE_BYTE: int = 255
+
+# magic, version, number of players, current player, played card
+HEADER: struct.Struct = struct.Struct("<3sBBBB")
+# penalty, skip, king/jack/ace flags, requested value and its turns, requested suit and its turns
+PARAMS: struct.Struct = struct.Struct("<BBBBBBB")
+# makao/drew card/drew penalty/penalty/played king/finished flags, cards played, turns to skip
+PLAYER: struct.Struct = struct.Struct("<BBB")
+
+PARAM_FLAGS: list[str] = ["king", "jack", "ace"]
+PLAYER_FLAGS: list[str] = [
+    "_makao_status",
+    "_drew_card",
+    "_drew_penalty",
+    "_penalty",
+    "_played_king",
+    "_finished",
+]
+
+
+class SnapshotError(ValueError):
+    def __init__(
+        self,
+        message: str = "Snapshot is damaged or doesn't match the game",
+    ) -> None:
+        super().__init__(message)
+
+
+def _pack_cards(cards: list[Card]) -> bytes:
+    """
+    Packs length of the list and indices of cards in CARD_TABLE, one byte each
+    """
+    return bytes([len(cards), *(CARD_INDEX[card] for card in cards)])
+
+
+def _unpack_cards(data: bytes, offset: int) -> tuple[list[Card], int]:
+    """
+    :return: Unpacked cards and offset of the first byte after them
+    """
+    end: int = offset + 1 + data[offset]
+    if end > len(data):
+        raise SnapshotError
+    return [CARD_TABLE[index] for index in data[offset + 1:end]], end
+
+
+def _pack_flags(values: list[Any]) -> int:
+    return sum(1 << bit for bit, value in enumerate(values) if value)
+
+
+def _pack_request(request: Optional[tuple[str, int]], names: list[str]) -> tuple[int, int]:
+    if not request:
+        return NONE_BYTE, 0
+    return names.index(request[0]), request[1]
+
+
+def _pack_params(game_params: dict[str, Any]) -> bytes:
+    return PARAMS.pack(
+        game_params.get("penalty", 0),
+        game_params.get("skip", 0),
+        _pack_flags([game_params.get(flag, False) for flag in PARAM_FLAGS]),
+        *_pack_request(game_params.get("value", None), VALUES),
+        *_pack_request(game_params.get("suit", None), SUITS),
+    )
+
+
+def _unpack_params(data: bytes, offset: int) -> dict[str, Any]:
+    penalty, skip, flags, value, value_turns, suit, suit_turns = PARAMS.unpack_from(data, offset)
+    game_params: dict[str, Any] = {}
+    if penalty:
+        game_params["penalty"] = penalty
+    if skip:
+        game_params["skip"] = skip
+    for bit, flag in enumerate(PARAM_FLAGS):
+        if flags & 1 << bit:
+            game_params[flag] = True
+    if value != NONE_BYTE:
+        game_params["value"] = (VALUES[value], value_turns)
+    if suit != NONE_BYTE:
+        game_params["suit"] = (SUITS[suit], suit_turns)
+    return game_params
+
+
+def snapshot(game: "Game") -> bytes:
+    """
+    Packs engine state of the game: hands, draw and discard piles in order, center card,
+    game parameters, players' turn flags and finished order. Whether the game loop has ended
+    isn't saved, because the game is saved when its window is closed. Every card takes one byte,
+    so a snapshot of 4 players' game takes less than 100 bytes.
+
+    :return: Snapshot that can be passed to restore
+    """
+    played_card: Optional[Card] = game.played_card
+    data: list[bytes] = [
+        HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            len(game.players),
+            game.current_player_index,
+            NONE_BYTE if played_card is None else CARD_INDEX[played_card],
+        ),
+        _pack_params(game.game_params),
+        bytes([CARD_INDEX[game.center_card]]),
+        _pack_cards(game.deck.deck),
+        _pack_cards(game.discarded_deck.deck),
+    ]
+    for player in game.players:
+        data.append(PLAYER.pack(
+            _pack_flags([getattr(player, flag) for flag in PLAYER_FLAGS]),
+            player.cards_played,
+            player.skip_turns,
+        ))
+        data.append(_pack_cards(player.hand))
+    data.append(bytes([len(game.finished), *(game.players.index(player) for player in game.finished)]))
+    return b"".join(data)
+
+
+def restore(game: "Game", data: bytes) -> None:
+    """
+    Replaces engine state of the game with the snapshot. Players, their strategies
+    and the window are kept, only their state is replaced, so restoring doesn't load
+    any images. Hand inference is restarted because the history of the game isn't saved.
+
+    :param game: Game with the same number of players as the saved game
+    :param data: Snapshot made by snapshot
+    :raises SnapshotError: If the snapshot is damaged, was made by another version
+        or the number of players doesn't match
+    """
+    try:
+        magic, version, players, current, played_card = HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or players != len(game.players):
+            raise SnapshotError
+        offset: int = HEADER.size
+        game_params: dict[str, Any] = _unpack_params(data, offset)
+        offset += PARAMS.size
+        center: Card = CARD_TABLE[data[offset]]
+        deck, offset = _unpack_cards(data, offset + 1)
+        discarded, offset = _unpack_cards(data, offset)
+        states: list[tuple[int, int, int]] = []
+        hands: list[list[Card]] = []
+        for _ in game.players:
+            states.append(PLAYER.unpack_from(data, offset))
+            hand, offset = _unpack_cards(data, offset + PLAYER.size)
+            hands.append(hand)
+        if offset + 1 + data[offset] != len(data):
+            raise SnapshotError
+        finished: list[int] = list(data[offset + 1:])
+        if max([current, *finished]) >= players:
+            raise SnapshotError
+    except (struct.error, IndexError, ValueError):
+        raise SnapshotError
+
+    for player, (flags, cards_played, skip_turns), hand in zip(game.players, states, hands):
+        for bit, flag in enumerate(PLAYER_FLAGS):
+            setattr(player, flag, bool(flags & 1 << bit))
+        player._cards_played = cards_played
+        player.skip_turns = skip_turns
+        player.deal_hand(hand)
+    game.deck.deck[:] = deck
+    game.discarded_deck.deck[:] = discarded
+    game._center_card = center
+    game.game_params.clear()
+    game.game_params.update(game_params)
+    game._current_player_index = current
+    game._game_over = False
+    game.played_card = None if played_card == NONE_BYTE else CARD_TABLE[played_card]
+    game.finished[:] = [game.players[seat] for seat in finished]
+    game._zobrist = ZobristHash.from_game(game)
+    game._journal = GameJournal(game.journal.max_steps)
+    game._restart_inference()
+
+
+def write(data: bytes, path: str) -> None:
+    """
+    Writes snapshot to the file, the file is replaced at once
+    so a crash during saving leaves the previous snapshot intact
+    """
+    temporary_path: str = f"{path}.tmp"
+    with open(temporary_path, "wb") as file_handle:
+        file_handle.write(data)
+    os.replace(temporary_path, path)
+
+
+def save(game: "Game", path: str) -> None:
+    """
+    Writes snapshot of the game to the file, see write
+    """
+    write(snapshot(game), path)
+
+
+def load(game: "Game", path: str) -> None:
+    """
+    Restores the game from the file written by save
+
+    :raises SnapshotError: See restore
+    """
+    with open(path, "rb") as file_handle:
+        restore(game, file_handle.read())
@@ -0,0 +1,352 @@
+from assets import SpriteCache, TextCache
+from engine import GameEngine
+from players import ComputerPlayer, HumanPlayer
+from math import ceil, sqrt
+from pygame import Rect, Surface, font
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Callable, Optional, Union
+import argparse
+import numpy as np
+import pygame as pg
+import sys
+
+
+BACKGROUND_COLOR: tuple[int, int, int] = (34, 139, 34)
+BORDER_COLOR: tuple[int, int, int] = (20, 80, 20)
+CURRENT_COLOR: tuple[int, int, int] = (255, 215, 0)
+TEXT_COLOR: tuple[int, int, int] = (255, 255, 255)
+# width to height ratio of card images
+CARD_RATIO: float = 0.7
+
+
+def spectator_player() -> ComputerPlayer:
+    """
+    Computer player without the endgame solver, so that one turn fits in a frame
+    """
+    player: ComputerPlayer = ComputerPlayer()
+    player.endgame = None
+    return player
+
+
+class GameCell:
+    def __init__(
+        self,
+        number: int,
+        surface: Surface,
+        rect: Rect,
+        player_number: int,
+        computer_player: Callable[[], ComputerPlayer] = spectator_player,
+    ) -> None:
+        """
+        One game of the grid drawn on its own part of the window
+
+        :param number: Number of the cell shown in its header
+        :param surface: Subsurface of the window the cell is drawn on
+        :param rect: Position of the cell in the window
+        :param player_number: Number of players of every game
+        :param computer_player: Class or factory of computer players
+        """
+        self._number: int = number
+        self._surface: Surface = surface
+        self._rect: Rect = rect
+        self._player_number: int = player_number
+        self._computer_player: Callable[[], ComputerPlayer] = computer_player
+        self._game: GameEngine = self._new_game()
+        self._games: int = 1
+        self._turns: int = 0
+        self._drawn_key: Optional[tuple] = None
+        self.last_turn: float = 0.0
+        self.over_since: Optional[float] = None
+        # held while the game changes, so that it isn't drawn in the middle of a turn
+        self._lock: Lock = Lock()
+
+    def _new_game(self) -> GameEngine:
+        return GameEngine(
+            self._player_number, computer_player=self._computer_player, log=None, undo_steps=0
+        )
+
+    @property
+    def game(self) -> GameEngine:
+        return self._game
+
+    @property
+    def rect(self) -> Rect:
+        return self._rect
+
+    @property
+    def turns(self) -> int:
+        return self._turns
+
+    @property
+    def over(self) -> bool:
+        return len(self.game.finished) >= len(self.game.players) - 1
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Returns True if the game has changed since the cell was drawn
+        """
+        return self._drawn_key != self._key()
+
+    def _key(self) -> tuple:
+        return (self._games, self._turns, self.game.position_key, len(self.game.finished))
+
+    def advance(self) -> None:
+        """
+        Plays one turn of the game
+        """
+        with self._lock:
+            self.game._play_turn()
+            self._turns += 1
+
+    def restart(self) -> None:
+        self.game._speculator.shutdown()
+        game: GameEngine = self._new_game()
+        with self._lock:
+            self._game = game
+            self._games += 1
+            self._turns = 0
+        self.over_since = None
+
+    def _hand_row(
+        self,
+        player: Union[HumanPlayer, ComputerPlayer],
+        row: Rect,
+        card_size: tuple[int, int],
+        sprites: SpriteCache,
+    ) -> None:
+        """
+        Draws cards of one player face up, overlapping if they don't fit in the row
+        """
+        card_width: int = card_size[0]
+        cards: int = len(player.hand)
+        step: float = card_width + 2
+        if cards > 1 and step * (cards - 1) + card_width > row.width:
+            step = (row.width - card_width) / (cards - 1)
+        for index, card in enumerate(player.hand):
+            self._surface.blit(
+                sprites.sprite(card.get_image_name(), card_size),
+                (row.x + int(index * step), row.y),
+            )
+
+    def draw_changed(self, sprites: SpriteCache, text_cache: TextCache, text_font: font.Font) -> Optional[Rect]:
+        """
+        Draws the cell if its game has changed and isn't in the middle of a turn
+
+        :return: Rect of the cell in the window or None if it wasn't drawn
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self.draw(sprites, text_cache, text_font) if self.dirty else None
+        finally:
+            self._lock.release()
+
+    def draw(self, sprites: SpriteCache, text_cache: TextCache, text_font: font.Font) -> Rect:
+        """
+        Draws the whole cell
+
+        :return: Rect of the cell in the window
+        """
+        game: GameEngine = self.game
+        surface: Surface = self._surface
+        width, height = surface.get_size()
+        surface.fill(BACKGROUND_COLOR)
+        pg.draw.rect(surface, BORDER_COLOR, surface.get_rect(), 1)
+
+        header: str = f"#{self._number}  game {self._games}  turn {self.turns}  stock {len(game.deck)}"
+        if self.over:
+            header += "  over"
+        header_surface: Surface = text_cache.render(header, text_font, TEXT_COLOR)
+        surface.blit(header_surface, (4, 3))
+
+        top: int = header_surface.get_height() + 6
+        row_height: int = (height - top - 2) // len(game.players)
+        card_height: int = max(row_height - 4, 4)
+        card_size: tuple[int, int] = (max(int(card_height * CARD_RATIO), 3), card_height)
+        center_left: int = width - card_size[0] - 6
+        surface.blit(
+            sprites.sprite(game.center_card.get_image_name(), card_size),
+            (center_left, top + (height - top - card_size[1]) // 2),
+        )
+
+        label_width: int = text_font.size("P4 #4")[0] + 6
+        for seat, player in enumerate(game.players):
+            row: Rect = Rect(4, top + seat * row_height, center_left - 10, row_height)
+            if seat == game.current_player_index and not self.over:
+                pg.draw.rect(surface, CURRENT_COLOR, row, 1)
+            label: str = f"P{seat + 1}"
+            if player in game.finished:
+                label += f" #{game.finished.index(player) + 1}"
+            surface.blit(text_cache.render(label, text_font, TEXT_COLOR), (row.x + 2, row.y + 2))
+            hand: Rect = Rect(row.x + label_width, row.y + 2, row.width - label_width - 2, card_height)
+            self._hand_row(player, hand, card_size, sprites)
+
+        self._drawn_key = self._key()
+        return self.rect
+
+
+class SpectatorGrid:
+    def __init__(
+        self,
+        games: int = 9,
+        player_number: int = 4,
+        size: tuple[int, int] = (1280, 960),
+        computer_player: Callable[[], ComputerPlayer] = spectator_player,
+        turn_interval: float = 0.2,
+        restart_delay: float = 2.0,
+    ) -> None:
+        """
+        Window showing a grid of headless games played by computer players.
+        Games are played in a background thread, because one turn of a computer player
+        with a big hand can take longer than many frames. Card images are scaled once
+        into a sprite cache shared by all cells, and only cells whose game has changed
+        are drawn and updated on the screen.
+
+        :param games: Number of games shown at once
+        :param player_number: Number of players of every game
+        :param size: Size of the window
+        :param computer_player: Class or factory of computer players
+        :param turn_interval: Time in seconds between turns of one game, 0 plays as fast as possible
+        :param restart_delay: Time in seconds a finished game is shown before a new one starts
+        """
+        pg.init()
+        pg.display.set_caption("Macao spectator")
+        self._window: Surface = pg.display.set_mode(size)
+        self._sprites: SpriteCache = SpriteCache()
+        self._text_cache: TextCache = TextCache()
+        self._font: font.Font = font.Font(None, 20)
+        self.turn_interval: float = turn_interval
+        self.restart_delay: float = restart_delay
+        self._stopped: Event = Event()
+        self._player: Optional[Thread] = None
+
+        columns: int = ceil(sqrt(games))
+        rows: int = ceil(games / columns)
+        cell_width: int = size[0] // columns
+        cell_height: int = size[1] // rows
+        self._cells: list[GameCell] = []
+        for number in range(games):
+            rect: Rect = Rect(
+                (number % columns) * cell_width, (number // columns) * cell_height, cell_width, cell_height
+            )
+            surface: Surface = self._window.subsurface(rect)
+            self._cells.append(GameCell(number + 1, surface, rect, player_number, computer_player))
+        self._window.fill(BACKGROUND_COLOR)
+        pg.display.flip()
+
+    @property
+    def cells(self) -> list[GameCell]:
+        return self._cells
+
+    @property
+    def sprites(self) -> SpriteCache:
+        return self._sprites
+
+    def play_due(self, now: float) -> int:
+        """
+        Plays one turn of every game whose turn is due and starts new games
+        in place of games that have been over for long enough
+
+        :param now: Current time from perf_counter
+        :return: Number of played turns
+        """
+        played: int = 0
+        for cell in self.cells:
+            if cell.over:
+                if cell.over_since is None:
+                    cell.over_since = now
+                elif now - cell.over_since >= self.restart_delay:
+                    cell.restart()
+                continue
+            if now - cell.last_turn < self.turn_interval:
+                continue
+            cell.advance()
+            cell.last_turn = now
+            played += 1
+        return played
+
+    def _play(self) -> None:
+        while not self._stopped.is_set():
+            if not self.play_due(perf_counter()):
+                self._stopped.wait(0.005)
+
+    def frame(self) -> list[Rect]:
+        """
+        Draws changed cells
+
+        :return: Rects of the window that were updated
+        """
+        dirty: list[Rect] = []
+        for cell in self.cells:
+            rect: Optional[Rect] = cell.draw_changed(self._sprites, self._text_cache, self._font)
+            if rect is not None:
+                dirty.append(rect)
+        if dirty:
+            pg.display.update(dirty)
+        return dirty
+
+    def run(self, seconds: Optional[float] = None, fps: int = 60) -> list[float]:
+        """
+        Shows games until the window is closed or given time passes
+
+        :return: Time in seconds between consecutive frames
+        """
+        # the window thread waits for the game thread at most this long when it wakes up
+        switch_interval: float = sys.getswitchinterval()
+        sys.setswitchinterval(0.001)
+        clock: pg.time.Clock = pg.time.Clock()
+        frame_times: list[float] = []
+        start: float = perf_counter()
+        last_frame: float = start
+        # turns of different games are spread over the interval, so that cells change in different frames
+        for index, cell in enumerate(self.cells):
+            cell.last_turn = start - self.turn_interval * index / len(self.cells)
+        self._stopped.clear()
+        self._player = Thread(target=self._play, daemon=True)
+        self._player.start()
+        while seconds is None or last_frame - start < seconds:
+            if any(event.type == pg.QUIT for event in pg.event.get()):
+                break
+            self.frame()
+            clock.tick(fps)
+            now: float = perf_counter()
+            frame_times.append(now - last_frame)
+            last_frame = now
+        self._stopped.set()
+        self._player.join()
+        sys.setswitchinterval(switch_interval)
+        return frame_times
+
+    def close(self) -> None:
+        for cell in self.cells:
+            cell.game._speculator.shutdown()
+        pg.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch many games of computer players at once")
+    parser.add_argument("--games", type=int, default=9, help="Number of games shown at once")
+    parser.add_argument("--players", type=int, default=4, help="Number of players of every game")
+    parser.add_argument("--size", type=int, nargs=2, default=[1280, 960], help="Width and height of the window")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--turn-interval", type=float, default=0.2, help="Seconds between turns of one game")
+    parser.add_argument("--seconds", type=float, default=None, help="Close the window after this time")
+    args = parser.parse_args()
+
+    grid: SpectatorGrid = SpectatorGrid(
+        args.games, args.players, tuple(args.size), turn_interval=args.turn_interval
+    )
+    frame_times: list[float] = grid.run(args.seconds, args.fps)
+    grid.close()
+    if frame_times:
+        milliseconds: np.ndarray = np.array(frame_times) * 1000
+        print(
+            f"{len(frame_times)} frames, {1000 / milliseconds.mean():.1f} FPS, "
+            f"p99 frame time {np.percentile(milliseconds, 99):.2f} ms, max {milliseconds.max():.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from constants import SUITS, VALUES
+from card import Card, CardPlayedOnItself
+from inference import HandInference
+from players import ComputerPlayer, HumanPlayer
+from rules import apply_effect, end_turn
+from typing import TYPE_CHECKING, Any, Optional, Union
+import numpy as np
+
+if TYPE_CHECKING:
+    from game import Game
+
+
+def _play_params(card: Card, game_params: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Returns game parameters after given card is played and the turn is ended,
+    one dict for every selection that can be made after a jack or ace
+
+    :param card: Played card
+    :param game_params: Game parameters before the card was played
+    :return: List of possible game parameters
+    """
+    params: dict[str, Any] = apply_effect(dict(game_params), card)
+    end_turn(params)
+
+    if params.pop("jack", None):
+        options: list[dict[str, Any]] = [dict(params)]
+        options[0].pop("value", None)
+        for value in VALUES[3:9]:
+            options.append(dict(params, value=(value, 4)))
+        return options
+    if params.pop("ace", None):
+        return [dict(params, suit=(suit, 1)) for suit in SUITS]
+    return [params]
+
+
+def predict_outcomes(
+    game: "Game", player: Union[HumanPlayer, ComputerPlayer]
+) -> list[tuple[Card, dict[str, Any], int]]:
+    """
+    Predicts likely ends of player's turn: drawing a card (or the whole penalty) and
+    playing any single card that can be played on the center card.
+    Turns started by spades king are not predicted because they reverse the order of play.
+
+    :param game: Game in which the player is about to move
+    :param player: Player whose turn is predicted
+    :return: List of tuples containing center card, game parameters and player's hand length
+        after the turn
+    """
+    center: Card = game.center_card
+    game_params: dict[str, Any] = {
+        key: value for key, value in game.game_params.items() if key not in ["jack", "ace"]
+    }
+    hand_len: int = len(player.hand)
+    outcomes: list[tuple[Card, dict[str, Any], int]] = []
+
+    params: dict[str, Any] = dict(game_params)
+    end_turn(params)
+    if params.pop("skip", None):
+        outcomes.append((center, params, hand_len))
+    else:
+        drawn: int = params.pop("penalty", 0) or 1
+        params.pop("king", None)
+        outcomes.append((center, params, hand_len + drawn))
+
+    for card in player.hand:
+        if card.value == "king" and card.suit == "spades":
+            continue
+        try:
+            if not center.can_play(card, **game_params):
+                continue
+        except CardPlayedOnItself:
+            continue
+        for params in _play_params(card, game_params):
+            outcomes.append((card, params, hand_len - 1))
+    return outcomes
+
+
+def predict_beliefs(
+    game: "Game",
+    player: Union[HumanPlayer, ComputerPlayer],
+    next_player: ComputerPlayer,
+    center: Card,
+    hand_len: int,
+) -> np.ndarray:
+    """
+    Returns beliefs the next player will have after player's turn ends with predicted outcome,
+    hand inference is updated the same way Game updates it when the turn is actually played
+
+    :param game: Game in which the player is about to move
+    :param player: Player whose turn is predicted
+    :param next_player: Computer player that moves after the player
+    :param center: Center card after the turn, the current one if the player didn't play
+    :param hand_len: Length of player's hand after the turn
+    :return: Beliefs as set by Game before next player's find_best_plays
+    """
+    inference: HandInference = game.inference.copy()
+    seat: int = game.players.index(player)
+    if center is game.center_card:
+        params: dict[str, Any] = dict(game.game_params)
+        if params.get("skip", 0):
+            # skip is accepted in Game._next_turn after requested value was decreased
+            end_turn(params)
+        inference.passed(seat, center, params, game._pass_certainty(player))
+        inference.drew(seat, hand_len - len(player.hand))
+    else:
+        inference.played(seat, center)
+    return inference.beliefs(game._seat_order(next_player), next_player.hand)
+
+
+def predict_game_states(
+    game: "Game", player: Union[HumanPlayer, ComputerPlayer]
+) -> tuple[Optional[ComputerPlayer], list[dict[str, Any]], list[np.ndarray]]:
+    """
+    Predicts game states the next computer player will see after player's turn
+
+    :return: The next computer player, or None if the next player isn't a computer,
+        list of game states as passed to ComputerPlayer.find_best_plays
+        and list of player's beliefs in these states
+    """
+    next_player: Union[HumanPlayer, ComputerPlayer] = game._get_next_player(player)
+    if not isinstance(next_player, ComputerPlayer) or next_player is player:
+        return None, [], []
+    previous: Union[HumanPlayer, ComputerPlayer] = game._get_previous_player(next_player)
+    following: Union[HumanPlayer, ComputerPlayer] = game._get_next_player(next_player)
+    index: int = game.players.index(next_player)
+    seats: list[Union[HumanPlayer, ComputerPlayer]] = [
+        seat
+        for seat in game.players[index:] + game.players[:index]
+        if seat not in game.finished
+    ]
+    discarded: tuple[Card, ...] = tuple(game.discarded_deck.deck)
+    states: list[dict[str, Any]] = []
+    beliefs: list[np.ndarray] = []
+    for center, params, hand_len in predict_outcomes(game, player):
+        state: dict[str, Any] = {
+            "center": center,
+            "prev_len": hand_len if previous is player else len(previous.hand),
+            "next_len": hand_len if following is player else len(following.hand),
+            "seat_lens": tuple(
+                hand_len if seat is player else len(seat.hand) for seat in seats
+            ),
+            "discarded": discarded if center is game.center_card else discarded + (game.center_card,),
+        }
+        state.update(params)
+        states.append(state)
+        beliefs.append(predict_beliefs(game, player, next_player, center, hand_len))
+    return next_player, states, beliefs
+
+
+class Speculator:
+    def __init__(self) -> None:
+        """
+        Computes computer player's moves in a background thread while the human is thinking.
+        Results are stored under ComputerPlayer.decision_key in player's decision cache,
+        so a result is only used if the real game state is exactly the same as the predicted one.
+        """
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="makao-speculation"
+        )
+        self._results: dict[tuple, Future] = {}
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def pending(self) -> int:
+        return len(self._results)
+
+    def speculate(
+        self, player: ComputerPlayer, states: list[dict[str, Any]], beliefs: list[np.ndarray]
+    ) -> None:
+        """
+        Starts computing player's best plays for every given state, results of
+        the previous speculation are discarded
+
+        :param player: Player whose moves are computed, its copies are used in the worker
+        :param states: Predicted game states
+        :param beliefs: Player's predicted beliefs in every state, they are part of the decision key
+        """
+        self.cancel()
+        for state, state_beliefs in zip(states, beliefs):
+            search: ComputerPlayer = player.search_copy()
+            search.beliefs = state_beliefs
+            key: tuple = search.decision_key(**state)
+            if key in self._results:
+                continue
+            self._results[key] = self._executor.submit(search.find_best_plays, **state)
+
+    def lookup(self, player: ComputerPlayer, **game_state) -> Optional[list[Card]]:
+        """
+        Returns speculated best plays for the actual game state, waits for the result
+        if it's being computed. All other speculated results are discarded.
+
+        :return: Best plays or None if the state wasn't predicted
+        """
+        future: Optional[Future] = self._results.pop(player.decision_key(**game_state), None)
+        self.cancel()
+        if future is None or future.cancelled():
+            self._misses += 1
+            return None
+        self._hits += 1
+        future.result()
+        # the result is stored in player's decision cache together with planned selection
+        return player.find_best_plays(**game_state)
+
+    def cancel(self) -> None:
+        for future in self._results.values():
+            future.cancel()
+        self._results.clear()
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False)
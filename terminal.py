@@ -0,0 +1,367 @@
+from history import NothingToRedo, NothingToUndo
+from collections import deque
+from functools import partial
+from io import TextIOBase
+from typing import TYPE_CHECKING, Any, Callable, Optional
+import argparse
+import curses
+import os
+
+if TYPE_CHECKING:
+    from card import Card
+    from engine import GameEngine
+    from players import HumanPlayer
+
+
+SUIT_GLYPHS: dict[str, str] = {"clubs": "♣", "spades": "♠", "diamonds": "♦", "hearts": "♥"}
+VALUE_GLYPHS: dict[str, str] = {"jack": "J", "queen": "Q", "king": "K", "ace": "A"}
+RED_SUITS: list[str] = ["diamonds", "hearts"]
+HELP: str = "←→ select  enter play  d draw  p penalty  n next  m makao  o and out  u undo  r redo  q quit"
+ENTER_KEYS: list[int] = [curses.KEY_ENTER, ord("\n"), ord("\r"), ord(" ")]
+
+
+def card_glyph(card: "Card") -> str:
+    """
+    Returns short name of the card made of its value and suit symbol, e.g. 10♥ or Q♠
+    """
+    return VALUE_GLYPHS.get(card.value, card.value) + SUIT_GLYPHS[card.suit]
+
+
+class MoveLog(TextIOBase):
+    def __init__(self, max_lines: int = 100) -> None:
+        """
+        Text stream keeping the last lines of game's move log, so that they can be
+        shown in the terminal instead of being printed over it
+
+        :param max_lines: Maximum number of kept lines
+        """
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        self._partial: str = ""
+
+    @property
+    def lines(self) -> list[str]:
+        return list(self._lines)
+
+    def write(self, text: str) -> int:
+        *lines, self._partial = (self._partial + text).split("\n")
+        self._lines.extend(line.strip() for line in lines if line.strip())
+        return len(text)
+
+
+def new_game(player_number: int, choose: Callable[[list[str]], int], ai: str = "heuristic") -> "GameEngine":
+    """
+    Creates a game against computer players with the terminal player in the first seat.
+    GameEngine is used instead of Game, so pygame is never imported. The engine is imported here
+    and not at the top of the module, so that the screen is shown while NumPy is being loaded.
+
+    :param player_number: Number of players, from 2 to 4
+    :param choose: Shows items of a suit or value selection and returns index of the chosen one
+    :param ai: Strategy of computer players, one of engine.COMPUTER_PLAYERS
+    :raises WrongPlayerNumber: If the number of players is not within the allowed range
+    """
+    from engine import COMPUTER_PLAYERS, GameEngine
+    from players import TerminalPlayer
+
+    players: list["HumanPlayer"] = [TerminalPlayer(choose)]
+    players += [COMPUTER_PLAYERS[ai]() for _ in range(player_number - 1)]
+    return GameEngine(player_number, players=players)
+
+
+class TerminalGame:
+    def __init__(self, screen: Any, game: Optional["GameEngine"] = None) -> None:
+        """
+        Curses front-end of a game played by a human against computer players.
+        It only draws after a key was pressed or a computer player has moved
+        and waits for keys without a timeout, so it doesn't use CPU while idle.
+        Actions are applied with the same GameEngine methods as the buttons of the window.
+
+        :param screen: Curses window the game is drawn on
+        :param game: Game engine with the terminal player in the first seat, set later if not given,
+            its move log is written to log instead of stdout
+        """
+        self._screen: Any = screen
+        self._log: MoveLog = MoveLog()
+        self._game: Optional["GameEngine"] = None
+        self.game = game
+        self.selected: int = 0
+        self.message: str = ""
+        self.quit: bool = False
+        self._red: int = 0
+
+    @property
+    def log(self) -> MoveLog:
+        return self._log
+
+    @property
+    def game(self) -> Optional["GameEngine"]:
+        return self._game
+
+    @game.setter
+    def game(self, game: Optional["GameEngine"]) -> None:
+        self._game = game
+        if game is not None:
+            game.log = partial(print, file=self._log)
+
+    @property
+    def over(self) -> bool:
+        return len(self.game.finished) >= len(self.game.players) - 1
+
+    @property
+    def human(self) -> "HumanPlayer":
+        return self.game.players[0]
+
+    def init_colors(self) -> None:
+        if not curses.has_colors():
+            return
+        curses.use_default_colors()
+        curses.init_pair(1, curses.COLOR_RED, -1)
+        self._red = curses.color_pair(1)
+
+    def _put(self, y: int, x: int, text: str, attr: int = 0) -> int:
+        """
+        Writes text clipped to the window
+
+        :return: Column after the written text
+        """
+        height, width = self._screen.getmaxyx()
+        if not 0 <= y < height or x >= width - 1:
+            return x
+        text = text[: width - 1 - x]
+        self._screen.addstr(y, x, text, attr)
+        return x + len(text)
+
+    def _card_attr(self, card: "Card") -> int:
+        return self._red if card.suit in RED_SUITS else 0
+
+    def _params_text(self) -> str:
+        params: dict[str, Any] = self.game.game_params
+        texts: list[str] = []
+        if "value" in params:
+            texts.append(f"value {params['value'][0]} requested")
+        if "suit" in params:
+            texts.append(f"suit {SUIT_GLYPHS[params['suit'][0]]} requested")
+        if self.game.get_penalty:
+            texts.append(f"penalty {self.game.get_penalty}")
+        if self.game.get_skip:
+            texts.append(f"skip {self.game.get_skip}")
+        return "  ".join(texts)
+
+    def _seat_text(self, seat: int) -> str:
+        player: "HumanPlayer" = self.game.players[seat]
+        name: str = "You" if not seat else f"Computer{seat}"
+        text: str = f"{'>' if seat == self.game.current_player_index and not self.over else ' '} {name:<10}"
+        if player in self.game.finished:
+            return text + f"#{self.game.finished.index(player) + 1}"
+        text += f"{len(player.hand):>2} card{'s' if len(player.hand) != 1 else ''}"
+        if player.makao_status:
+            text += "  makao"
+        if player.skip_turns:
+            text += f"  skips {player.skip_turns}"
+        return text
+
+    def draw(self) -> None:
+        game: "GameEngine" = self.game
+        screen: Any = self._screen
+        height, width = screen.getmaxyx()
+        screen.erase()
+        self._put(0, 0, f"Makao  stock {len(game.deck)}  discarded {len(game.discarded_deck)}", curses.A_BOLD)
+        row: int = 2
+        for seat in range(1, len(game.players)):
+            self._put(row, 0, self._seat_text(seat))
+            row += 1
+
+        row += 1
+        x: int = self._put(row, 2, "Center  ")
+        x = self._put(row, x, card_glyph(game.center_card), self._card_attr(game.center_card) | curses.A_BOLD)
+        self._put(row, x + 3, self._params_text())
+
+        row += 2
+        self._put(row, 0, self._seat_text(0))
+        row += 1
+        hand: list["Card"] = self.human.hand
+        self.selected = min(self.selected, max(len(hand) - 1, 0))
+        x = 4
+        for index, card in enumerate(hand):
+            glyph: str = card_glyph(card)
+            if x + len(glyph) >= width - 1:
+                row, x = row + 1, 4
+            attr: int = self._card_attr(card)
+            if game.center_card.can_play(card, **game.game_params):
+                attr |= curses.A_BOLD
+            if index == self.selected:
+                attr |= curses.A_REVERSE
+            x = self._put(row, x, glyph, attr) + 1
+
+        row += 2
+        self._put(row, 0, HELP, curses.A_DIM)
+        self._put(row + 1, 0, self.message, curses.A_BOLD)
+        row += 3
+        log_lines: list[str] = self.log.lines[-max(height - row, 0):] if height > row else []
+        for line in log_lines:
+            self._put(row, 0, line, curses.A_DIM)
+            row += 1
+        screen.refresh()
+
+    def choose(self, items: list[str]) -> int:
+        """
+        Shows suit or value selection in place of SelectionMenu of the window,
+        arrows or digits move between items and enter confirms
+
+        :return: Index of the chosen item
+        """
+        index: int = 0
+        title: str = "Request suit:" if items[0] in SUIT_GLYPHS else "Request value:"
+        while True:
+            self.draw()
+            row: int = self._screen.getmaxyx()[0] - 1
+            x: int = self._put(row, 0, title) + 1
+            for item_index, item in enumerate(items):
+                label: str = f"{item_index + 1} {SUIT_GLYPHS.get(item, item)}"
+                x = self._put(row, x, label, curses.A_REVERSE if item_index == index else 0) + 2
+            self._screen.refresh()
+            key: int = self._screen.getch()
+            if key in ENTER_KEYS:
+                return index
+            if key == curses.KEY_LEFT:
+                index = (index - 1) % len(items)
+            elif key == curses.KEY_RIGHT:
+                index = (index + 1) % len(items)
+            elif ord("1") <= key < ord("1") + len(items):
+                return key - ord("1")
+
+    def advance(self) -> None:
+        """
+        Plays turns of computer players and skipped turns until the human has to act,
+        the screen is drawn after every computer turn. The human whose previous player
+        has emptied its hand stops makao at once, the same way computer players do.
+        """
+        game: "GameEngine" = self.game
+        while not self.over:
+            player: "HumanPlayer" = game.get_current_player()
+            previous: "HumanPlayer" = game._get_previous_player(player)
+            if game._computer_turn():
+                game.journal.checkpoint(game)
+                game._play_turn()
+            elif not previous.hand:
+                game._stop_makao(player)
+                if not previous.hand and previous not in game.finished:
+                    game._player_finish(previous)
+                continue
+            elif player in game.finished:
+                game._change_current_player()
+                continue
+            elif player.skip_turns:
+                game._skip_turn(player)
+                continue
+            else:
+                return
+            self.draw()
+
+    def _undo(self, redo: bool = False) -> None:
+        """
+        Takes back the human's last action together with computer players' turns played
+        after it, or plays them again
+        """
+        game: "GameEngine" = self.game
+        try:
+            if redo:
+                game.redo()
+                while game._computer_turn() and game.journal.can_redo:
+                    game.redo()
+            else:
+                game.undo()
+                while game._computer_turn():
+                    game.undo()
+        except (NothingToUndo, NothingToRedo):
+            self.message = f"Nothing to {'redo' if redo else 'undo'}"
+
+    def _play_selected(self) -> None:
+        game: "GameEngine" = self.game
+        if not self.human.hand:
+            return
+        card: "Card" = self.human.hand[self.selected]
+        game.played_card = card
+        game._play_turn()
+        if card in self.human.hand:
+            self.message = f"{card_glyph(card)} can't be played on {card_glyph(game.center_card)}"
+
+    def handle_key(self, key: int) -> None:
+        """
+        Applies action bound to the key, see HELP
+        """
+        self.message = ""
+        if key == ord("q"):
+            self.quit = True
+        elif key == curses.KEY_LEFT:
+            self.selected = max(self.selected - 1, 0)
+        elif key == curses.KEY_RIGHT:
+            self.selected = min(self.selected + 1, max(len(self.human.hand) - 1, 0))
+        elif key in [ord("u"), ord("r")]:
+            self._undo(redo=key == ord("r"))
+            self.advance()
+        elif self.over or self.game.current_player_index:
+            return
+        else:
+            game: "GameEngine" = self.game
+            player: "HumanPlayer" = self.human
+            game.journal.checkpoint(game)
+            if key in ENTER_KEYS:
+                self._play_selected()
+            elif key == ord("d"):
+                game._take_cards(player)
+            elif key == ord("p"):
+                game._draw_penalty(player)
+            elif key == ord("n"):
+                game._next_turn()
+            elif key == ord("m"):
+                game._makao(player)
+            elif key == ord("o"):
+                game._makao_out(player)
+            self.advance()
+
+    def run(self) -> None:
+        """
+        Handles keys until the game is over and a key is pressed, or q is pressed
+        """
+        self.advance()
+        while not self.quit:
+            if self.over:
+                self.message = "Game over, press any key"
+            self.draw()
+            key: int = self._screen.getch()
+            if self.over:
+                break
+            if key != curses.KEY_RESIZE:
+                self.handle_key(key)
+
+
+def _play(screen: Any, args: argparse.Namespace) -> "GameEngine":
+    curses.curs_set(0)
+    terminal: TerminalGame = TerminalGame(screen)
+    terminal.init_colors()
+    terminal._put(0, 0, "Makao  dealing...", curses.A_BOLD)
+    screen.refresh()
+    terminal.game = new_game(args.num_players, terminal.choose, args.ai)
+    terminal.run()
+    return terminal.game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a game in the terminal")
+    parser.add_argument("num_players", type=int, help="The number of players")
+    parser.add_argument(
+        "--ai",
+        choices=["heuristic", "expectimax"],
+        default="heuristic",
+        help="Strategy of computer players",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("ESCDELAY", "25")
+    game: "GameEngine" = curses.wrapper(_play, args)
+    game._speculator.shutdown()
+    game.display_result()
+
+
+if __name__ == "__main__":
+    main()
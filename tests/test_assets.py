@@ -0,0 +1,256 @@
+from assets import CARD_IMAGES, SHEET_PATH, ImagePreloader, NotPNGFile, SpriteCache, SpriteSheet, TextCache, png_size
+import assets
+from pygame import image
+import os
+import pytest
+import shutil
+
+
+class CountingFont:
+    def __init__(self) -> None:
+        self.renders: int = 0
+
+    def render(self, text, antialias, color):
+        self.renders += 1
+        return (text, antialias, color)
+
+
+def test_text_rendered_once():
+    cache = TextCache()
+    text_font = CountingFont()
+    for _ in range(10):
+        surface = cache.render("52", text_font, (0, 0, 0))
+    assert surface == ("52", True, (0, 0, 0))
+    assert text_font.renders == 1
+    assert cache.hits == 9
+    assert cache.misses == 1
+
+
+def test_key_includes_font_and_color():
+    cache = TextCache()
+    first_font = CountingFont()
+    second_font = CountingFont()
+    cache.render("NEXT", first_font, (0, 0, 0))
+    cache.render("NEXT", second_font, (0, 0, 0))
+    cache.render("NEXT", first_font, (255, 255, 255))
+    assert len(cache) == 3
+    assert first_font.renders == 2
+    assert second_font.renders == 1
+
+
+def test_cache_is_bounded():
+    cache = TextCache(max_size=2)
+    text_font = CountingFont()
+    cache.render("1", text_font, (0, 0, 0))
+    cache.render("2", text_font, (0, 0, 0))
+    cache.render("1", text_font, (0, 0, 0))
+    cache.render("3", text_font, (0, 0, 0))
+    assert len(cache) == 2
+    cache.render("1", text_font, (0, 0, 0))
+    assert text_font.renders == 3
+    cache.render("2", text_font, (0, 0, 0))
+    assert text_font.renders == 4
+
+
+def test_sprite_scaled_once():
+    cache = SpriteCache()
+    for _ in range(5):
+        sprite = cache.sprite("images/hearts_2.png", (35, 50))
+    assert sprite.get_size() == (35, 50)
+    assert cache.hits == 4
+    assert cache.misses == 1
+    assert cache.sprite("images/hearts_2.png", (35, 50)) is sprite
+
+
+def test_sprite_key_includes_size():
+    cache = SpriteCache()
+    small = cache.sprite("images/hearts_2.png", (35, 50))
+    big = cache.sprite("images/hearts_2.png", (70, 100))
+    assert small.get_size() == (35, 50)
+    assert big.get_size() == (70, 100)
+    assert len(cache) == 2
+
+
+def test_sprite_cache_is_bounded():
+    cache = SpriteCache(max_size=2)
+    cache.sprite("images/hearts_2.png", (35, 50))
+    cache.sprite("images/hearts_3.png", (35, 50))
+    cache.sprite("images/hearts_2.png", (35, 50))
+    cache.sprite("images/hearts_4.png", (35, 50))
+    assert len(cache) == 2
+    cache.sprite("images/hearts_2.png", (35, 50))
+    assert cache.misses == 3
+
+
+def test_png_size_read_from_header():
+    assert png_size("images/hidden.png") == image.load("images/hidden.png").get_size()
+
+
+def test_png_size_of_other_file(tmp_path):
+    path = tmp_path / "card.png"
+    path.write_bytes(b"GIF89a" + bytes(30))
+    with pytest.raises(NotPNGFile):
+        png_size(str(path))
+
+
+def test_preloaded_images_installed():
+    paths = ["images/hidden.png", "images/hearts_2.png", "images/spades_ace.png"]
+    preloader = ImagePreloader(paths)
+    cache = SpriteCache()
+    preloader.install(cache)
+    assert preloader.done
+    assert preloader.loaded == preloader.total == 3
+    for path in paths:
+        assert cache.image(path).get_size() == png_size(path)
+    assert cache.sprite("images/hidden.png", png_size("images/hidden.png")) is cache.image("images/hidden.png")
+
+
+def same_pixels(first, second) -> bool:
+    return image.tobytes(first, "RGBA") == image.tobytes(second, "RGBA")
+
+
+def test_sheet_saved_and_loaded(tmp_path):
+    paths = ["images/hidden.png", "images/hearts_2.png", "images/spades_ace.png"]
+    path = str(tmp_path / "cards.png")
+    SpriteSheet.build(paths).save(path)
+    sheet = SpriteSheet.load(path)
+    assert sheet.paths == paths
+    assert "images/clubs_3.png" not in sheet
+    for card_path in paths:
+        assert same_pixels(sheet.image(card_path), image.load(card_path))
+
+
+def test_shipped_sheet_matches_card_images():
+    sheet = SpriteSheet.load(SHEET_PATH)
+    assert sheet.paths == CARD_IMAGES
+    for path in CARD_IMAGES:
+        assert same_pixels(sheet.image(path), image.load(path)), f"{SHEET_PATH} is out of date, run assets.py"
+    assert sheet.stale_paths() == []
+
+
+def test_preloader_takes_images_from_sheet(tmp_path):
+    path = str(tmp_path / "cards.png")
+    SpriteSheet.build(["images/hidden.png", "images/hearts_2.png"]).save(path)
+    preloader = ImagePreloader(["images/hidden.png", "images/hearts_2.png", "images/spades_ace.png"], path)
+    cache = SpriteCache()
+    preloader.install(cache)
+    assert preloader.loaded == 3
+    assert len(preloader.sheet) == 2
+    assert cache.image("images/hearts_2.png").get_parent() is preloader.sheet.surface
+    assert cache.image("images/spades_ace.png").get_parent() is None
+
+
+def test_rotated_sprite_cached():
+    cache = SpriteCache()
+    rotated = cache.sprite("images/hearts_2.png", (35, 50), 90)
+    assert rotated.get_size() == (50, 35)
+    assert cache.sprite("images/hearts_2.png", (35, 50), 90) is rotated
+    assert cache.sprite("images/hearts_2.png", (35, 50)).get_size() == (35, 50)
+    assert cache.misses == 2
+
+
+def test_variants_reused_across_caches(tmp_path):
+    cache_dir = str(tmp_path / "sprites")
+    first = SpriteCache(cache_dir=cache_dir)
+    scaled = first.sprite("images/hearts_2.png", (35, 50), 90)
+    assert first.misses == 1
+    assert len(os.listdir(cache_dir)) == 1
+
+    second = SpriteCache(cache_dir=cache_dir)
+    loaded = second.sprite("images/hearts_2.png", (35, 50), 90)
+    assert second.misses == 0
+    assert second.disk_hits == 1
+    assert same_pixels(loaded, scaled)
+
+
+def test_variants_made_again_after_source_changed(tmp_path):
+    source = str(tmp_path / "hearts_2.png")
+    shutil.copy("images/hearts_2.png", source)
+    cache_dir = str(tmp_path / "sprites")
+    SpriteCache(cache_dir=cache_dir).sprite(source, (35, 50))
+    old_files = os.listdir(cache_dir)
+
+    shutil.copy("images/spades_ace.png", source)
+    cache = SpriteCache(cache_dir=cache_dir)
+    sprite = cache.sprite(source, (35, 50))
+    assert cache.misses == 1
+    assert cache.disk_hits == 0
+    assert same_pixels(sprite, SpriteCache().sprite("images/spades_ace.png", (35, 50)))
+    assert len(os.listdir(cache_dir)) == 1
+    assert os.listdir(cache_dir) != old_files
+
+
+def test_variants_made_again_after_sheet_rebuilt(tmp_path):
+    source = str(tmp_path / "hearts_2.png")
+    shutil.copy("images/hearts_2.png", source)
+    sheet_path = str(tmp_path / "cards.png")
+    cache_dir = str(tmp_path / "sprites")
+    SpriteSheet.build([source]).save(sheet_path)
+    shutil.copy("images/spades_ace.png", source)
+    cache = SpriteCache(cache_dir=cache_dir)
+    cache.add_sheet(SpriteSheet.load(sheet_path))
+    cache.sprite(source, (35, 50))
+
+    SpriteSheet.build([source]).save(sheet_path)
+    cache = SpriteCache(cache_dir=cache_dir)
+    cache.add_sheet(SpriteSheet.load(sheet_path))
+    sprite = cache.sprite(source, (35, 50))
+    assert cache.disk_hits == 0
+    assert same_pixels(sprite, SpriteCache().sprite("images/spades_ace.png", (35, 50)))
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_unscaled_sprite_not_written(tmp_path):
+    cache = SpriteCache(cache_dir=str(tmp_path / "sprites"))
+    assert cache.sprite("images/hearts_2.png", png_size("images/hearts_2.png")) is cache.image("images/hearts_2.png")
+    assert not os.path.exists(tmp_path / "sprites")
+
+
+def test_preloader_skips_changed_images_of_sheet(tmp_path):
+    paths = [str(tmp_path / "hidden.png"), str(tmp_path / "card.png")]
+    shutil.copy("images/hidden.png", paths[0])
+    shutil.copy("images/hearts_2.png", paths[1])
+    path = str(tmp_path / "cards.png")
+    SpriteSheet.build(paths).save(path)
+    assert SpriteSheet.load(path).stale_paths() == []
+
+    shutil.copy("images/spades_ace.png", paths[1])
+    preloader = ImagePreloader(paths, path)
+    cache = SpriteCache()
+    preloader.install(cache)
+    assert preloader.sheet.stale_paths() == [paths[1]]
+    assert preloader.loaded == 2
+    assert cache.image(paths[0]).get_parent() is preloader.sheet.surface
+    assert cache.image(paths[1]).get_parent() is None
+    assert same_pixels(cache.image(paths[1]), image.load("images/spades_ace.png"))
+
+
+def test_sources_hashed_once_after_touched(tmp_path, monkeypatch):
+    paths = [str(tmp_path / "hidden.png"), str(tmp_path / "card.png")]
+    shutil.copy("images/hidden.png", paths[0])
+    shutil.copy("images/hearts_2.png", paths[1])
+    path = str(tmp_path / "cards.png")
+    SpriteSheet.build(paths).save(path)
+    for card_path in paths:
+        os.utime(card_path, ns=(0, 0))
+    hashed = []
+    digest = assets.file_digest
+    monkeypatch.setattr(assets, "file_digest", lambda card_path: hashed.append(card_path) or digest(card_path))
+
+    sources_path = str(tmp_path / "sources.json")
+    for _ in range(2):
+        preloader = ImagePreloader(paths, path, sources_path)
+        cache = SpriteCache()
+        preloader.install(cache)
+        assert all(cache.image(card_path).get_parent() is preloader.sheet.surface for card_path in paths)
+    assert sorted(hashed) == sorted(paths)
+
+
+def test_changed_source_of_same_size_is_stale(tmp_path):
+    source = tmp_path / "card.png"
+    shutil.copy("images/hearts_2.png", source)
+    sheet = SpriteSheet.build([str(source)])
+    data = bytearray(source.read_bytes())
+    data[-20] ^= 0xFF
+    source.write_bytes(bytes(data))
+    assert sheet.stale_paths() == [str(source)]
@@ -0,0 +1,73 @@
+from bot_protocol import BotError, BotProcess, ProcessBotPlayer, decode_request, encode_request, play_games
+from card import Card
+from engine import GameEngine
+from players import ComputerPlayer
+from rules import is_legal_sequence
+import os
+import pytest
+import sys
+
+
+REPO: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT: list[str] = [sys.executable, os.path.join(REPO, "bot_protocol.py")]
+
+
+def _state(center, **params):
+    return {"center": center, "prev_len": 3, "next_len": 4, "seat_lens": (3, 4, 3), "discarded": (), **params}
+
+
+def test_request_round_trip():
+    hand = [Card("7", "spades"), Card("jack", "hearts")]
+    state = _state(Card("9", "hearts"), suit="hearts", penalty=2)
+    assert decode_request(encode_request(1, hand, **state)) == (hand, state)
+
+
+def test_pipelined_requests():
+    bot = BotProcess(BOT, timeout=30)
+    hands = [[Card("7", "spades"), Card("7", "hearts"), Card(value, "clubs")] for value in ["5", "6", "8", "9", "10"]]
+    center = Card("7", "clubs")
+    requests = [bot.request(hand, **_state(center)) for hand in hands]
+    assert bot.pending == len(hands)
+    for hand, (request_id, future) in zip(hands, requests):
+        cards, _ = bot.result(request_id, future, hand, **_state(center))
+        assert cards
+        assert is_legal_sequence(hand, cards, center, {})
+    bot.close()
+
+
+@pytest.mark.parametrize("command", [
+    [sys.executable, "-c", "import time; time.sleep(30)"],
+    [sys.executable, "-c", "print('{\"id\": 0, \"cards\": [0]}')"],
+])
+def test_failing_bot_falls_back_to_heuristic(command):
+    bot = BotProcess(command, timeout=0.5, max_timeouts=1)
+    player = ProcessBotPlayer(bot)
+    heuristic = ComputerPlayer()
+    hand = [Card("7", "spades"), Card("9", "hearts"), Card("king", "clubs")]
+    player.deal_hand(list(hand))
+    heuristic.deal_hand(list(hand))
+    state = _state(Card("9", "clubs"))
+    assert player.find_best_plays(**state) == heuristic.find_best_plays(**state)
+    assert player.bot_failures == 1
+    with pytest.raises(BotError):
+        bot.decide(hand, **state)
+    bot.close()
+
+
+def test_games_share_pipelined_bot():
+    bot = BotProcess(BOT, timeout=30)
+    pending = []
+    request = bot.request
+
+    def counting_request(hand, **state):
+        answer = request(hand, **state)
+        pending.append(bot.pending)
+        return answer
+
+    bot.request = counting_request
+    games = [GameEngine(3, computer_player=lambda: ProcessBotPlayer(bot), log=None, undo_steps=0) for _ in range(4)]
+    turns = play_games(games, max_turns=200)
+    assert turns
+    assert max(pending) > 1
+    assert all(player.bot_failures == 0 for game in games for player in game.players)
+    bot.close()
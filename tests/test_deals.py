@@ -0,0 +1,38 @@
+from deals import DealBlock
+from deck import CARD_TABLE, Deck
+from game import Game
+from simulator import BatchSimulator
+import numpy as np
+
+
+def test_deal_block_reproducible():
+    first = DealBlock(100, seed=5)
+    second = DealBlock(100, seed=5)
+    assert len(first) == 100
+    assert (first.orders == second.orders).all()
+    assert (np.sort(first.orders, axis=1) == np.arange(52)).all()
+    assert (first.orders != DealBlock(100, seed=6).orders).any()
+
+
+def test_deal_cards_are_interned():
+    block = DealBlock(2, seed=1)
+    cards = block[0]
+    assert sorted(CARD_TABLE.index(card) for card in cards) == list(range(52))
+    assert all(card is CARD_TABLE[index] for card, index in zip(cards, block.orders[0]))
+    assert all(card is CARD_TABLE[CARD_TABLE.index(card)] for card in Deck().deck)
+
+
+def test_game_from_deal():
+    block = DealBlock(3, seed=2)
+    game = Game(3, render=False, deck=block.deck(1))
+    cards = block[1]
+    assert game.center_card is cards[-16]
+    assert game.players[0].hand == [cards[-1], cards[-4], cards[-7], cards[-10], cards[-13]]
+    assert game.players[2].hand == [cards[-3], cards[-6], cards[-9], cards[-12], cards[-15]]
+    assert len(game.deck) == 36
+
+    simulator = BatchSimulator(3, 3, deals=block)
+    for seat, player in enumerate(game.players):
+        held = np.flatnonzero(simulator.hands[1, seat])
+        assert sorted(CARD_TABLE.index(card) for card in player.hand) == held.tolist()
+    assert CARD_TABLE[simulator.center[1]] is game.center_card
@@ -0,0 +1,75 @@
+from card import Card
+from endgame import EndgameSolver, FULL_DECK
+from players import ComputerPlayer
+from rules import Move, Position
+
+
+def test_solve_finds_win():
+    position = Position(
+        (
+            (Card("9", "spades"), Card("2", "spades"), Card("2", "hearts")),
+            (Card("8", "spades"),),
+        ),
+        Card("7", "spades"),
+        (),
+        0,
+        (0, 0),
+    )
+    values = dict(EndgameSolver().solve(position))
+    assert values[Move((Card("9", "spades"), Card("2", "spades"), Card("2", "hearts")))] == 1
+    assert values[Move((Card("9", "spades"),))] == -1
+
+
+def test_solve_lost_position():
+    position = Position(
+        ((Card("2", "hearts"), Card("9", "hearts")), (Card("8", "spades"),)),
+        Card("7", "spades"),
+        (),
+        0,
+        (0, 0),
+        (Card("5", "diamonds"),),
+    )
+    assert EndgameSolver().solve(position) == [(Move(()), -1)]
+
+
+def known_game_state(hand: list[Card], opponent: list[Card], center: Card) -> dict:
+    visible = set(hand) | set(opponent) | {center}
+    return {
+        "center": center,
+        "prev_len": len(opponent),
+        "next_len": len(opponent),
+        "seat_lens": (len(hand), len(opponent)),
+        "discarded": tuple(card for card in FULL_DECK if card not in visible),
+    }
+
+
+def test_computer_player_uses_solver():
+    hand = [Card("6", "hearts"), Card("4", "spades"), Card("queen", "clubs")]
+    opponent = [Card("9", "spades"), Card("9", "clubs")]
+    game_state = known_game_state(hand, opponent, Card("king", "spades"))
+
+    heuristic = ComputerPlayer()
+    heuristic.endgame = None
+    heuristic._hand = list(hand)
+    assert heuristic.find_best_plays(**game_state) == [Card("queen", "clubs"), Card("4", "spades")]
+
+    player = ComputerPlayer()
+    player._hand = list(hand)
+    assert player.find_best_plays(**game_state) == [Card("4", "spades")]
+
+
+def test_solver_respects_node_limit():
+    hand = [Card("6", "hearts"), Card("4", "spades"), Card("queen", "clubs")]
+    opponent = [Card("9", "spades"), Card("9", "clubs")]
+    game_state = known_game_state(hand, opponent, Card("king", "spades"))
+    solver = EndgameSolver(max_nodes=1)
+    assert solver.best_move(hand, **game_state) is None
+    assert solver.nodes == 2
+
+
+def test_solver_returns_move_solved_before_limit():
+    hand = [Card("6", "hearts"), Card("4", "spades"), Card("queen", "clubs")]
+    opponent = [Card("9", "spades"), Card("9", "clubs")]
+    game_state = known_game_state(hand, opponent, Card("king", "spades"))
+    solver = EndgameSolver(max_nodes=6, samples=1)
+    assert solver.best_move(hand, **game_state) == Move((Card("4", "spades"),))
@@ -0,0 +1,31 @@
+from card import Card
+from engine import GameEngine
+from players import ComputerPlayer
+import subprocess
+import sys
+
+
+def test_first_seat_selects_after_jack():
+    game = GameEngine(2)
+    assert all(isinstance(player, ComputerPlayer) for player in game.players)
+    game.players[0].deal_hand([Card("7", "clubs"), Card("7", "hearts")])
+    game.game_params["jack"] = True
+    game._next_turn()
+    assert game.game_params["value"] == ("7", 4)
+    game._speculator.shutdown()
+
+
+def test_headless_tools_dont_import_pygame():
+    code = "import sys, server, simulator, training, tuning; print('pygame' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_move_log_turned_off(capsys):
+    logged = []
+    game = GameEngine(2, log=logged.append)
+    game.play_headless(50)
+    assert logged
+    quiet = GameEngine(2, log=None)
+    quiet.play_headless(50)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,70 @@
+from card import Card
+from endgame import FULL_DECK
+from expectimax import ExpectimaxPlayer
+from players import ComputerPlayer
+
+
+HAND = [
+    Card("2", "hearts"),
+    Card("7", "clubs"),
+    Card("9", "diamonds"),
+    Card("queen", "clubs"),
+    Card("5", "spades"),
+]
+
+
+def attack_game_state() -> dict:
+    """
+    Opponent's hand is drawn from few unseen cards, most of them counter a two
+    """
+    center = Card("7", "hearts")
+    unseen = {
+        Card("3", "hearts"),
+        Card("2", "spades"),
+        Card("2", "clubs"),
+        Card("3", "spades"),
+        Card("8", "diamonds"),
+        Card("6", "clubs"),
+    }
+    visible = set(HAND) | unseen | {center}
+    return {
+        "center": center,
+        "prev_len": 5,
+        "next_len": 5,
+        "seat_lens": (5, 5),
+        "discarded": tuple(card for card in FULL_DECK if card not in visible),
+    }
+
+
+def test_expectimax_avoids_countered_attack():
+    heuristic = ComputerPlayer()
+    heuristic._hand = list(HAND)
+    assert heuristic.find_best_plays(**attack_game_state())[-1] == Card("2", "hearts")
+
+    player = ExpectimaxPlayer(time_budget=5)
+    player._hand = list(HAND)
+    plays = player.find_best_plays(**attack_game_state())
+    assert Card("2", "hearts") not in plays
+    assert player.searched_depth == player.max_depth
+
+
+def test_expectimax_falls_back_to_heuristic():
+    player = ExpectimaxPlayer(time_budget=0)
+    player._hand = list(HAND)
+    heuristic = ComputerPlayer()
+    heuristic._hand = list(HAND)
+    game_state = attack_game_state()
+    assert player.find_best_plays(**game_state) == heuristic.find_best_plays(**game_state)
+    assert player.searched_depth == 0
+
+    game_state.pop("seat_lens")
+    player.decision_cache.clear()
+    assert player.find_best_plays(**game_state) == heuristic.find_best_plays(**game_state)
+
+
+def test_card_probability_uniform():
+    player = ExpectimaxPlayer()
+    player._hand = list(HAND)
+    belief = player._root_belief(**attack_game_state())
+    assert len(belief.unseen) == 6
+    assert player.card_probability(1, Card("3", "hearts"), belief) == 5 / 6
@@ -0,0 +1,78 @@
+from card import Card
+from deals import DealBlock
+from engine import GameEngine
+from game import Game
+from history import NothingToRedo, NothingToUndo
+from snapshot import snapshot
+from zobrist import ZobristHash
+import pytest
+import random
+
+
+def test_undo_and_redo_whole_game():
+    random.seed(2)
+    game = Game(3, render=False, human=False, deck=DealBlock(1, seed=9).deck(0))
+    for player in game.players:
+        player.endgame = None
+    states = []
+    while len(game.finished) < 2 and len(states) < 300:
+        game.journal.checkpoint(game)
+        states.append(snapshot(game))
+        game._play_turn()
+    states.append(snapshot(game))
+    assert game.journal.steps == len(states) - 1
+
+    for state in reversed(states[:-1]):
+        game.undo()
+        assert snapshot(game) == state
+        assert game._zobrist.key == ZobristHash.from_game(game).key
+    with pytest.raises(NothingToUndo):
+        game.undo()
+
+    for state in states[1:]:
+        game.redo()
+        assert snapshot(game) == state
+    with pytest.raises(NothingToRedo):
+        game.redo()
+
+
+def test_new_action_drops_redo():
+    game = Game(2, render=False)
+    game.players[0].deal_hand([Card("7", "spades"), Card("9", "clubs")])
+    game._center_card = Card("7", "hearts")
+    game.journal.checkpoint(game)
+    game._play_card(Card("7", "spades"), game.players[0])
+    game.undo()
+    assert game.players[0].hand == [Card("7", "spades"), Card("9", "clubs")]
+    assert game.center_card == Card("7", "hearts")
+    assert game.journal.can_redo
+
+    game.journal.checkpoint(game)
+    game._take_cards(game.players[0])
+    assert not game.journal.can_redo
+    assert len(game.players[0].hand) == 3
+
+
+def test_journal_keeps_last_steps():
+    game = GameEngine(3, deck=DealBlock(1, seed=9).deck(0), log=None, undo_steps=5)
+    for player in game.players:
+        player.endgame = None
+    states = []
+    for _ in range(40):
+        game.journal.checkpoint(game)
+        states.append(snapshot(game))
+        game._play_turn()
+    assert game.journal.steps == 5
+    for state in reversed(states[-5:]):
+        game.undo()
+        assert snapshot(game) == state
+    with pytest.raises(NothingToUndo):
+        game.undo()
+    game._speculator.shutdown()
+
+
+def test_journal_turned_off():
+    game = GameEngine(3, log=None, undo_steps=0)
+    game.play_headless(40)
+    assert game.journal.steps == 0
+    assert not game.journal.entries
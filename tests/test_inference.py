@@ -0,0 +1,71 @@
+from card import Card
+from constants import VALUES
+from deck import CARD_INDEX
+from game import Game
+from inference import HandInference
+from players import ComputerPlayer
+import numpy as np
+
+
+def test_initial_probabilities():
+    inference = HandInference(3, Card("7", "hearts"))
+    assert np.allclose(inference.holding.sum(axis=1), 5)
+    assert not inference.holding[:, CARD_INDEX[Card("7", "hearts")]].any()
+
+
+def test_pass_and_draw():
+    center = Card("7", "hearts")
+    inference = HandInference(2, center)
+    inference.passed(1, center, {})
+    row = inference.holding[1]
+    assert np.isclose(row.sum(), 5)
+    assert row[CARD_INDEX[Card("9", "hearts")]] < row[CARD_INDEX[Card("9", "clubs")]] / 10
+    assert row[CARD_INDEX[Card("7", "clubs")]] < row[CARD_INDEX[Card("9", "clubs")]] / 10
+    assert np.isclose(inference.holding[0].sum(), 5)
+
+    inference.drew(1, 2)
+    assert np.isclose(inference.holding[1].sum(), 7)
+    assert row[CARD_INDEX[Card("9", "hearts")]] > 0
+
+
+def test_play_and_reshuffle():
+    inference = HandInference(2, Card("7", "hearts"))
+    inference.played(0, Card("9", "hearts"))
+    assert not inference.holding[:, CARD_INDEX[Card("9", "hearts")]].any()
+    assert not inference.hidden[CARD_INDEX[Card("9", "hearts")]]
+    assert np.isclose(inference.holding[0].sum(), 4)
+    inference.reshuffled([Card("7", "hearts")])
+    assert inference.hidden[CARD_INDEX[Card("7", "hearts")]]
+    assert not inference.holding[:, CARD_INDEX[Card("7", "hearts")]].any()
+
+
+def test_beliefs_exclude_own_hand():
+    inference = HandInference(3, Card("7", "hearts"))
+    hand = [Card("2", "spades"), Card("queen", "clubs")]
+    beliefs = inference.beliefs([1, 2, 0], hand)
+    assert beliefs[0].sum() == 2
+    assert beliefs[0][CARD_INDEX[Card("2", "spades")]] == 1
+    assert not beliefs[1:, CARD_INDEX[Card("queen", "clubs")]].any()
+    assert np.allclose(beliefs[1:].sum(axis=1), 5)
+
+
+def test_game_tracks_draws():
+    game = Game(2, render=False)
+    game.players[0]._hand = [Card("2", "spades"), Card("9", "clubs")]
+    game._center_card = Card("7", "hearts")
+    game._take_cards(game.players[0])
+    assert np.isclose(game.inference.holding[0].sum(), 6)
+
+
+def test_val_select_uses_beliefs():
+    items = VALUES[3:9] + ["None"]
+    player = ComputerPlayer()
+    player._hand = [Card("7", "spades"), Card("7", "clubs"), Card("9", "clubs"), Card("9", "spades")]
+    assert player.val_select(items) == items.index("7")
+
+    beliefs = np.zeros((2, 52))
+    beliefs[1][[CARD_INDEX[Card("7", suit)] for suit in ["hearts", "diamonds"]]] = 0.9
+    player.beliefs = beliefs
+    assert player.val_select(items) == items.index("9")
+    player._hand = []
+    assert player.val_select(items) == items.index("None")
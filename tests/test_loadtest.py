@@ -0,0 +1,25 @@
+from concurrent.futures import ProcessPoolExecutor
+from loadtest import run_level
+from server import GameServer
+import asyncio
+
+
+def test_run_level():
+    async def run():
+        server = await GameServer().serve_tcp()
+        port = server.sockets[0].getsockname()[1]
+        with ProcessPoolExecutor(2) as executor:
+            report = await asyncio.wait_for(
+                run_level("127.0.0.1", port, tables=3, seats=2, executor=executor), timeout=120
+            )
+        server.close()
+        return report
+
+    report = asyncio.run(run())
+    assert report.games == 3
+    assert report.clients == 6
+    assert report.actions > 0
+    assert report.latencies[0] <= report.latencies[2] <= report.latencies[3]
+    assert report.tables_per_second > 0
+    assert "tables/s" in str(report)
+
@@ -0,0 +1,62 @@
+from deals import DealBlock
+from game import Game
+from match import Standings
+from zobrist import ZobristHash
+
+
+class FinishedGame:
+    def __init__(self, players: list[str], finished: list[str]) -> None:
+        self.players: list[str] = players
+        self.finished: list[str] = finished
+
+
+def played_game(seed: int) -> Game:
+    game = Game(3, render=False, human=False, deck=DealBlock(1, seed=seed).deck(0))
+    game.play_headless(max_turns=20)
+    return game
+
+
+def test_new_game_resets_engine():
+    game = played_game(5)
+    players = list(game.players)
+    deck = DealBlock(1, seed=6).deck(0)
+    game.new_game(deck)
+    assert game.players == players
+    assert game.deck is deck
+    assert game.finished == []
+    assert not game.game_over
+    assert game.current_player_index == 0
+    assert game.game_params == {}
+    assert len(game.discarded_deck) == 0
+    assert game.journal.entries == []
+    for player in game.players:
+        assert len(player.hand) == 5
+        assert not player.finished
+        assert not player.makao_status
+        assert not player.skip_turns
+        assert not player.check_moved()
+    assert game.position_key == ZobristHash.from_game(game).position_key(game.game_params, 0)
+
+
+def test_new_game_same_as_fresh_game():
+    game = played_game(5)
+    game.new_game(DealBlock(1, seed=6).deck(0))
+    fresh = Game(3, render=False, human=False, deck=DealBlock(1, seed=6).deck(0))
+    assert [player.hand for player in game.players] == [player.hand for player in fresh.players]
+    assert game.center_card == fresh.center_card
+    assert len(game.deck) == len(fresh.deck)
+    assert game.position_key == fresh.position_key
+
+
+def test_standings():
+    standings = Standings(["HumanPlayer", "Computer1", "Computer2"])
+    standings.record(FinishedGame(["a", "b", "c"], ["b", "a"]))
+    standings.record(FinishedGame(["a", "b", "c"], ["b"]))
+    assert standings.games == 2
+    assert standings.wins == [0, 2, 0]
+    assert standings.points == [1 + 1, 2 + 2, 0 + 0]
+    assert standings.table() == [
+        "1. Computer1: 4 points, 2 wins",
+        "2. HumanPlayer: 2 points, 0 wins",
+        "3. Computer2: 0 points, 0 wins",
+    ]
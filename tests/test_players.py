@@ -1,5 +1,7 @@
 from card import Card
+from deck import CARD_TABLE
 from players import ComputerPlayer
+import random
 
 
 def test_find_move_one_card():
@@ -332,3 +334,90 @@ def test_find_best_plays_queen_3():
     center = Card("jack", "hearts")
     params = {"center": center, "value": ("7", 1)}
     assert player.find_best_plays(**params) == []
+
+
+def test_find_best_plays_reuses_decision():
+    player = ComputerPlayer()
+    player._hand = [Card("9", "spades"), Card("8", "spades"), Card("7", "hearts")]
+    params = {"center": Card("7", "spades"), "prev_len": 3, "next_len": 4}
+    first = player.find_best_plays(**params)
+    first.clear()
+    assert player.find_best_plays(**params) == [
+        Card("9", "spades"),
+        Card("8", "spades"),
+    ]
+    assert player.decision_cache.hits == 1
+    assert player.decision_cache.misses == 1
+
+
+def test_decision_cache_invalidated_by_inputs():
+    player = ComputerPlayer()
+    player._hand = [Card("king", "spades"), Card("king", "hearts"), Card("8", "spades")]
+    params = {"center": Card("king", "diamonds")}
+    assert player.find_best_plays(**params) == [Card("king", "hearts")]
+    params.update({"prev_len": 3, "next_len": 4})
+    assert player.find_best_plays(**params) == [Card("king", "spades")]
+    params.update({"suit": ("hearts", 1)})
+    assert player.find_best_plays(**params) == [Card("king", "hearts")]
+    player._hand.append(Card("2", "hearts"))
+    player.find_best_plays(**params)
+    assert player.decision_cache.misses == 4
+    assert player.decision_cache.hits == 0
+
+
+def test_decision_key_ignores_pile_outside_endgame():
+    player = ComputerPlayer()
+    player._hand = [Card("9", "spades"), Card("8", "spades"), Card("7", "hearts")]
+    state = {"center": Card("7", "spades"), "prev_len": 5, "next_len": 6, "seat_lens": (3, 6, 7, 5)}
+    key = player.decision_key(**state, discarded=(Card("5", "clubs"),))
+    assert player.decision_key(**state, discarded=(Card("6", "clubs"), Card("queen", "hearts"))) == key
+    assert player.decision_key(**{**state, "seat_lens": (3, 6, 9, 5)}) == key
+
+    endgame = {**state, "prev_len": 1, "next_len": 1, "seat_lens": (3, 1, 1)}
+    assert player.decision_key(**endgame, discarded=(Card("5", "clubs"),)) != player.decision_key(**endgame)
+
+
+def test_decision_cache_is_bounded():
+    player = ComputerPlayer()
+    player._hand = [Card("9", "spades")]
+    for value in ["2", "3", "4", "5", "6", "7", "8", "10"] * 10:
+        player.find_best_plays(center=Card(value, "spades"))
+    assert len(player.decision_cache) <= 32
+
+
+def test_rank_movesets_top_k():
+    player = ComputerPlayer()
+    player._hand = [Card("2", "spades"), Card("8", "spades"), Card("7", "hearts")]
+    ranked = player.rank_movesets(3, center=Card("7", "spades"))
+    assert len(ranked) == 3
+    assert ranked[0] == ("next_draw", [Card("8", "spades"), Card("2", "spades")])
+    keys = [player.move_sort_key(descriptor, len(moveset)) for descriptor, moveset in ranked]
+    assert keys == sorted(keys)
+
+
+def test_rank_movesets_stops_on_end():
+    player = ComputerPlayer()
+    player._hand = [Card("8", "spades"), Card("9", "spades")]
+    ranked = player.rank_movesets(5, center=Card("7", "spades"))
+    assert ranked == [("end", [Card("8", "spades"), Card("9", "spades")])]
+
+
+def test_permutation_cap_keeps_ranking_of_normal_hands():
+    rng = random.Random(7)
+    for _ in range(100):
+        cards = rng.sample(CARD_TABLE, 9)
+        player = ComputerPlayer()
+        player._hand = cards[:8]
+        game_state = {"center": cards[8], "prev_len": 5, "next_len": 5}
+        capped = player.rank_movesets(3, **game_state)
+        player.MAX_PERMUTATIONS = 10**9
+        assert player.rank_movesets(3, **game_state) == capped
+
+
+def test_val_select_returns_index_of_most_common_value():
+    items = ["5", "6", "7", "8", "9", "10", "None"]
+    player = ComputerPlayer()
+    player.deal_hand([Card("5", "spades"), Card("5", "clubs"), Card("5", "hearts"), Card("7", "clubs")])
+    assert items[player.val_select(items)] == "5"
+    player.deal_hand([Card("queen", "spades")])
+    assert items[player.val_select(items)] == "None"
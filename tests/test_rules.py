@@ -0,0 +1,87 @@
+from card import Card
+from rules import Move, Position, apply_move, is_legal_sequence, legal_moves, turn_sequences
+
+
+def test_turn_sequences_stop_early():
+    hand = (Card("8", "spades"), Card("9", "spades"))
+    sequences = set(turn_sequences(hand, Card("7", "spades"), {}))
+    assert sequences == {
+        (Card("8", "spades"),),
+        (Card("9", "spades"),),
+        (Card("8", "spades"), Card("9", "spades")),
+        (Card("9", "spades"), Card("8", "spades")),
+    }
+
+
+def test_turn_sequences_last_card_limit():
+    hand = tuple(Card(value, "spades") for value in ["5", "6", "7", "8", "9"])
+    sequences = list(turn_sequences(hand, Card("10", "spades"), {}))
+    assert max(len(sequence) for sequence in sequences) == 4
+
+
+def test_penalty_is_drawn():
+    stock = (Card("5", "diamonds"), Card("6", "diamonds"))
+    position = Position(
+        ((Card("2", "spades"), Card("9", "hearts")), (Card("8", "clubs"),)),
+        Card("7", "spades"),
+        (),
+        0,
+        (0, 0),
+        stock,
+    )
+    position = apply_move(position, Move((Card("2", "spades"),)))
+    assert position.seat == 1
+    assert position.game_params == {"penalty": 2}
+    assert legal_moves(position) == [Move(())]
+    position = apply_move(position, Move(()))
+    assert position.seat == 0
+    assert position.game_params == {}
+    assert len(position.hands[1]) == 3
+    assert position.stock == ()
+
+
+def test_spades_king_goes_backwards():
+    position = Position(
+        (
+            (Card("king", "spades"), Card("5", "clubs")),
+            (Card("8", "diamonds"),),
+            (Card("3", "clubs"),),
+        ),
+        Card("7", "spades"),
+        (),
+        0,
+        (0, 0, 0),
+        tuple(Card(value, "hearts") for value in ["5", "6", "7", "8", "9"]),
+    )
+    position = apply_move(position, Move((Card("king", "spades"),)))
+    assert position.seat == 2
+    assert position.game_params == {"king": True, "penalty": 5}
+    position = apply_move(position, Move(()))
+    assert len(position.hands[2]) == 6
+    assert position.seat == 1
+    assert position.skips == (0, 0, 0)
+
+
+def test_jack_selection():
+    position = Position(
+        ((Card("jack", "spades"), Card("5", "clubs")), (Card("8", "clubs"),)),
+        Card("7", "spades"),
+        (),
+        0,
+        (0, 0),
+    )
+    moves = legal_moves(position)
+    assert Move((Card("jack", "spades"),), None) in moves
+    position = apply_move(position, Move((Card("jack", "spades"),), "5"))
+    assert position.game_params == {"value": ("5", 4)}
+
+
+def test_is_legal_sequence_matches_turn_sequences():
+    hand = [Card("8", "spades"), Card("9", "spades"), Card("king", "spades"), Card("9", "hearts")]
+    center = Card("7", "spades")
+    sequences = set(turn_sequences(tuple(hand), center, {}))
+    assert is_legal_sequence(hand, [], center, {})
+    for first in hand + [Card("5", "clubs")]:
+        for second in hand:
+            cards = [first, second]
+            assert is_legal_sequence(hand, cards, center, {}) == (tuple(cards) in sequences)
@@ -0,0 +1,121 @@
+from deals import DealBlock
+from deck import CARD_INDEX, CARD_TABLE
+from players import ComputerPlayer
+from server import GameClient, GameServer, ProtocolError, Table
+import asyncio
+import pytest
+import time
+
+
+class SlowPlayer(ComputerPlayer):
+    def find_best_plays(self, **game_state):
+        time.sleep(0.2)
+        return super().find_best_plays(**game_state)
+
+
+def _legal_card(state):
+    center = CARD_TABLE[state["center"]]
+    params = {key: tuple(value) if isinstance(value, list) else value for key, value in state["params"].items()}
+    for index in state["hand"]:
+        if center.can_play(CARD_TABLE[index], **params):
+            return index
+    return None
+
+
+async def _play(client, table, seats, computers=0):
+    await client.send("join", table=table, seats=seats, computers=computers)
+    seat = (await client.receive())["seat"]
+    moved = False
+    for _ in range(3000):
+        message = await client.receive()
+        if message["type"] == "over":
+            return message
+        if message["type"] == "error":
+            await client.send("draw")
+            continue
+        if message["current"] != seat:
+            moved = False
+            continue
+        if not moved:
+            card = _legal_card(message)
+            await client.send("draw") if card is None else await client.send("play", card=card)
+            moved = True
+            continue
+        if not message["hand"]:
+            await client.send("makao_out")
+        else:
+            if len(message["hand"]) == 1:
+                await client.send("makao")
+                await client.receive()
+            await client.send("next", selection="hearts")
+        moved = False
+    raise AssertionError("Game has not finished")
+
+
+def test_table_actions():
+    block = DealBlock(1, seed=11)
+    table = Table("t", 2, deck=block.deck(0))
+    table._writers = [object(), object()]
+    hand = table.game.players[0].hand
+    with pytest.raises(ProtocolError):
+        table.act(1, {"op": "draw"})
+    with pytest.raises(ProtocolError):
+        table.act(0, {"op": "fold"})
+    with pytest.raises(ProtocolError):
+        table.act(0, {"op": "play", "card": CARD_INDEX[table.game.players[1].hand[0]]})
+
+    table.act(0, {"op": "draw"})
+    assert len(hand) == 6
+    table.act(0, {"op": "next"})
+    assert table.game.current_player_index == 1
+    assert table.state(1)["hand"] == [CARD_INDEX[card] for card in table.game.players[1].hand]
+
+
+def test_computer_turn_doesnt_block_event_loop():
+    table = Table("t", 2, computers=1, computer_player=SlowPlayer, deck=DealBlock(1, seed=11).deck(0))
+    table._writers = [object()]
+    table.act(0, {"op": "draw"})
+    table.act(0, {"op": "next"})
+
+    async def run():
+        ticks = 0
+        advance = asyncio.ensure_future(table.advance())
+        while not advance.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks
+
+    assert asyncio.run(run()) >= 10
+    assert table.game.current_player_index == 0
+
+
+def test_remote_player_selection():
+    table = Table("t", 2)
+    player = table.game.players[0]
+    player.pending_selection = "spades"
+    assert player.selection(["clubs", "spades", "diamonds", "hearts"]) == 1
+    assert player.selection(["5", "6", "None"]) == 2
+
+
+def test_games_over_sockets(tmp_path):
+    async def run():
+        game_server = GameServer()
+        server = await game_server.serve_tcp()
+        port = server.sockets[0].getsockname()[1]
+        unix_server = await game_server.serve_unix(str(tmp_path / "makao.sock"))
+        clients = [await GameClient.connect_tcp("127.0.0.1", port) for _ in range(2)]
+        clients.append(await GameClient.connect_unix(str(tmp_path / "makao.sock")))
+        results = await asyncio.wait_for(asyncio.gather(
+            _play(clients[0], "remote", 2),
+            _play(clients[1], "remote", 2),
+            _play(clients[2], "computer", 2, computers=1),
+        ), timeout=60)
+        for client in clients:
+            await client.close()
+        server.close()
+        unix_server.close()
+        return results
+
+    results = asyncio.run(run())
+    assert results[0]["finished"] == results[1]["finished"]
+    assert all(len(result["finished"]) == 1 for result in results)
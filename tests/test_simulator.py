@@ -0,0 +1,75 @@
+from card import Card
+from constants import SUITS, VALUES
+from game import Game
+from engine import GameEngine
+from simulator import BatchSimulator, PolicyPlayer, card_index
+import numpy as np
+
+
+def test_legal_cards_match_can_play():
+    random = np.random.default_rng(3)
+    simulator = BatchSimulator(1, 2, seed=3)
+    cards = [Card(value, suit) for value in VALUES for suit in SUITS]
+    for _ in range(300):
+        center = cards[random.integers(len(cards))]
+        game_params = {}
+        match random.integers(6):
+            case 1:
+                game_params["skip"] = 1
+            case 2:
+                game_params["value"] = (VALUES[random.integers(3, 9)], 2)
+            case 3:
+                game_params["suit"] = (SUITS[random.integers(4)], 1)
+            case 4:
+                game_params["penalty"] = 2
+            case 5:
+                game_params["penalty"] = 5
+                game_params["king"] = True
+        simulator._center[0] = card_index(center.value, center.suit)
+        simulator._skip[0] = game_params.get("skip", 0)
+        simulator._penalty[0] = game_params.get("penalty", 0)
+        simulator._king[0] = game_params.get("king", False)
+        simulator._req_value[0] = VALUES.index(game_params["value"][0]) if "value" in game_params else -1
+        simulator._req_suit[0] = SUITS.index(game_params["suit"][0]) if "suit" in game_params else -1
+        legal = simulator.legal_cards(np.array([0]))[0]
+        for card in cards:
+            if card != center:
+                assert legal[card_index(card.value, card.suit)] == center.can_play(card, **game_params)
+
+
+def test_batch_games_finish():
+    simulator = BatchSimulator(200, 4, seed=7)
+    winners = simulator.run()
+    assert simulator.done.all()
+    assert (simulator.card_counts() == 52).all()
+    finished = simulator.turns < 2000
+    assert (winners[finished] >= 0).all()
+    assert (np.sort(simulator.places[finished], axis=1) == np.arange(4)).all()
+
+
+def test_batch_games_reproducible():
+    first = BatchSimulator(50, 3, seed=11).run()
+    second = BatchSimulator(50, 3, seed=11).run()
+    assert (first == second).all()
+
+
+def test_headless_game():
+    game = Game(2, render=False, human=False)
+    for player in game.players:
+        player.endgame = None
+    turns = game.play_headless()
+    assert game.game_over
+    assert len(game.finished) == 1 or turns == 2000
+
+
+def test_policy_player_moves_like_batch_simulator():
+    player = PolicyPlayer(seed=5)
+    player.deal_hand([Card("jack", "clubs"), Card("7", "hearts"), Card("7", "spades")])
+    assert player.find_best_plays(center=Card("9", "clubs"), next_len=5) == [Card("jack", "clubs")]
+    assert player.selection_after([Card("jack", "clubs")]) == "7"
+    player.deal_hand([Card("2", "clubs"), Card("5", "clubs")])
+    assert player.find_best_plays(center=Card("9", "clubs"), next_len=5) == [Card("5", "clubs")]
+    assert player.find_best_plays(center=Card("9", "clubs"), next_len=1) == [Card("2", "clubs")]
+    game = GameEngine(3, PolicyPlayer, log=None, undo_steps=0)
+    turns = game.play_headless()
+    assert len(game.finished) == 2 or turns == 2000
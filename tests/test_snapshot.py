@@ -0,0 +1,72 @@
+from card import Card
+from deals import DealBlock
+from game import Game
+from snapshot import SnapshotError, load, restore, snapshot
+import pytest
+import random
+
+
+def _played_game(turns: int = 12) -> Game:
+    random.seed(1)
+    game = Game(3, render=False, human=False, deck=DealBlock(1, seed=8).deck(0))
+    for player in game.players:
+        player.endgame = None
+    game.play_headless(turns)
+    return game
+
+
+def test_snapshot_round_trip():
+    game = _played_game()
+    game.game_params.update({"value": ("7", 3), "penalty": 5, "king": True})
+    game.players[1].skip_turns = 2
+    data = snapshot(game)
+    assert len(data) < 100
+
+    restored = Game(3, render=False, human=False)
+    restore(restored, data)
+    assert snapshot(restored) == data
+    assert restored.position_key == game.position_key
+    assert restored.game_params == game.game_params
+    assert [player.hand for player in restored.players] == [player.hand for player in game.players]
+    assert restored.deck.deck == game.deck.deck
+    assert restored.players[1].skip_turns == 2
+    assert restored.inference.holding[0].sum() == pytest.approx(len(game.players[0].hand))
+
+
+def test_restore_rejects_bad_snapshots():
+    data = snapshot(_played_game())
+    with pytest.raises(SnapshotError):
+        restore(Game(2, render=False), data)
+    with pytest.raises(SnapshotError):
+        restore(Game(3, render=False), b"XYZ" + data[3:])
+    with pytest.raises(SnapshotError):
+        restore(Game(3, render=False), data[:-5])
+
+
+def test_quit_saves_snapshot(tmp_path):
+    path = str(tmp_path / "game.mks")
+    game = Game(2, render=False, snapshot_path=path)
+    game.players[0].deal_hand([Card("7", "spades"), Card("9", "clubs")])
+    game._handle_quit_event()
+
+    resumed = Game(2, render=False)
+    load(resumed, path)
+    assert resumed.players[0].hand == [Card("7", "spades"), Card("9", "clubs")]
+    assert game.game_over and not resumed.game_over
+
+    game.finished.append(game.players[1])
+    game._handle_quit_event()
+    with pytest.raises(FileNotFoundError):
+        load(resumed, path)
+
+
+def test_makao_saved_without_position_change(tmp_path):
+    path = str(tmp_path / "game.mks")
+    game = Game(2, render=False, snapshot_path=path)
+    game._save_snapshot()
+    game.players[0].makao_set_reset(True)
+    game._save_snapshot()
+
+    resumed = Game(2, render=False)
+    load(resumed, path)
+    assert resumed.players[0].makao_status
@@ -0,0 +1,47 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from spectator import SpectatorGrid
+
+
+def test_cells_drawn_only_when_changed():
+    grid = SpectatorGrid(games=4, player_number=2, size=(400, 300), turn_interval=0)
+    try:
+        assert len(grid.frame()) == 4
+        assert grid.frame() == []
+        grid.cells[0].advance()
+        assert grid.frame() == [grid.cells[0].rect]
+    finally:
+        grid.close()
+
+
+def test_cells_share_sprites():
+    grid = SpectatorGrid(games=4, player_number=2, size=(400, 300), turn_interval=0)
+    try:
+        grid.frame()
+        misses = grid.sprites.misses
+        for cell in grid.cells:
+            cell.advance()
+        grid.frame()
+        assert grid.sprites.hits > 0
+        assert grid.sprites.misses - misses < grid.sprites.hits
+    finally:
+        grid.close()
+
+
+def test_finished_game_restarted():
+    grid = SpectatorGrid(games=1, player_number=2, size=(200, 150), turn_interval=0, restart_delay=0)
+    try:
+        cell = grid.cells[0]
+        for _ in range(1000):
+            if cell.over:
+                break
+            grid.play_due(0.0)
+        assert cell.over
+        grid.play_due(1.0)
+        grid.play_due(1.0)
+        assert not cell.over
+        assert cell.turns == 0
+    finally:
+        grid.close()
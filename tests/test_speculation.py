@@ -0,0 +1,61 @@
+from card import Card
+from game import Game
+from speculation import Speculator, predict_game_states
+
+
+def computer_game_state(game: Game) -> dict:
+    player = game.get_current_player()
+    player.beliefs = game.inference.beliefs(game._seat_order(player), player.hand)
+    return game._computer_game_state(player)
+
+
+def prepared_game() -> Game:
+    game = Game(3, render=False)
+    game.players[0]._hand = [Card("8", "hearts"), Card("2", "spades"), Card("5", "clubs")]
+    game.players[1]._hand = [Card("2", "hearts"), Card("9", "spades"), Card("queen", "clubs")]
+    game._center_card = Card("7", "spades")
+    return game
+
+
+def test_predicts_draw():
+    game = prepared_game()
+    speculator = Speculator()
+    player, states, beliefs = predict_game_states(game, game.players[0])
+    assert player is game.players[1]
+    speculator.speculate(player, states, beliefs)
+
+    game._take_cards(game.players[0])
+    game._next_turn()
+    game_state = computer_game_state(game)
+    expected = player.find_best_plays(**game_state)
+    assert speculator.lookup(player, **game_state) == expected
+    assert speculator.hits == 1
+    assert speculator.pending == 0
+    speculator.shutdown()
+
+
+def test_predicts_penalty_card():
+    game = prepared_game()
+    speculator = Speculator()
+    player, states, beliefs = predict_game_states(game, game.players[0])
+    speculator.speculate(player, states, beliefs)
+
+    game._render_center_card = lambda: None
+    game._play_card(game.players[0].hand[1], game.players[0])
+    game._next_turn()
+    game_state = computer_game_state(game)
+    assert game_state["penalty"] == 2
+    assert speculator.lookup(player, **game_state) == [Card("2", "hearts")]
+    assert speculator.hits == 1
+    speculator.shutdown()
+
+
+def test_unpredicted_state_misses():
+    game = prepared_game()
+    speculator = Speculator()
+    player, states, beliefs = predict_game_states(game, game.players[0])
+    speculator.speculate(player, states, beliefs)
+    game_state = {"center": Card("ace", "diamonds"), "prev_len": 1, "next_len": 1}
+    assert speculator.lookup(player, **game_state) is None
+    assert speculator.misses == 1
+    speculator.shutdown()
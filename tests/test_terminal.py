@@ -0,0 +1,138 @@
+from card import Card
+from deals import DealBlock
+from engine import GameEngine
+from players import ComputerPlayer, TerminalPlayer
+from terminal import MoveLog, TerminalGame, card_glyph, new_game
+import curses
+import subprocess
+import sys
+
+
+class FakeScreen:
+    def __init__(self, keys=None) -> None:
+        self.keys: list[int] = list(keys or [])
+        self.rows: dict[int, str] = {}
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return 40, 120
+
+    def addstr(self, y, x, text, attr=0) -> None:
+        row = self.rows.get(y, "").ljust(x)
+        self.rows[y] = row[:x] + text + row[x + len(text):]
+
+    def erase(self) -> None:
+        self.rows.clear()
+
+    def refresh(self) -> None:
+        pass
+
+    def getch(self) -> int:
+        return self.keys.pop(0) if self.keys else ord("\n")
+
+    def text(self) -> str:
+        return "\n".join(self.rows[y] for y in sorted(self.rows))
+
+
+def terminal_game(seed: int = 3, player_number: int = 2) -> TerminalGame:
+    terminal = TerminalGame(FakeScreen())
+    players = [TerminalPlayer(terminal.choose)] + [ComputerPlayer() for _ in range(player_number - 1)]
+    terminal.game = GameEngine(player_number, deck=DealBlock(1, seed=seed).deck(0), players=players)
+    return terminal
+
+
+def play_turn(terminal: TerminalGame) -> None:
+    game = terminal.game
+    hand = terminal.human.hand
+    playable = [index for index, card in enumerate(hand) if game.center_card.can_play(card, **game.game_params)]
+    if playable:
+        terminal.selected = playable[0]
+        terminal.handle_key(ord("\n"))
+    else:
+        terminal.handle_key(ord("d"))
+    if game.current_player_index:
+        return
+    if not hand:
+        terminal.handle_key(ord("o"))
+        return
+    if len(hand) == 1:
+        terminal.handle_key(ord("m"))
+    terminal.handle_key(ord("n"))
+
+
+def test_card_glyph():
+    assert card_glyph(Card("10", "hearts")) == "10♥"
+    assert card_glyph(Card("queen", "spades")) == "Q♠"
+    assert card_glyph(Card("ace", "clubs")) == "A♣"
+
+
+def test_move_log_keeps_last_lines():
+    log = MoveLog(max_lines=2)
+    log.write("first\nsec")
+    log.write("ond\n")
+    assert log.lines == ["first", "second"]
+    print("third", file=log)
+    assert log.lines == ["second", "third"]
+
+
+def test_new_game_seats_terminal_player_first():
+    game = new_game(3, lambda items: 0)
+    assert isinstance(game.players[0], TerminalPlayer)
+    assert all(isinstance(player, ComputerPlayer) for player in game.players[1:])
+    game._speculator.shutdown()
+
+
+def test_terminal_doesnt_import_pygame():
+    code = "import sys, terminal; terminal.new_game(2, lambda items: 0); print('pygame' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_game_played_with_keys():
+    terminal = terminal_game()
+    terminal.advance()
+    for _ in range(500):
+        if terminal.over:
+            break
+        play_turn(terminal)
+        terminal.draw()
+    assert terminal.over
+    assert terminal.log.lines
+    assert "You" in terminal._screen.text()
+
+
+def test_wrong_card_not_played():
+    terminal = terminal_game()
+    game = terminal.game
+    game._center_card = Card("5", "hearts")
+    terminal.human._hand = [Card("7", "spades"), Card("8", "clubs")]
+    terminal.handle_key(ord("\n"))
+    assert len(terminal.human.hand) == 2
+    assert game.current_player_index == 0
+    assert "can't be played" in terminal.message
+
+
+def test_undo_takes_back_computer_turns():
+    terminal = terminal_game()
+    game = terminal.game
+    hand = list(terminal.human.hand)
+    center = game.center_card
+    terminal.handle_key(ord("d"))
+    terminal.handle_key(ord("n"))
+    assert game.current_player_index == 0
+    assert terminal.human.hand != hand
+    terminal.handle_key(ord("u"))
+    assert len(terminal.human.hand) == len(hand) + 1
+    terminal.handle_key(ord("u"))
+    assert terminal.human.hand == hand
+    assert game.center_card == center
+    terminal.handle_key(ord("r"))
+    terminal.handle_key(ord("r"))
+    assert game.current_player_index == 0
+    assert len(terminal.human.hand) == len(hand) + 1
+
+
+def test_choose_with_arrows_and_digits():
+    terminal = terminal_game()
+    terminal._screen.keys = [curses.KEY_RIGHT, curses.KEY_RIGHT, ord("\n"), ord("3")]
+    assert terminal.choose(["clubs", "spades", "diamonds", "hearts"]) == 2
+    assert terminal.choose(["5", "6", "7", "None"]) == 2
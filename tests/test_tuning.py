@@ -0,0 +1,35 @@
+from card import Card
+from deals import DealBlock
+from players import ComputerPlayer, MoveWeights
+from tuning import EvolutionTuner, evaluate
+
+
+def test_weights_save_load(tmp_path):
+    path = str(tmp_path / "weights.json")
+    weights = MoveWeights(normal=0.5, length_bonus=2)
+    weights.save(path)
+    assert MoveWeights.load(path) == weights
+
+
+def test_weights_change_ranking():
+    game_state = {"center": Card("7", "hearts"), "prev_len": 5, "next_len": 5}
+    hand = [Card("2", "hearts"), Card("9", "clubs"), Card("7", "clubs")]
+    player = ComputerPlayer()
+    player._hand = list(hand)
+    assert player.rank_movesets(1, **game_state)[0] == ("next_draw", [Card("2", "hearts")])
+
+    player = ComputerPlayer(MoveWeights(next_draw=6))
+    player._hand = list(hand)
+    assert player.rank_movesets(1, **game_state)[0] == ("normal", [Card("7", "clubs"), Card("9", "clubs")])
+
+
+def test_evaluate_and_tune():
+    deals = DealBlock(2, seed=4)
+    place = evaluate(MoveWeights(), deals, players=2)
+    assert 0 <= place <= 1
+
+    tuner = EvolutionTuner(population=2, generations=1, games=2, players=2, workers=1, seed=0)
+    weights = tuner.run()
+    assert isinstance(weights, MoveWeights)
+    assert len(tuner.history) == 1
+    assert tuner.history[0][0] == weights
@@ -0,0 +1,56 @@
+from card import Card
+from deals import DealBlock
+from players import ComputerPlayer
+from training import collect_experience
+from value_model import FEATURES, LinearValueModel, feature_matrix
+import numpy as np
+
+
+HAND = [Card("2", "hearts"), Card("9", "clubs"), Card("7", "clubs")]
+GAME_STATE = {"center": Card("7", "hearts"), "prev_len": 4, "next_len": 6}
+
+
+def test_feature_matrix():
+    movesets = [[Card("2", "hearts")], [Card("7", "clubs"), Card("9", "clubs")], []]
+    features = feature_matrix(HAND, movesets, **GAME_STATE)
+    assert features.shape == (3, len(FEATURES))
+    column = {feature: features[:, index].tolist() for index, feature in enumerate(FEATURES)}
+    assert column["hand_size"] == [2, 1, 3]
+    assert column["penalty_cards"] == [0, 1, 1]
+    assert column["penalty"] == [2, 0, 0]
+    assert column["center_suit_matches"] == [0, 0, 1]
+    assert column["center_value_matches"] == [0, 0, 1]
+    assert column["closest_neighbour"] == [4, 4, 4]
+
+
+def test_fit_recovers_weights():
+    random = np.random.default_rng(0)
+    features = random.normal(size=(500, len(FEATURES)))
+    weights = random.normal(size=len(FEATURES))
+    model = LinearValueModel.fit(features, features @ weights, logistic=False, l2=0)
+    assert np.allclose(model.weights, weights)
+
+    outcomes = (features @ weights > 0).astype(float)
+    model = LinearValueModel.fit(features, outcomes)
+    assert ((model.score(features) > 0) == outcomes).mean() > 0.95
+
+
+def test_player_ranks_with_value_model(tmp_path):
+    weights = np.zeros(len(FEATURES))
+    weights[FEATURES.index("penalty")] = 1
+    path = str(tmp_path / "model.json")
+    LinearValueModel(weights).save(path)
+    player = ComputerPlayer(value_model=LinearValueModel.load(path))
+    player._hand = list(HAND)
+    assert player.rank_movesets(1, **GAME_STATE) == [("next_draw", [Card("2", "hearts")])]
+
+    weights[FEATURES.index("penalty")] = 0
+    weights[FEATURES.index("hand_size")] = -1
+    player.value_model = LinearValueModel(weights)
+    assert player.rank_movesets(1, **GAME_STATE) == [("normal", [Card("7", "clubs"), Card("9", "clubs")])]
+
+
+def test_collect_experience():
+    features, outcomes = collect_experience(DealBlock(2, seed=3), players=2)
+    assert features.shape == (len(outcomes), len(FEATURES))
+    assert set(outcomes.tolist()) <= {0, 1}
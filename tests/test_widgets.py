@@ -0,0 +1,90 @@
+import pygame as pg
+import pytest
+from pygame.event import Event
+from assets import TextCache
+from widgets import Widget, WidgetLayer, HOVER, INACTIVE, PRESSED
+
+
+class CountingWidget(Widget):
+    def __init__(self, x: int, y: int) -> None:
+        self.clicks: int = 0
+        super().__init__(x, y, 10, 10, on_release=self.count)
+
+    def count(self) -> None:
+        self.clicks += 1
+
+    def draw(self, surface) -> None:
+        pass
+
+
+def click(pos: tuple[int, int], release_pos=None) -> list[Event]:
+    return [
+        Event(pg.MOUSEBUTTONDOWN, pos=pos, button=1),
+        Event(pg.MOUSEBUTTONUP, pos=release_pos or pos, button=1),
+    ]
+
+
+def test_click_inside():
+    widget = CountingWidget(0, 0)
+    assert widget.handle_event(Event(pg.MOUSEBUTTONDOWN, pos=(5, 5), button=1)) is False
+    assert widget.state == PRESSED
+    assert widget.handle_event(Event(pg.MOUSEBUTTONUP, pos=(5, 5), button=1)) is True
+    assert widget.state == HOVER
+    assert widget.clicks == 1
+
+
+def test_release_outside_does_not_click():
+    widget = CountingWidget(0, 0)
+    for event in click((5, 5), release_pos=(50, 50)):
+        widget.handle_event(event)
+    assert widget.clicks == 0
+    assert widget.state == INACTIVE
+
+
+def test_right_click_ignored():
+    widget = CountingWidget(0, 0)
+    widget.handle_event(Event(pg.MOUSEBUTTONDOWN, pos=(5, 5), button=3))
+    widget.handle_event(Event(pg.MOUSEBUTTONUP, pos=(5, 5), button=3))
+    assert widget.clicks == 0
+
+
+def test_update_only_given_group():
+    layer = WidgetLayer(TextCache())
+    game_widget = layer.add(CountingWidget(0, 0), "buttons")
+    menu_widget = layer.add(CountingWidget(0, 0), "menu")
+    layer.update(click((5, 5)), group="menu")
+    assert menu_widget.clicks == 1
+    assert game_widget.clicks == 0
+    layer.update(click((5, 5)))
+    assert menu_widget.clicks == 2
+    assert game_widget.clicks == 1
+
+
+def test_closed_menus_are_freed():
+    layer = WidgetLayer(TextCache())
+    layer.add(CountingWidget(0, 0), "buttons")
+    for menu in range(100):
+        layer.add(CountingWidget(0, 0), menu)
+        layer.remove_group(menu)
+    assert len(layer) == 1
+
+
+def test_moved_widget_clicked_at_new_place():
+    widget = CountingWidget(0, 0)
+    widget.move_to(100, 50)
+    assert widget.rect.topleft == (100, 50)
+    assert widget.rect.size == (10, 10)
+    layer = WidgetLayer(TextCache())
+    layer.add(widget, "buttons")
+    layer.update(click((5, 5)))
+    assert widget.clicks == 0
+    layer.update(click((105, 55)))
+    assert widget.clicks == 1
+
+
+def test_widget_without_draw_not_created():
+    class SilentWidget(Widget):
+        pass
+
+    with pytest.raises(TypeError):
+        SilentWidget(0, 0, 10, 10)
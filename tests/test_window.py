@@ -0,0 +1,46 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game import Game
+from pygame.event import Event
+import pygame as pg
+
+
+def opened_game() -> Game:
+    game = Game(2)
+    while not game._assets_ready():
+        pass
+    return game
+
+
+def test_resize_events_coalesced():
+    game = opened_game()
+    try:
+        buttons = list(game.widgets.group("buttons"))
+        for width in range(1100, 1300, 10):
+            game._handle_video_resize_event(Event(pg.VIDEORESIZE, size=(width, 900)))
+            game._apply_resize()
+        assert game.window_width == 1050
+        game._resize_at = 0
+        game._apply_resize()
+        assert (game.window_width, game.window_height) == (1290, 900)
+        assert game.window.get_size() == (1290, 900)
+        assert game.widgets.group("buttons") == buttons
+        assert buttons[1].rect.right == 1290 - 5
+        assert buttons[1].rect.bottom == 900 - 5
+    finally:
+        game._speculator.shutdown()
+        pg.quit()
+
+
+def test_window_not_smaller_than_minimum():
+    game = opened_game()
+    try:
+        game._handle_video_resize_event(Event(pg.VIDEORESIZE, size=(900, 900)))
+        game._resize_at = 0
+        game._apply_resize()
+        assert (game.window_width, game.window_height) == (game.min_width, game.min_height)
+    finally:
+        game._speculator.shutdown()
+        pg.quit()
@@ -0,0 +1,49 @@
+from card import Card
+from deals import DealBlock
+from game import Game
+from rules import Position, apply_move, legal_moves
+from zobrist import CENTER, STOCK, ZobristHash, params_key, position_key
+import random
+
+
+def test_move_is_reversible():
+    zobrist = ZobristHash()
+    card = Card("7", "hearts")
+    zobrist.move(card, STOCK, 0)
+    assert zobrist.key
+    zobrist.move(card, 0, CENTER)
+    assert zobrist.key == ZobristHash.from_placement([], card, []).key
+    zobrist.move(card, CENTER, STOCK)
+    assert zobrist.key == 0
+
+
+def test_params_key():
+    assert params_key({}) == params_key({"penalty": 0}) == 0
+    assert params_key({"value": ("7", 4)}) != params_key({"value": ("7", 3)})
+    assert params_key({"suit": ("hearts", 1), "skip": 1}) == params_key({"skip": 1, "suit": ("hearts", 1)})
+
+
+def test_game_key_is_incremental():
+    random.seed(0)
+    game = Game(2, render=False, human=False, deck=DealBlock(1, seed=3).deck(0))
+    for player in game.players:
+        player.endgame = None
+    keys = {game.position_key}
+    turns = 0
+    while not game.finished:
+        game._play_turn()
+        assert game._zobrist.key == ZobristHash.from_game(game).key
+        keys.add(game.position_key)
+        turns += 1
+    assert len(keys) == turns + 1
+
+    same_deal = Game(2, render=False, human=False, deck=DealBlock(1, seed=3).deck(0))
+    assert same_deal.position_key != game.position_key
+
+
+def test_position_key():
+    hands = ((Card("7", "hearts"), Card("9", "clubs")), (Card("2", "spades"),))
+    position = Position(hands, Card("7", "clubs"), (), 0, (0, 0), (Card("5", "hearts"),))
+    assert position_key(position) == position_key(Position(*position))
+    keys = {position_key(apply_move(position, move)) for move in legal_moves(position)}
+    assert len(keys) == len(legal_moves(position))
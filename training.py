@@ -0,0 +1,66 @@
+from card import Card
+from deals import DealBlock
+from engine import GameEngine
+from players import ComputerPlayer
+from typing import Optional
+from value_model import FEATURES, LinearValueModel, feature_matrix
+import argparse
+import numpy as np
+
+
+class RecordingPlayer(ComputerPlayer):
+    def __init__(self, **kwargs) -> None:
+        """
+        Computer player that logs features of the position after each of its moves
+        """
+        super().__init__(**kwargs)
+        self.log: list[np.ndarray] = []
+
+    def find_best_plays(self, **game_state) -> list[Card]:
+        hand: list[Card] = list(self.hand)
+        best_moves: list[Card] = super().find_best_plays(**game_state)
+        self.log.append(feature_matrix(hand, [best_moves], **game_state)[0])
+        return best_moves
+
+
+def collect_experience(
+    deals: DealBlock, players: int = 4, max_turns: int = 500
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Plays one headless game for every deal and logs positions after every computer move
+
+    :return: Features of logged positions and 1 if the player that moved won the game, 0 otherwise
+    """
+    features: list[np.ndarray] = []
+    outcomes: list[int] = []
+    for row in range(len(deals)):
+        game: GameEngine = GameEngine(
+            players, computer_player=RecordingPlayer, deck=deals.deck(row), log=None, undo_steps=0
+        )
+        for player in game.players:
+            player.endgame = None
+        game.play_headless(max_turns)
+        winner: Optional[ComputerPlayer] = game.finished[0] if game.finished else None
+        for player in game.players:
+            features += player.log
+            outcomes += [int(player is winner)] * len(player.log)
+    return np.array(features).reshape(-1, len(FEATURES)), np.array(outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train linear value model on self-play games")
+    parser.add_argument("--games", type=int, default=200, help="Number of played games")
+    parser.add_argument("--players", type=int, default=4, help="Number of players in every game")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of dealt games")
+    parser.add_argument("--least-squares", action="store_true", help="Fit least squares instead of logistic regression")
+    parser.add_argument("--output", default="value_model.json", help="File the model is written to")
+    args = parser.parse_args()
+
+    features, outcomes = collect_experience(DealBlock(args.games, seed=args.seed), args.players)
+    model: LinearValueModel = LinearValueModel.fit(features, outcomes, logistic=not args.least_squares)
+    model.save(args.output)
+    print(f"Model fitted on {len(outcomes)} positions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
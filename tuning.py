@@ -0,0 +1,132 @@
+from concurrent.futures import ProcessPoolExecutor
+from deals import DealBlock
+from engine import GameEngine
+from functools import partial
+from players import MoveWeights
+from typing import Optional
+import argparse
+import numpy as np
+
+
+def evaluate(
+    weights: MoveWeights,
+    deals: DealBlock,
+    players: int = 4,
+    max_turns: int = 500,
+) -> float:
+    """
+    Plays one headless game for every deal with one player using given weights and
+    the others using default weights. Tuned player's seat changes from game to game.
+    Endgame solver is turned off, so that only the weights decide.
+
+    :param weights: Tuned weights
+    :param deals: Deck orders of played games
+    :param players: Number of players in every game
+    :param max_turns: Games are stopped after this number of turns
+    :return: Mean place of the tuned player, 0 is the best and players - 1 the worst,
+        player that didn't finish gets the last place
+    """
+    places: list[int] = []
+    for row in range(len(deals)):
+        game: GameEngine = GameEngine(players, deck=deals.deck(row), log=None, undo_steps=0)
+        for player in game.players:
+            player.endgame = None
+        tuned = game.players[row % players]
+        tuned.weights = weights
+        game.play_headless(max_turns)
+        places.append(game.finished.index(tuned) if tuned in game.finished else players - 1)
+    return float(np.mean(places))
+
+
+class EvolutionTuner:
+    def __init__(
+        self,
+        population: int = 16,
+        generations: int = 10,
+        games: int = 40,
+        players: int = 4,
+        sigma: float = 0.5,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Tunes MoveWeights with a simple evolution strategy. Every generation candidates
+        are sampled around the mean weights and evaluated in parallel on the same deals,
+        the mean moves to the best quarter of candidates.
+
+        :param population: Number of candidates in a generation, the current mean is one of them
+        :param generations: Number of generations
+        :param games: Number of games every candidate plays in a generation
+        :param players: Number of players in every game
+        :param sigma: Starting standard deviation of candidates, it decreases every generation
+        :param workers: Number of processes, all cores are used if not given
+        :param seed: Seed of the random generator used for candidates and deals
+        """
+        self._population: int = population
+        self._generations: int = generations
+        self._games: int = games
+        self._players: int = players
+        self._sigma: float = sigma
+        self._workers: Optional[int] = workers
+        self._random: np.random.Generator = np.random.default_rng(seed)
+        self._history: list[tuple[MoveWeights, float]] = []
+
+    @property
+    def history(self) -> list[tuple[MoveWeights, float]]:
+        """
+        Returns the best candidate and its mean place of every generation
+        """
+        return self._history
+
+    def run(self, start: Optional[MoveWeights] = None) -> MoveWeights:
+        """
+        Runs all generations
+
+        :param start: Weights the search starts from, default weights if not given
+        :return: Candidate with the best mean place found in any generation
+        """
+        mean: np.ndarray = np.array(start if start is not None else MoveWeights(), dtype=float)
+        sigma: float = self._sigma
+        elite_size: int = max(1, self._population // 4)
+        best: tuple[MoveWeights, float] = (MoveWeights(*mean), float("inf"))
+        with ProcessPoolExecutor(self._workers) as executor:
+            for _ in range(self._generations):
+                deals: DealBlock = DealBlock(self._games, seed=int(self._random.integers(2 ** 32)))
+                offsets: np.ndarray = self._random.standard_normal((self._population - 1, len(mean)))
+                candidates: np.ndarray = np.vstack([mean, mean + sigma * offsets])
+                scores: list[float] = list(executor.map(
+                    partial(evaluate, deals=deals, players=self._players),
+                    [MoveWeights(*candidate.tolist()) for candidate in candidates],
+                ))
+                order: np.ndarray = np.argsort(scores, kind="stable")
+                self._history.append((MoveWeights(*candidates[order[0]].tolist()), scores[order[0]]))
+                if scores[order[0]] < best[1]:
+                    best = self._history[-1]
+                mean = candidates[order[:elite_size]].mean(axis=0)
+                sigma *= 0.85
+        return best[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune computer player's weights with self-play")
+    parser.add_argument("--population", type=int, default=16, help="Candidates in a generation")
+    parser.add_argument("--generations", type=int, default=10, help="Number of generations")
+    parser.add_argument("--games", type=int, default=40, help="Games played by every candidate")
+    parser.add_argument("--players", type=int, default=4, help="Number of players in every game")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the tuner")
+    parser.add_argument("--output", default="weights.json", help="File the best weights are written to")
+    args = parser.parse_args()
+
+    tuner: EvolutionTuner = EvolutionTuner(
+        args.population, args.generations, args.games, args.players, workers=args.workers, seed=args.seed
+    )
+    weights: MoveWeights = tuner.run()
+    for generation, (_, score) in enumerate(tuner.history):
+        print(f"Generation {generation}: best mean place {score:.2f}")
+    weights.save(args.output)
+    print(f"Weights written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
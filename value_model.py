@@ -0,0 +1,193 @@
+from card import Card
+from constants import SUITS, VALUES
+from deck import CARD_INDEX, CARD_TABLE
+from rules import apply_effect, is_attacking_king
+from typing import Any, Optional
+import json
+import numpy as np
+
+
+CARD_FEATURES: list[str] = [
+    "penalty_cards",
+    "fours",
+    "jacks",
+    "queens",
+    "aces",
+    "attacking_kings",
+    "other_kings",
+]
+FEATURES: list[str] = [
+    "bias",
+    "hand_size",
+    *CARD_FEATURES,
+    "suits",
+    "longest_suit",
+    "center_value_matches",
+    "center_suit_matches",
+    "penalty",
+    "skip",
+    "king",
+    "jack",
+    "ace",
+    "prev_len",
+    "next_len",
+    "closest_neighbour",
+]
+
+
+def _card_feature_table() -> np.ndarray:
+    """
+    Returns array with shape (52, len(CARD_FEATURES)), counted card kinds of every card
+    """
+    table: np.ndarray = np.zeros((len(CARD_TABLE), len(CARD_FEATURES)))
+    for index, card in enumerate(CARD_TABLE):
+        kind: Optional[str] = None
+        if card.value in ["2", "3"]:
+            kind = "penalty_cards"
+        elif card.value == "4":
+            kind = "fours"
+        elif card.value == "jack":
+            kind = "jacks"
+        elif card.value == "queen":
+            kind = "queens"
+        elif card.value == "ace":
+            kind = "aces"
+        elif card.value == "king":
+            kind = "attacking_kings" if is_attacking_king(card) else "other_kings"
+        if kind:
+            table[index, CARD_FEATURES.index(kind)] = 1
+    return table
+
+
+CARD_FEATURE_TABLE: np.ndarray = _card_feature_table()
+VALUE_ONE_HOT: np.ndarray = np.eye(len(VALUES))[np.arange(len(CARD_TABLE)) // len(SUITS)]
+SUIT_ONE_HOT: np.ndarray = np.eye(len(SUITS))[np.arange(len(CARD_TABLE)) % len(SUITS)]
+
+
+def feature_matrix(hand: list[Card], movesets: list[list[Card]], **game_state) -> np.ndarray:
+    """
+    Extracts features of the position after every moveset is played from the hand
+
+    :param hand: Player's hand before the move
+    :param movesets: Candidate movesets, empty moveset means drawing
+    :key center: Current center card
+    :key prev_len: Length of the previous player's deck
+    :key next_len: Length of the next player's deck
+    :return: Array with shape (len(movesets), len(FEATURES))
+    """
+    center: Card = game_state["center"]
+    prev_len: int = game_state.get("prev_len", 0)
+    next_len: int = game_state.get("next_len", 0)
+    game_params: dict[str, Any] = {
+        key: value
+        for key, value in game_state.items()
+        if key not in ["center", "prev_len", "next_len", "seat_lens", "discarded"]
+    }
+
+    hand_indices: np.ndarray = np.array([CARD_INDEX[card] for card in hand], dtype=np.int64)
+    positions: dict[Card, int] = {card: position for position, card in enumerate(hand)}
+    remaining: np.ndarray = np.ones((len(movesets), len(hand)))
+    centers: np.ndarray = np.empty(len(movesets), dtype=np.int64)
+    params: np.ndarray = np.zeros((len(movesets), 5))
+    for row, moveset in enumerate(movesets):
+        moveset_params: dict[str, Any] = dict(game_params)
+        for card in moveset:
+            remaining[row, positions[card]] = 0
+            moveset_params = apply_effect(moveset_params, card)
+        centers[row] = CARD_INDEX[moveset[-1] if moveset else center]
+        params[row] = [
+            moveset_params.get("penalty", 0),
+            moveset_params.get("skip", 0),
+            bool(moveset_params.get("king", False)),
+            bool(moveset_params.get("jack", False)),
+            bool(moveset_params.get("ace", False)),
+        ]
+
+    suit_counts: np.ndarray = remaining @ SUIT_ONE_HOT[hand_indices]
+    value_counts: np.ndarray = remaining @ VALUE_ONE_HOT[hand_indices]
+    return np.hstack([
+        np.ones((len(movesets), 1)),
+        remaining.sum(axis=1, keepdims=True),
+        remaining @ CARD_FEATURE_TABLE[hand_indices],
+        (suit_counts > 0).sum(axis=1, keepdims=True),
+        suit_counts.max(axis=1, keepdims=True, initial=0),
+        (value_counts * VALUE_ONE_HOT[centers]).sum(axis=1, keepdims=True),
+        (suit_counts * SUIT_ONE_HOT[centers]).sum(axis=1, keepdims=True),
+        params,
+        np.tile([prev_len, next_len, min(prev_len, next_len)], (len(movesets), 1)),
+    ])
+
+
+class LinearValueModel:
+    def __init__(self, weights: Optional[np.ndarray] = None) -> None:
+        """
+        Linear evaluator of positions after a move, the higher score is the better
+        the position is for the player that moved. Used by ComputerPlayer instead of
+        move descriptors when it's given to the player.
+
+        :param weights: Weight of every feature in FEATURES, zeros if not given
+        """
+        self._weights: np.ndarray = (
+            np.zeros(len(FEATURES)) if weights is None else np.asarray(weights, dtype=float)
+        )
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        return features @ self._weights
+
+    def score_movesets(self, hand: list[Card], movesets: list[list[Card]], **game_state) -> np.ndarray:
+        """
+        Scores all movesets of one turn with a single matrix product, see feature_matrix
+        """
+        return self.score(feature_matrix(hand, movesets, **game_state))
+
+    @classmethod
+    def fit(
+        cls,
+        features: np.ndarray,
+        outcomes: np.ndarray,
+        logistic: bool = True,
+        l2: float = 1e-3,
+        iterations: int = 25,
+    ) -> "LinearValueModel":
+        """
+        Fits weights to logged positions
+
+        :param features: Array with shape (positions, len(FEATURES))
+        :param outcomes: Outcome of the game for the player of every position, 1 for a win
+            and 0 for a loss when logistic is True, any number otherwise
+        :param logistic: Fits logistic regression with Newton's method if True,
+            ridge least squares otherwise
+        :param l2: Regularization strength, bias is regularized too
+        :param iterations: Number of Newton's steps of logistic regression
+        """
+        regularization: np.ndarray = l2 * np.eye(features.shape[1])
+        if not logistic:
+            return cls(np.linalg.solve(features.T @ features + regularization, features.T @ outcomes))
+
+        weights: np.ndarray = np.zeros(features.shape[1])
+        for _ in range(iterations):
+            probabilities: np.ndarray = 1 / (1 + np.exp(-(features @ weights)))
+            gradient: np.ndarray = features.T @ (probabilities - outcomes) + l2 * weights
+            hessian: np.ndarray = (features.T * (probabilities * (1 - probabilities))) @ features
+            step: np.ndarray = np.linalg.solve(hessian + regularization, gradient)
+            weights -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        return cls(weights)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file_handle:
+            json.dump(dict(zip(FEATURES, self._weights.tolist())), file_handle, indent=4)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearValueModel":
+        """
+        Reads weights written by save, missing features have zero weight
+        """
+        with open(path, "r") as file_handle:
+            weights: dict[str, float] = json.load(file_handle)
+        return cls(np.array([weights.get(feature, 0.0) for feature in FEATURES]))
@@ -0,0 +1,244 @@
+from assets import TextCache
+import pygame as pg
+from pygame.surfarray import array3d, make_surface
+from pygame import Rect, Surface, font
+from pygame.event import Event
+from abc import ABC, abstractmethod
+from typing import Callable, Hashable, Optional
+
+
+INACTIVE: str = "inactive"
+HOVER: str = "hover"
+PRESSED: str = "pressed"
+
+
+class Widget(ABC):
+    def __init__(
+        self, x: int, y: int, width: int, height: int, on_release: Optional[Callable] = None
+    ) -> None:
+        """
+        Base class for clickable widgets, handles hit-testing and mouse state.
+        Callback is called when left mouse button is pressed and released over the widget.
+
+        :param on_release: Function called without arguments when widget is clicked
+        """
+        self._rect: Rect = Rect(x, y, width, height)
+        self._on_release: Optional[Callable] = on_release
+        self._state: str = INACTIVE
+
+    @property
+    def rect(self) -> Rect:
+        return self._rect
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def contains(self, pos: tuple[int, int]) -> bool:
+        return bool(self.rect.collidepoint(pos))
+
+    def move_to(self, x: int, y: int) -> None:
+        """
+        Moves top left corner of the widget, surfaces built for its states are kept
+        """
+        self._rect.topleft = (x, y)
+
+    def handle_event(self, event: Event) -> bool:
+        """
+        Updates widget's state based on a mouse event
+
+        :param event: Event to handle
+        :return: True if widget was clicked
+        """
+        if event.type not in [pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP]:
+            return False
+        inside: bool = self.contains(event.pos)
+        if event.type == pg.MOUSEMOTION:
+            if not inside:
+                self._state = INACTIVE
+            elif self.state != PRESSED:
+                self._state = HOVER
+        elif event.button != 1:
+            return False
+        elif event.type == pg.MOUSEBUTTONDOWN:
+            self._state = PRESSED if inside else INACTIVE
+        else:
+            clicked: bool = inside and self.state == PRESSED
+            self._state = HOVER if inside else INACTIVE
+            if clicked and self._on_release:
+                self._on_release()
+            return clicked
+        return False
+
+    @abstractmethod
+    def draw(self, surface: Surface) -> None:
+        """
+        Draws the widget in its current state on the surface
+        """
+
+
+class TextButton(Widget):
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        text: str,
+        text_font: font.Font,
+        text_cache: TextCache,
+        on_release: Optional[Callable] = None,
+        inactive_color: tuple[int, ...] = (150, 150, 150),
+        hover_color: tuple[int, ...] = (125, 125, 125),
+        pressed_color: tuple[int, ...] = (100, 100, 100),
+        text_color: tuple[int, int, int] = (0, 0, 0),
+    ) -> None:
+        """
+        Button with solid background and centered text.
+        Surfaces for every state are built once and reused every frame.
+        """
+        super().__init__(x, y, width, height, on_release)
+        self._text: str = text
+        self._font: font.Font = text_font
+        self._text_cache: TextCache = text_cache
+        self._colors: dict[str, tuple[int, ...]] = {
+            INACTIVE: inactive_color,
+            HOVER: hover_color,
+            PRESSED: pressed_color,
+        }
+        self._text_color: tuple[int, int, int] = text_color
+        self._surfaces: dict[str, Surface] = {}
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def _build_surface(self, state: str) -> Surface:
+        surface: Surface = Surface(self.rect.size)
+        surface.fill(self._colors[state])
+        text: Surface = self._text_cache.render(self.text, self._font, self._text_color)
+        surface.blit(text, text.get_rect(center=(self.rect.width // 2, self.rect.height // 2)))
+        return surface
+
+    def draw(self, surface: Surface) -> None:
+        button_surface: Optional[Surface] = self._surfaces.get(self.state, None)
+        if button_surface is None:
+            button_surface = self._build_surface(self.state)
+            self._surfaces[self.state] = button_surface
+        surface.blit(button_surface, self.rect)
+
+
+class ImageButton(Widget):
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        image: Surface,
+        text: str,
+        text_font: font.Font,
+        text_cache: TextCache,
+        on_release: Optional[Callable] = None,
+        text_color: tuple[int, int, int] = (0, 0, 0),
+    ) -> None:
+        """
+        Button showing an image with text drawn on top of it, image is darkened on hover and click
+        """
+        width, height = image.get_size()
+        super().__init__(x, y, width, height, on_release)
+        self._images: dict[str, Surface] = {
+            INACTIVE: image,
+            HOVER: self.modify_brightness(image, 0.85),
+            PRESSED: self.modify_brightness(image, 0.75),
+        }
+        self._font: font.Font = text_font
+        self._text_cache: TextCache = text_cache
+        self._text_color: tuple[int, int, int] = text_color
+        self._text: str = ""
+        self._text_surface: Surface
+        self._text_pos: tuple[int, int]
+        self.set_text(text)
+
+    @staticmethod
+    def modify_brightness(image: Surface, multiplier: float) -> Surface:
+        arr = array3d(image)
+        arr = arr * multiplier
+        return make_surface(arr)
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def set_text(self, text: str) -> None:
+        """
+        Changes button's text, text is only rendered again if it has changed
+        """
+        if text == self._text:
+            return
+        self._text = text
+        self._text_surface = self._text_cache.render(text, self._font, self._text_color)
+        self._text_pos = self._text_surface.get_rect(center=self.rect.center).topleft
+
+    def move_to(self, x: int, y: int) -> None:
+        super().move_to(x, y)
+        self._text_pos = self._text_surface.get_rect(center=self.rect.center).topleft
+
+    def draw(self, surface: Surface) -> None:
+        surface.blit(self._images[self.state], self.rect)
+        surface.blit(self._text_surface, self._text_pos)
+
+
+class WidgetLayer:
+    def __init__(self, text_cache: TextCache) -> None:
+        """
+        Owns all widgets visible in the game. Widgets are registered in named groups,
+        a group is freed as a whole when a menu or layout it belongs to is closed.
+
+        :param text_cache: Cache used to render text of all widgets
+        """
+        self._text_cache: TextCache = text_cache
+        self._groups: dict[Hashable, list[Widget]] = {}
+        self._fonts: dict[tuple[str, int], font.Font] = {}
+
+    @property
+    def text_cache(self) -> TextCache:
+        return self._text_cache
+
+    def font(self, size: int, name: str = "calibri") -> font.Font:
+        """
+        Returns system font with given size, fonts are loaded only once
+        """
+        key: tuple[str, int] = (name, size)
+        if key not in self._fonts:
+            self._fonts[key] = font.SysFont(name, size)
+        return self._fonts[key]
+
+    def add(self, widget: Widget, group: Hashable) -> Widget:
+        self._groups.setdefault(group, []).append(widget)
+        return widget
+
+    def group(self, group: Hashable) -> list[Widget]:
+        return self._groups.get(group, [])
+
+    def remove_group(self, group: Hashable) -> None:
+        self._groups.pop(group, None)
+
+    def __len__(self) -> int:
+        return sum(len(widgets) for widgets in self._groups.values())
+
+    def _selected_widgets(self, group: Optional[Hashable]) -> list[Widget]:
+        if group is not None:
+            return list(self.group(group))
+        return [widget for widgets in self._groups.values() for widget in widgets]
+
+    def update(self, events: list[Event], group: Optional[Hashable] = None) -> None:
+        """
+        Passes mouse events to widgets, only widgets from given group are updated if it's specified
+        """
+        widgets: list[Widget] = self._selected_widgets(group)
+        for event in events:
+            for widget in widgets:
+                widget.handle_event(event)
+
+    def draw(self, surface: Surface, group: Optional[Hashable] = None) -> None:
+        for widget in self._selected_widgets(group):
+            widget.draw(surface)
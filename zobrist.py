@@ -0,0 +1,146 @@
+from card import Card
+from deck import CARD_INDEX, CARD_TABLE
+from rules import Position
+from functools import lru_cache
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Any, Union
+
+if TYPE_CHECKING:
+    from game import Game
+
+
+STOCK: str = "stock"
+CENTER: str = "center"
+DISCARD: str = "discard"
+MAX_SEATS: int = 4
+
+Location = Union[int, str]
+
+
+def _random_key(*parts: Any) -> int:
+    """
+    Returns pseudo random 64-bit number derived from parts, the same parts
+    always give the same number in every process
+    """
+    return int.from_bytes(blake2b(repr(parts).encode(), digest_size=8, person=b"makao").digest(), "big")
+
+
+# cards in the draw pile have no key, so drawing or reshuffling only changes
+# keys of cards that are moved
+CARD_KEYS: dict[Location, list[int]] = {
+    location: [_random_key("card", location, index) for index in range(len(CARD_TABLE))]
+    for location in [*range(MAX_SEATS), CENTER, DISCARD]
+}
+SEAT_KEYS: list[int] = [_random_key("seat", seat) for seat in range(MAX_SEATS)]
+
+
+@lru_cache(maxsize=None)
+def param_key(name: str, value: Any) -> int:
+    """
+    Returns key of one game parameter, requested value or suit keys include turns left
+
+    :param name: Parameter name, e.g. "value" or "penalty"
+    :param value: Hashable parameter value, e.g. ("7", 4) or 5
+    """
+    return _random_key("param", name, value)
+
+
+def params_key(game_params: dict[str, Any]) -> int:
+    """
+    Returns key of game parameters, parameters with zero or empty values are skipped
+    so that the same state always has the same key
+    """
+    key: int = 0
+    for name, value in game_params.items():
+        if value:
+            key ^= param_key(name, value)
+    return key
+
+
+def card_key(card: Card, location: Location) -> int:
+    """
+    Returns key of the card at given location, 0 if it's in the draw pile
+
+    :param location: Seat index, CENTER, DISCARD or STOCK
+    """
+    if location == STOCK:
+        return 0
+    return CARD_KEYS[location][CARD_INDEX[card]]
+
+
+class ZobristHash:
+    def __init__(self, key: int = 0) -> None:
+        """
+        Incremental 64-bit Zobrist key of card placement: hands, center card and
+        discard pile, the rest of the cards is in the draw pile. Every moved card
+        updates the key with two XORs. Game parameters and the seat to move are
+        few, so their keys are combined on request, see position_key.
+
+        :param key: Key of the starting placement, 0 if every card is in the draw pile
+        """
+        self._key: int = key
+
+    @property
+    def key(self) -> int:
+        return self._key
+
+    def move(self, card: Card, source: Location, target: Location) -> None:
+        """
+        Updates the key after card was moved
+
+        :param source: Location the card was taken from, seat index, CENTER, DISCARD or STOCK
+        :param target: Location the card was put to
+        """
+        self._key ^= card_key(card, source) ^ card_key(card, target)
+
+    def position_key(self, game_params: dict[str, Any], seat: int) -> int:
+        """
+        Returns key of the whole position with given game parameters and seat to move
+        """
+        return self._key ^ params_key(game_params) ^ SEAT_KEYS[seat]
+
+    @classmethod
+    def from_placement(
+        cls, hands: list[list[Card]], center: Card, discarded: list[Card]
+    ) -> "ZobristHash":
+        """
+        Computes key from scratch, cards not given are in the draw pile
+
+        :param hands: Hands of players in order of seats
+        """
+        zobrist: ZobristHash = cls()
+        for seat, hand in enumerate(hands):
+            for card in hand:
+                zobrist.move(card, STOCK, seat)
+        zobrist.move(center, STOCK, CENTER)
+        for card in discarded:
+            zobrist.move(card, STOCK, DISCARD)
+        return zobrist
+
+    @classmethod
+    def from_game(cls, game: "Game") -> "ZobristHash":
+        return cls.from_placement(
+            [player.hand for player in game.players], game.center_card, game.discarded_deck.deck
+        )
+
+
+def position_key(position: Position) -> int:
+    """
+    Returns key of a search position, cards missing from hands, center
+    and the draw pile are in the discard pile. Turns left to skip are keyed as
+    "skips" parameters of their seats.
+    """
+    zobrist: ZobristHash = ZobristHash.from_placement(
+        [list(hand) for hand in position.hands], position.center, []
+    )
+    placed: set[Card] = {card for hand in position.hands for card in hand}
+    placed.update(position.stock)
+    placed.add(position.center)
+    for card in CARD_TABLE:
+        if card not in placed:
+            zobrist.move(card, STOCK, DISCARD)
+    key: int = zobrist.position_key(position.game_params, position.seat)
+    for seat, skips in enumerate(position.skips):
+        if skips:
+            key ^= param_key("skips", (seat, skips))
+    return key